@@ -1,6 +1,29 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import authentication, cards, timing  # noqa: F401
+        self.check_shared_cache()
+
+    def check_shared_cache(self):
+        """Сброс кеша пользователей должен быть виден всем воркерам."""
+        if (
+            getattr(settings, 'WEB_CONCURRENCY', 1) > 1
+            and settings.CACHES['default']['BACKEND'] in LOCAL_CACHES
+        ):
+            raise ImproperlyConfigured(
+                'При WEB_CONCURRENCY > 1 нужен общий бэкенд CACHES '
+                '(Memcached, Redis): иначе смена роли и удаление '
+                'пользователя не видны другим воркерам.'
+            )
@@ -0,0 +1,214 @@
+"""Асинхронные вьюхи горячих чтений API для ASGI.
+
+Обслуживают анонимные GET-запросы списка и карточки произведения,
+списков отзывов и комментариев и отдают те же данные, что вьюсеты
+DRF. Остальные запросы (запись, фильтры, авторизация, браузерный
+API, ошибки) передаются синхронным вьюсетам, поэтому поведение API
+под ASGI и WSGI одинаково.
+
+Асинхронный ORM используется, если он есть в Django; иначе выборка
+выполняется в пуле потоков через ``sync_to_async``.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.urls import resolve
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from reviews.models import Comment, Review
+
+from .renderers import FastJSONRenderer
+from .serializers import (CommentSerializer, ReviewSerializer,
+                          TitleCardSerializer, TitleReadSerializer)
+from .views import TitleViewSet
+
+ASYNC_ORM = hasattr(QuerySet, 'acount')
+
+# Потоки чтения без асинхронного ORM (в Django 3.2 — все выборки).
+read_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ASYNC_READ_THREADS', 4),
+    thread_name_prefix='async-read',
+)
+
+PAGE_QUERY_PARAM = 'page'
+
+# Форматы, которые выбирает согласование DRF вместо JSON.
+NON_JSON_TYPES = ('text/html', 'application/msgpack')
+
+
+def in_thread(func):
+    """``func`` в потоке ``read_executor``, параллельно с другими чтениями.
+
+    Каждый поток держит своё соединение с БД между запросами, чтобы не
+    открывать его и не выполнять ``PRAGMA`` на каждую выборку. Для
+    PostgreSQL это ``ASYNC_READ_THREADS`` мест в пуле соединений.
+    После ошибки БД соединение закрывается и открывается заново.
+    """
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except DatabaseError:
+            connections.close_all()
+            raise
+
+    return sync_to_async(run, thread_sensitive=False, executor=read_executor)
+
+
+def load_page(queryset, number, size):
+    """Число объектов и объекты страницы ``number``."""
+    offset = (number - 1) * size
+    return queryset.count(), list(queryset[offset:offset + size])
+
+
+async def aload_page(queryset, number, size):
+    # Асинхронный обход выборки не выполняет prefetch_related
+    # до Django 5.0, такие выборки читаются в потоке.
+    if ASYNC_ORM and not queryset._prefetch_related_lookups:
+        offset = (number - 1) * size
+        return await queryset.acount(), [
+            obj async for obj in queryset[offset:offset + size]
+        ]
+    return await in_thread(load_page)(queryset, number, size)
+
+
+def load_first(queryset):
+    return queryset.first()
+
+
+async def aload_first(queryset):
+    if ASYNC_ORM and not queryset._prefetch_related_lookups:
+        return await queryset.afirst()
+    return await in_thread(load_first)(queryset)
+
+
+async def fallback(request, *args, **kwargs):
+    """Передаёт запрос вьюсету DRF из основных маршрутов."""
+    match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+    return await sync_to_async(match.func)(
+        request, *match.args, **match.kwargs
+    )
+
+
+def page_number(request):
+    """Номер страницы или None, если его разбирает вьюсет."""
+    value = request.GET.get(PAGE_QUERY_PARAM, '1')
+    if not value.isdigit() or int(value) < 1:
+        return None
+    return int(value)
+
+
+def is_plain_read(request, params=(PAGE_QUERY_PARAM,)):
+    """Анонимный GET за JSON без параметров, кроме ``params``."""
+    return (
+        request.method == 'GET'
+        and 'HTTP_AUTHORIZATION' not in request.META
+        and not any(
+            media_type in request.META.get('HTTP_ACCEPT', '')
+            for media_type in NON_JSON_TYPES
+        )
+        and set(request.GET) <= set(params)
+    )
+
+
+def json_response(data):
+    response = HttpResponse(
+        FastJSONRenderer().render(data), content_type='application/json'
+    )
+    response['Vary'] = 'Accept'
+    return response
+
+
+def paginated_response(request, number, count, results):
+    """Ответ в формате ``PageNumberPagination``."""
+    url = request.build_absolute_uri()
+    size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    next_link = previous_link = None
+    if number * size < count:
+        next_link = replace_query_param(url, PAGE_QUERY_PARAM, number + 1)
+    if number == 2:
+        previous_link = remove_query_param(url, PAGE_QUERY_PARAM)
+    elif number > 2:
+        previous_link = replace_query_param(
+            url, PAGE_QUERY_PARAM, number - 1
+        )
+    return json_response({
+        'count': count,
+        'next': next_link,
+        'previous': previous_link,
+        'results': results,
+    })
+
+
+async def list_page(request, queryset, serializer_class):
+    """Страница списка; None — ответ за вьюсетом (ошибка или пусто)."""
+    number = page_number(request)
+    if number is None or not is_plain_read(request):
+        return None
+    count, objects = await aload_page(
+        queryset, number, settings.REST_FRAMEWORK['PAGE_SIZE']
+    )
+    if not objects:
+        return None
+    return paginated_response(
+        request, number, count,
+        serializer_class(objects, many=True).data
+    )
+
+
+def async_view(view):
+    """Асинхронная вьюха с передачей прочих запросов вьюсету."""
+
+    async def wrapper(request, *args, **kwargs):
+        response = await view(request, *args, **kwargs)
+        if response is None:
+            return await fallback(request, *args, **kwargs)
+        return response
+
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    # csrf_exempt в Django 3.2 не сохраняет асинхронность вьюхи.
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+@async_view
+async def title_list(request):
+    """Список произведений."""
+    return await list_page(
+        request, TitleViewSet.card_queryset.all(), TitleCardSerializer
+    )
+
+
+@async_view
+async def title_detail(request, pk):
+    """Карточка произведения."""
+    if not is_plain_read(request, params=()):
+        return None
+    title = await aload_first(TitleViewSet.queryset.filter(pk=pk))
+    if title is None:
+        return None
+    return json_response(TitleReadSerializer(title).data)
+
+
+@async_view
+async def review_list(request, title_id):
+    """Отзывы о произведении."""
+    return await list_page(
+        request,
+        Review.objects.filter(title_id=title_id).select_related('author'),
+        ReviewSerializer,
+    )
+
+
+@async_view
+async def comment_list(request, title_id, review_id):
+    """Комментарии к отзыву."""
+    return await list_page(
+        request,
+        Comment.objects.filter(review_id=review_id).select_related('author'),
+        CommentSerializer,
+    )
@@ -0,0 +1,254 @@
+"""Аутентификация по JWT без обращений к БД в типичном запросе."""
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import (
+    BaseAuthentication, get_authorization_header
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.models import User
+from .metrics import record_cache
+from .revocation import revocation_list, revoke_user_tokens
+from .tokens import ROLE_CLAIMS, VERSION_CLAIM
+
+PRINCIPAL_FIELDS = (
+    'id', 'username', 'role', 'is_staff', 'is_superuser', 'is_active'
+)
+NO_USER = -1
+# ``request.auth`` запроса скрейпера с ``METRICS_TOKEN``.
+METRICS_AUTH = 'metrics'
+# Поля, смена которых отзывает выданные пользователю токены.
+RIGHTS_FIELDS = (*ROLE_CLAIMS, 'is_active')
+
+
+class TokenCache:
+    """Ограниченный LRU-кеш проверенных токенов.
+
+    Ключ — хеш токена, запись живёт до истечения срока токена.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.tokens = OrderedDict()
+
+    @staticmethod
+    def key(raw_token):
+        return hashlib.sha256(raw_token).hexdigest()
+
+    def get(self, raw_token):
+        key = self.key(raw_token)
+        with self.lock:
+            token = self.tokens.get(key)
+            if token is None:
+                return None
+            if token['exp'] <= time.time():
+                del self.tokens[key]
+                return None
+            self.tokens.move_to_end(key)
+            return token
+
+    def set(self, raw_token, token):
+        with self.lock:
+            self.tokens[self.key(raw_token)] = token
+            while len(self.tokens) > self.size:
+                self.tokens.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+
+
+token_cache = TokenCache(getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000))
+
+
+def principal_cache_key(user_id):
+    return f'auth:principal:{user_id}'
+
+
+def build_principal(values):
+    """Пользователь только с полями для проверки прав.
+
+    Остальные поля отложены и загрузятся из БД при обращении, поэтому
+    объект можно передавать везде, где ожидается ``User``.
+    """
+    return User.from_db('default', PRINCIPAL_FIELDS, [
+        values[field.attname]
+        for field in User._meta.concrete_fields
+        if field.attname in PRINCIPAL_FIELDS
+    ])
+
+
+def get_principal_values(user_id):
+    """Поля пользователя из кеша с TTL; при промахе — одним запросом."""
+    key = principal_cache_key(user_id)
+    values = cache.get(key)
+    record_cache('auth_principal', values is not None)
+    if values is None:
+        values = User.objects.filter(pk=user_id).values(
+            *PRINCIPAL_FIELDS
+        ).first()
+        if values is None:
+            return None
+        cache.set(key, values, getattr(settings, 'AUTH_PRINCIPAL_TTL', 300))
+    return values
+
+
+def token_version_cache_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов активного пользователя или ``NO_USER``."""
+    key = token_version_cache_key(user_id)
+    version = cache.get(key)
+    record_cache('auth_token_version', version is not None)
+    if version is None:
+        version = User.objects.filter(pk=user_id, is_active=True).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is None:
+            version = NO_USER
+        cache.set(key, version, getattr(settings, 'AUTH_PRINCIPAL_TTL', 300))
+    return version
+
+
+def bump_token_version(user):
+    """Отзывает выданные пользователю токены с ролью."""
+    User.objects.filter(pk=user.pk).update(
+        token_version=F('token_version') + 1
+    )
+    # Иначе следующий save() вернёт в БД старую версию.
+    user.refresh_from_db(fields=['token_version'])
+    cache.delete(token_version_cache_key(user.pk))
+
+
+@receiver(pre_save, sender=User)
+def detect_rights_change(sender, instance, update_fields, raw, **kwargs):
+    """Отмечает смену имени, роли или флагов до сохранения.
+
+    Сигнал срабатывает при любом ``save()``: в API, админке и shell.
+    """
+    instance._rights_changed = False
+    if raw or instance.pk is None:
+        return
+    fields = [
+        field for field in RIGHTS_FIELDS
+        if update_fields is None or field in update_fields
+    ]
+    if not fields:
+        return
+    before = User.objects.filter(pk=instance.pk).values_list(
+        *fields
+    ).first()
+    instance._rights_changed = before is not None and list(before) != [
+        getattr(instance, field) for field in fields
+    ]
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_rights(sender, instance, **kwargs):
+    """Отзывает токены пользователя, если его права изменились."""
+    if getattr(instance, '_rights_changed', False):
+        bump_token_version(instance)
+        revoke_user_tokens(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_principal(sender, instance, **kwargs):
+    """Сбрасывает кеш при изменении роли, флагов или удалении."""
+    cache.delete_many([
+        principal_cache_key(instance.pk),
+        token_version_cache_key(instance.pk),
+    ])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация с кешем токенов и пользователей.
+
+    Подпись проверяется один раз на токен, пользователь берётся из кеша,
+    отзыв токена проверяется по фильтру Блума.
+    Для токенов с ролью (``RoleAccessToken``) пользователь строится
+    по полям токена, а из кеша проверяется только версия токенов.
+    В типичном запросе аутентификация не обращается к БД.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = token_cache.get(raw_token)
+        record_cache('jwt_token', token is not None)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, token)
+        if revocation_list.is_revoked(token[api_settings.JTI_CLAIM]):
+            raise InvalidToken(_('Token is invalid or expired'))
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        if VERSION_CLAIM in validated_token:
+            return self.get_token_user(user_id, validated_token)
+        values = get_principal_values(user_id)
+        if values is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not values['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return build_principal(values)
+
+    def get_token_user(self, user_id, validated_token):
+        """Пользователь по полям токена с ролью."""
+        version = get_token_version(user_id)
+        if version == NO_USER:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if validated_token[VERSION_CLAIM] != version:
+            raise InvalidToken(_('Token is invalid or expired'))
+        values = {claim: validated_token[claim] for claim in ROLE_CLAIMS}
+        values.update(id=user_id, is_active=True)
+        return build_principal(values)
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """Скрейпер метрик по заголовку ``Authorization: Bearer <токен>``.
+
+    Токен задаётся настройкой ``METRICS_TOKEN``; другие заголовки
+    проверяют следующие классы аутентификации.
+    """
+
+    def authenticate(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        if not token:
+            return None
+        expected = f'Bearer {token}'.encode()
+        if not hmac.compare_digest(get_authorization_header(request),
+                                   expected):
+            return None
+        return AnonymousUser(), METRICS_AUTH
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metrics"'
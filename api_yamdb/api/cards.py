@@ -0,0 +1,169 @@
+"""Карточки произведений для списка ``/titles/``.
+
+Сигналы поддерживают поля произведения, категории и жанров в
+``TitleCard``; оценки отзывов учитывают триггеры БД (миграция
+``0008_titlecard``), поэтому запись отзыва остаётся одним запросом.
+Обработчики выполняются в транзакции записи (``CardSourceModel``,
+связи и удаления Django и так пишет атомарно).
+"""
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Title, TitleCard
+
+TitleGenre = Title.genre.through
+
+# Поля произведения в карточке и поля update_fields, которые их меняют.
+TITLE_FIELDS = {
+    'name': ('name',),
+    'year': ('year',),
+    'description': ('description',),
+    'category': ('category_id', 'category_name', 'category_slug'),
+}
+
+
+def genre_slugs(genres):
+    """Слаги через запятую с запятыми по краям: фильтр без JOIN."""
+    return ','.join(['', *(genre['slug'] for genre in genres), ''])
+
+
+def card_genres(title_ids):
+    """Жанры произведений в порядке и формате ``GenreSerializer``."""
+    genres = {title_id: [] for title_id in title_ids}
+    rows = TitleGenre.objects.filter(title_id__in=title_ids).order_by(
+        'genre__name'
+    ).values_list('title_id', 'genre__name', 'genre__slug')
+    for title_id, name, slug in rows:
+        genres[title_id].append({'name': name, 'slug': slug})
+    return genres
+
+
+def title_values(title, fields=None):
+    """Значения полей карточки из произведения."""
+    values = {}
+    for field, columns in TITLE_FIELDS.items():
+        if fields is not None and field not in fields:
+            continue
+        if field == 'category':
+            values.update(
+                category_id=title.category_id,
+                category_name=title.category.name,
+                category_slug=title.category.slug,
+            )
+        else:
+            values[columns[0]] = getattr(title, field)
+    return values
+
+
+def build_cards(titles):
+    """Карточки для выборки произведений, с жанрами и оценками."""
+    titles = list(titles.select_related('category').annotate(
+        score_sum=Sum('reviews__score'), reviews_number=Count('reviews')
+    ))
+    genres = card_genres([title.pk for title in titles])
+    return [
+        TitleCard(
+            title_id=title.pk,
+            genres=genres[title.pk],
+            genre_slugs=genre_slugs(genres[title.pk]),
+            score_total=title.score_sum or 0,
+            review_count=title.reviews_number,
+            rating=(
+                title.score_sum / title.reviews_number
+                if title.reviews_number else None
+            ),
+            **title_values(title),
+        )
+        for title in titles
+    ]
+
+
+def rebuild_title_cards(title_ids=None, batch_size=500):
+    """Пересобирает карточки всех или указанных произведений.
+
+    Возвращает число карточек.
+    """
+    titles = Title.objects.order_by('pk')
+    cards = TitleCard.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+        cards = cards.filter(pk__in=title_ids)
+    ids = list(titles.values_list('pk', flat=True))
+    with transaction.atomic():
+        cards.delete()
+        for start in range(0, len(ids), batch_size):
+            TitleCard.objects.bulk_create(build_cards(
+                Title.objects.filter(pk__in=ids[start:start + batch_size])
+            ))
+    return len(ids)
+
+
+def refresh_card_genres(title_ids):
+    for title_id, genres in card_genres(title_ids).items():
+        TitleCard.objects.filter(pk=title_id).update(
+            genres=genres, genre_slugs=genre_slugs(genres)
+        )
+
+
+@receiver(post_save, sender=Title)
+def save_title_card(sender, instance, created, update_fields, raw,
+                    **kwargs):
+    if raw:
+        return
+    values = title_values(instance, update_fields)
+    if created or values and not TitleCard.objects.filter(
+        pk=instance.pk
+    ).update(**values):
+        rebuild_title_cards([instance.pk])
+
+
+def genre_title_ids(genre):
+    return list(TitleGenre.objects.filter(
+        genre_id=genre.pk
+    ).values_list('title_id', flat=True))
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def change_title_genres(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if action == 'pre_clear' and reverse:
+        # После очистки связей жанра уже не узнать его произведения.
+        instance._card_title_ids = genre_title_ids(instance)
+    elif action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    elif not reverse:
+        refresh_card_genres([instance.pk])
+    elif action == 'post_clear':
+        refresh_card_genres(instance._card_title_ids)
+    else:
+        refresh_card_genres(list(pk_set))
+
+
+@receiver(post_save, sender=Genre)
+def save_genre_cards(sender, instance, created, raw, **kwargs):
+    if created or raw:
+        return
+    refresh_card_genres(genre_title_ids(instance))
+
+
+@receiver(pre_delete, sender=Genre)
+def remember_genre_titles(sender, instance, **kwargs):
+    instance._card_title_ids = genre_title_ids(instance)
+
+
+@receiver(post_delete, sender=Genre)
+def delete_genre_cards(sender, instance, **kwargs):
+    refresh_card_genres(getattr(instance, '_card_title_ids', []))
+
+
+@receiver(post_save, sender=Category)
+def save_category_cards(sender, instance, created, raw, **kwargs):
+    if created or raw:
+        return
+    TitleCard.objects.filter(category_id=instance.pk).update(
+        category_name=instance.name, category_slug=instance.slug
+    )
@@ -0,0 +1,208 @@
+"""Сжатие ответов и раздача заранее сжатой статики."""
+import mimetypes
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Кодировки в порядке предпочтения и расширения сжатых копий статики.
+ENCODINGS = {'br': '.br', 'gzip': '.gz'} if brotli else {'gzip': '.gz'}
+
+mimetypes.add_type('application/yaml', '.yaml')
+mimetypes.add_type('application/yaml', '.yml')
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'application/yaml', 'application/x-yaml',
+    'application/msgpack', 'image/svg+xml',
+)
+
+
+def accepted_encodings(request):
+    """Кодировки из ``Accept-Encoding`` с их весами ``q``.
+
+    Элементы с некорректным весом пропускаются.
+    """
+    accepted = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = None
+        if quality is not None and 0 <= quality <= 1:
+            accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(request, available=ENCODINGS):
+    """Кодировка из ``available`` с наибольшим весом у клиента.
+
+    ``*`` задаёт вес кодировок, не названных явно; при равных весах
+    выбирается первая в ``available``. ``q=0`` запрещает кодировку.
+    """
+    accepted = accepted_encodings(request)
+    default = accepted.get('*', 0)
+    best, best_quality = None, 0
+    for encoding in available:
+        quality = accepted.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type):
+    content_type = content_type.split(';')[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def brotli_quality():
+    return getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=brotli_quality())
+    return compress_string(content)
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=brotli_quality())
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress_stream(sequence, encoding):
+    if encoding == 'br':
+        return brotli_sequence(sequence)
+    return compress_sequence(sequence)
+
+
+def compress_response(request, response):
+    """Сжимает ответ, если клиент это принимает и ответ того стоит.
+
+    Не сжимаются ответы короче ``COMPRESSION_MIN_SIZE`` байт, уже
+    сжатые и несжимаемых типов. Потоковые ответы сжимаются по частям
+    без накопления в памяти.
+    """
+    if (
+        response.has_header('Content-Encoding')
+        or not is_compressible(response.get('Content-Type', ''))
+        or not response.streaming and len(response.content) < getattr(
+            settings, 'COMPRESSION_MIN_SIZE', 1024
+        )
+    ):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = choose_encoding(request)
+    if encoding is None:
+        return response
+    if response.streaming:
+        response.streaming_content = compress_stream(
+            response.streaming_content, encoding
+        )
+        del response['Content-Length']
+    else:
+        content = compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Encoding'] = encoding
+    return response
+
+
+def precompress(path, min_size=None):
+    """Пишет рядом с файлом сжатые копии; возвращает их пути.
+
+    Копии не пишутся для маленьких файлов и несжимаемых типов,
+    а также если сжатие не уменьшает размер.
+    """
+    path = Path(path)
+    if min_size is None:
+        min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+    content_type, _ = mimetypes.guess_type(path.name)
+    content = path.read_bytes()
+    if (
+        content_type is None or not is_compressible(content_type)
+        or len(content) < min_size
+    ):
+        return []
+    written = []
+    for encoding, suffix in ENCODINGS.items():
+        if encoding == 'br':
+            data = brotli.compress(content, quality=11)
+        else:
+            data = compress_string(content)
+        if len(data) >= len(content):
+            continue
+        target = path.with_name(path.name + suffix)
+        target.write_bytes(data)
+        os.utime(target, (path.stat().st_atime, path.stat().st_mtime))
+        written.append(target)
+    return written
+
+
+def find_static(path):
+    """Путь к файлу статики в ``STATIC_ROOT`` или ``STATICFILES_DIRS``."""
+    static_root = getattr(settings, 'STATIC_ROOT', None)
+    if static_root:
+        candidate = Path(safe_join(static_root, path))
+        if candidate.is_file():
+            return candidate
+    found = finders.find(path)
+    return Path(found) if found else None
+
+
+def serve_static(request, path):
+    """Отдаёт файл статики, по возможности — его сжатую копию.
+
+    Копии готовит команда ``compress_static``; копия, которая старше
+    исходного файла, не используется.
+    """
+    original = find_static(path)
+    if original is None or Path(path).suffix in ('.gz', '.br'):
+        raise Http404('Файл не найден.')
+    content_type, _ = mimetypes.guess_type(original.name)
+    available = {
+        encoding: original.with_name(original.name + suffix)
+        for encoding, suffix in ENCODINGS.items()
+    }
+    available = {
+        encoding: variant for encoding, variant in available.items()
+        if variant.is_file()
+        and variant.stat().st_mtime >= original.stat().st_mtime
+    }
+    encoding = choose_encoding(request, available)
+    response = FileResponse(
+        open(available.get(encoding, original), 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    if available:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -1,20 +1,31 @@
 """Фильтры для вьюсетов."""
+from django.db.models import Value
+from django.db.models.functions import StrIndex
 from django_filters import rest_framework as filters
 
-from reviews.models import Title
+from reviews.models import Title, TitleCard
 
 
 class TitleFilter(filters.FilterSet):
     """Фильтр произведения."""
 
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains',
-    )
-    category = filters.CharFilter(
-        field_name='category__slug',
+    genre = filters.CharFilter(field_name='genre__slug')
+    category = filters.CharFilter(field_name='category__slug')
+    name = filters.CharFilter(
+        field_name='name',
         lookup_expr='icontains',
     )
+
+    class Meta:
+        fields = ('name', 'year', 'genre', 'category')
+        model = Title
+
+
+class TitleCardFilter(filters.FilterSet):
+    """Фильтр списка произведений по карточкам."""
+
+    genre = filters.CharFilter(method='filter_genre')
+    category = filters.CharFilter(field_name='category_slug')
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains',
@@ -22,4 +33,14 @@ class TitleFilter(filters.FilterSet):
 
     class Meta:
         fields = ('name', 'year', 'genre', 'category')
-        model = Title
+        model = TitleCard
+
+    def filter_genre(self, queryset, name, value):
+        # contains в SQLite — LIKE без учёта регистра; StrIndex (instr,
+        # strpos) сравнивает слаги точно. Запятая в слаге совпала бы
+        # с соседними слагами в genre_slugs.
+        if ',' in value:
+            return queryset.none()
+        return queryset.alias(genre_position=StrIndex(
+            'genre_slugs', Value(f',{value},')
+        )).filter(genre_position__gt=0)
@@ -0,0 +1,214 @@
+"""Метрики в формате Prometheus.
+
+Каждый процесс копит метрики в памяти и периодически сбрасывает их
+в свой файл в каталоге ``METRICS_DIR``. При выдаче ``/metrics`` файлы
+всех процессов суммируются, поэтому метрики не зависят от того, какой
+воркер обработал запрос скрейпера. Процесс удаляет свой файл при
+выходе, а файлы завершившихся без этого процессов удаляет ``collect``.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+METRICS = {
+    'yamdb_http_requests_total': (
+        'counter', 'Количество обработанных запросов.', None
+    ),
+    'yamdb_http_request_duration_seconds': (
+        'histogram', 'Время обработки запроса.', DURATION_BUCKETS
+    ),
+    'yamdb_db_queries_per_request': (
+        'histogram', 'Количество SQL-запросов на запрос к API.',
+        QUERY_COUNT_BUCKETS
+    ),
+    'yamdb_db_duration_seconds': (
+        'histogram', 'Время SQL-запросов на запрос к API.', DURATION_BUCKETS
+    ),
+    'yamdb_cache_requests_total': (
+        'counter', 'Обращения к кешам по результату (hit/miss).', None
+    ),
+}
+
+
+class MetricsRegistry:
+    """Метрики текущего процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.flushed_at = 0
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def path(self):
+        directory = Path(getattr(
+            settings, 'METRICS_DIR',
+            Path(tempfile.gettempdir()) / 'yamdb_metrics'
+        ))
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f'{os.getpid()}.json'
+
+    def flush(self, force=False):
+        """Сбрасывает метрики процесса в файл не чаще интервала."""
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        now = time.monotonic()
+        if not force and now - self.flushed_at < interval:
+            return
+        with self.lock:
+            self.flushed_at = now
+            data = [
+                [name, list(labels), value]
+                for (name, labels), value in self.values.items()
+            ]
+            path = self.path()
+            temp_path = path.with_suffix('.tmp')
+            temp_path.write_text(json.dumps(data), encoding='utf-8')
+            os.replace(temp_path, path)
+
+    def remove(self):
+        """Удаляет файл процесса при его завершении."""
+        with self.lock:
+            self.path().unlink(missing_ok=True)
+
+
+registry = MetricsRegistry()
+atexit.register(registry.remove)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def record_request(view, method, status, duration, timings=None):
+    """Учитывает обработанный запрос."""
+    labels = {'view': view, 'method': method}
+    registry.inc(
+        'yamdb_http_requests_total', {**labels, 'status': str(status)}
+    )
+    registry.observe('yamdb_http_request_duration_seconds', labels, duration)
+    if timings is not None:
+        registry.observe(
+            'yamdb_db_queries_per_request', labels, timings.query_count
+        )
+        registry.observe(
+            'yamdb_db_duration_seconds', labels,
+            timings.durations.get('db', 0)
+        )
+    registry.flush()
+
+
+def record_cache(cache, hit):
+    """Учитывает обращение к кешу."""
+    registry.inc(
+        'yamdb_cache_requests_total',
+        {'cache': cache, 'result': 'hit' if hit else 'miss'}
+    )
+
+
+def collect():
+    """Суммирует метрики всех процессов."""
+    registry.flush(force=True)
+    merged = {}
+    for path in registry.path().parent.glob('*.json'):
+        if path.stem.isdigit() and not process_alive(int(path.stem)):
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in data:
+            if name not in METRICS:
+                continue
+            key = (name, tuple(tuple(label) for label in labels))
+            if isinstance(value, list):
+                current = merged.setdefault(key, [0] * len(value))
+                merged[key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def format_labels(labels):
+    return ','.join(
+        '{}="{}"'.format(
+            name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for name, value in labels
+    )
+
+
+def cache_hit_ratios(merged):
+    """Доля попаданий по каждому кешу."""
+    totals = {}
+    for (name, labels), value in merged.items():
+        if name != 'yamdb_cache_requests_total':
+            continue
+        labels = dict(labels)
+        hits, count = totals.get(labels['cache'], (0, 0))
+        if labels['result'] == 'hit':
+            hits += value
+        totals[labels['cache']] = (hits, count + value)
+    return {cache: hits / count for cache, (hits, count) in totals.items()}
+
+
+def render_metrics():
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    merged = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted(
+            (labels, value) for (metric, labels), value in merged.items()
+            if metric == name
+        )
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind == 'counter':
+                lines.append(f'{name}{{{format_labels(labels)}}} {value}')
+                continue
+            bounds = buckets + ('+Inf',)
+            for bound, count in zip(bounds, value[:-2] + [value[-1]]):
+                bucket_labels = format_labels(labels + (('le', bound),))
+                lines.append(f'{name}_bucket{{{bucket_labels}}} {count}')
+            label_text = format_labels(labels)
+            lines.append(f'{name}_sum{{{label_text}}} {value[-2]}')
+            lines.append(f'{name}_count{{{label_text}}} {value[-1]}')
+    lines.append('# HELP yamdb_cache_hit_ratio Доля попаданий в кеш.')
+    lines.append('# TYPE yamdb_cache_hit_ratio gauge')
+    for cache, ratio in sorted(cache_hit_ratios(merged).items()):
+        lines.append(f'yamdb_cache_hit_ratio{{cache="{cache}"}} {ratio}')
+    return '\n'.join(lines) + '\n'
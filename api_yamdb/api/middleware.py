@@ -0,0 +1,201 @@
+"""Middleware приложения api."""
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from .compression import compress_response
+from .metrics import record_request
+from .routers import RoutingState, current_routing, is_sticky, mark_sticky
+from .slow_queries import record_query_sample, record_slow_queries
+from .timing import RequestTimings, current_timings, measure
+
+logger = logging.getLogger('api.timing')
+
+
+class HybridMiddleware:
+    """Основа middleware для синхронного и асинхронного стека.
+
+    Под ASGI Django не переводит цепочку в поток ради такого
+    middleware, и асинхронные вьюхи выполняются в цикле событий.
+    Подкласс задаёт ``start`` (до вьюхи, возвращает состояние),
+    ``stop`` (после вьюхи, в том числе при ошибке) и ``finish``
+    (обработка ответа).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        return None
+
+    def stop(self, state):
+        pass
+
+    def finish(self, request, response, state):
+        return response
+
+    async def afinish(self, request, response, state):
+        return self.finish(request, response, state)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(state)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(state)
+        return await self.afinish(request, response, state)
+
+
+class ServerTimingMiddleware(HybridMiddleware):
+    """Время обработки запроса по этапам.
+
+    Считает время и количество SQL-запросов, время сериализации,
+    проверки прав, работы вьюсета и общее время. Результат отдаётся
+    в заголовке ``Server-Timing`` и пишется строкой JSON в лог
+    ``api.timing``. Запросы дольше ``SLOW_QUERY_THRESHOLD_MS``
+    попадают в журнал медленных запросов, выборка запросов — в журнал
+    нагрузки для ``advise_indexes``.
+    """
+
+    def start(self, request):
+        timings = RequestTimings()
+        request.timings = timings
+        return current_timings.set(timings), time.perf_counter()
+
+    def stop(self, state):
+        current_timings.reset(state[0])
+
+    def finish(self, request, response, state):
+        request.timings.add('total', time.perf_counter() - state[1])
+        self.record(request, request.timings)
+        return self.respond(request, response)
+
+    async def afinish(self, request, response, state):
+        timings = request.timings
+        timings.add('total', time.perf_counter() - state[1])
+        if timings.slow_queries or timings.sampled_queries:
+            await sync_to_async(self.record)(request, timings)
+        return self.respond(request, response)
+
+    def record(self, request, timings):
+        record_slow_queries(request, timings)
+        record_query_sample(request, timings)
+
+    def respond(self, request, response):
+        timings = request.timings
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = timings.server_timing()
+        resolver_match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': resolver_match.view_name if resolver_match else None,
+            'status': response.status_code,
+            **timings.as_dict(),
+        }, ensure_ascii=False))
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Метрики запросов для ``/metrics``.
+
+    Подписывает метрики именем маршрута DRF (``titles-list``,
+    ``reviews-detail`` и т.д.) и методом. Должен стоять в ``MIDDLEWARE``
+    до ``ServerTimingMiddleware``, чтобы получить статистику SQL.
+    """
+
+    def start(self, request):
+        return time.perf_counter()
+
+    def finish(self, request, response, started):
+        resolver_match = request.resolver_match
+        record_request(
+            resolver_match.view_name if resolver_match else 'unmatched',
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            getattr(request, 'timings', None),
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Разрешает чтения с реплик для GET/HEAD-запросов к вьюхам api.
+
+    После успешного изменяющего запроса клиент на
+    ``REPLICA_STICKY_SECONDS`` секунд читает с primary, чтобы видеть
+    свои записи, пока реплики не синхронизированы. Метка хранится
+    в подписанной cookie, а не в кеше процесса.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD')
+
+    def start(self, request):
+        return current_routing.set(RoutingState(replica=False))
+
+    def stop(self, token):
+        current_routing.reset(token)
+
+    def finish(self, request, response, token):
+        if (
+            request.method not in self.SAFE_METHODS
+            and response.status_code < 400
+        ):
+            mark_sticky(response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'cls', view_func)
+        if (
+            request.method in self.SAFE_METHODS
+            and getattr(view, '__module__', '').startswith('api.')
+            and not is_sticky(request)
+        ):
+            current_routing.get().replica = True
+
+
+class AsyncUrlconfMiddleware(HybridMiddleware):
+    """Под ASGI подменяет маршруты на ``ASGI_URLCONF``.
+
+    В нём горячие чтения API обслуживают асинхронные вьюхи
+    из ``api.async_views``; под WSGI остаются вьюсеты DRF.
+    """
+
+    def start(self, request):
+        urlconf = getattr(settings, 'ASGI_URLCONF', None)
+        if urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = urlconf
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """Сжимает ответы brotli (если установлен) или gzip.
+
+    Порог размера — ``COMPRESSION_MIN_SIZE``, потоковые ответы
+    сжимаются по частям. Время сжатия попадает в ``Server-Timing``
+    этапом ``compress``.
+    """
+
+    def finish(self, request, response, state):
+        with measure('compress'):
+            return compress_response(request, response)
@@ -1,11 +1,185 @@
-"""Миксины для вьюсетов."""
-from rest_framework import filters, mixins, viewsets
+"""Миксины для вьюсетов и сериализаторов."""
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.fields import empty
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils import model_meta
 
 from .permissions import IsAdminOrReadOnly
+from .timing import measure
+from .writer import queued_write, run_write
+
+
+class TimingMixin:
+    """Замеры этапов обработки запроса во вьюсете.
+
+    Время аутентификации, проверки прав и работы всего вьюсета
+    попадает в заголовок ``Server-Timing``.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with measure('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        with measure('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with measure('perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with measure('perm'):
+            super().check_object_permissions(request, obj)
+
+
+class TimedSerializerMixin:
+    """Замеры времени валидации и сериализации."""
+
+    def run_validation(self, data=empty):
+        with measure('ser'):
+            return super().run_validation(data)
+
+    def to_representation(self, instance):
+        with measure('ser'):
+            return super().to_representation(instance)
+
+
+class MinimalUpdateSerializerMixin:
+    """Обновление только изменённых полей.
+
+    Поля, значения которых совпадают с текущими, не пишутся; если
+    не изменилось ничего, ``save()`` не вызывается. Связи M2M
+    остаются в кеше предвыборки экземпляра, поэтому ответ строится
+    без повторных запросов.
+    """
+
+    def update(self, instance, validated_data):
+        relations = model_meta.get_field_info(instance).relations
+        many_to_many = {}
+        changed = []
+        for attr, value in validated_data.items():
+            relation = relations.get(attr)
+            if relation is not None and relation.to_many:
+                many_to_many[attr] = value
+                continue
+            if relation is not None:
+                current = getattr(instance, relation.model_field.attname)
+                new = value.pk if value is not None else None
+            else:
+                current, new = getattr(instance, attr), value
+            if current != new:
+                changed.append(attr)
+            setattr(instance, attr, value)
+        if changed:
+            instance.save(update_fields=changed)
+        self.prefetched = dict(
+            getattr(instance, '_prefetched_objects_cache', {})
+        )
+        for attr, values in many_to_many.items():
+            manager = getattr(instance, attr)
+            manager.set(values)
+            queryset = manager.model.objects.all()
+            queryset._result_cache = list(values)
+            queryset._prefetch_done = True
+            self.prefetched[manager.prefetch_cache_name] = queryset
+        return instance
+
+    def restore_prefetched(self, instance):
+        """Возвращает кеш связей, который вьюсет сбрасывает после записи."""
+        prefetched = getattr(self, 'prefetched', None)
+        if prefetched:
+            instance._prefetched_objects_cache = dict(prefetched)
+
+    def to_representation(self, instance):
+        self.restore_prefetched(instance)
+        return super().to_representation(instance)
+
+
+class QueuedWriteMixin:
+    """Записи вьюсета через очередь пишущего потока.
+
+    Включается настройкой ``WRITE_QUEUE_ENABLED``; собственные
+    ``perform_*`` вьюсетов оборачиваются декоратором ``queued_write``.
+    """
+
+    @queued_write
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+
+    @queued_write
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+
+    @queued_write
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+
+
+class AuthorWriteMixin:
+    """Правка и удаление своих объектов одним условным запросом.
+
+    Для обычного автора выполняется ``UPDATE``/``DELETE ... WHERE id = ?
+    AND author_id = ?`` без предварительного чтения объекта и проверки
+    прав. Если запрос не затронул строк, а также для модераторов
+    и администраторов, работает обычный путь вьюсета: он и вернёт
+    403 или 404.
+    """
+
+    parent_kwargs = ()
+
+    def is_plain_author(self):
+        user = self.request.user
+        return user.is_authenticated and not (
+            user.is_admin or user.is_moderator
+        ) and self.author_lookup() is not None
+
+    def author_lookup(self):
+        """Id объекта и родителей из URL; None, если это не числа.
+
+        Тогда работает обычный путь вьюсета, он и вернёт 404.
+        """
+        try:
+            return {
+                kwarg: int(self.kwargs[kwarg])
+                for kwarg in ('pk', *self.parent_kwargs)
+            }
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def author_queryset(self):
+        return self.get_serializer_class().Meta.model.objects.filter(
+            author_id=self.request.user.pk, **self.author_lookup()
+        )
+
+    def update(self, request, *args, **kwargs):
+        if not kwargs.get('partial') or not self.is_plain_author():
+            return super().update(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        queryset = self.author_queryset()
+        if serializer.validated_data and not run_write(
+                queryset.update, **serializer.validated_data):
+            return super().update(request, *args, **kwargs)
+        instance = queryset.first()
+        if instance is None:
+            return super().update(request, *args, **kwargs)
+        instance.author = request.user
+        serializer.instance = instance
+        return Response(serializer.data)
+
+    def destroy(self, request, *args, **kwargs):
+        if self.is_plain_author():
+            deleted, _ = run_write(self.author_queryset().delete)
+            if deleted:
+                return Response(status=status.HTTP_204_NO_CONTENT)
+        return super().destroy(request, *args, **kwargs)
 
 
 class CreateListDestroyViewSet(
+    TimingMixin,
+    QueuedWriteMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -0,0 +1,113 @@
+"""Отложенная отправка писем через таблицу исходящих."""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import OutboxEmail
+
+logger = logging.getLogger('api.outbox')
+
+
+def enqueue_email(subject, body, recipient):
+    """Ставит письмо в очередь.
+
+    Повторное письмо с той же темой тому же получателю, пока первое
+    не отправлено, заменяет его текст — например, при повторной
+    регистрации уходит одно письмо с последним кодом.
+    """
+    email, _ = OutboxEmail.objects.update_or_create(
+        recipient=recipient,
+        subject=subject,
+        status=OutboxEmail.PENDING,
+        defaults={
+            'body': body,
+            'from_email': settings.EMAIL_SENDER,
+            'next_attempt_at': timezone.now(),
+        }
+    )
+    if getattr(settings, 'EMAIL_OUTBOX_EAGER', False):
+        transaction.on_commit(lambda: send_outbox(ids=[email.pk]))
+    return email
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной попыткой."""
+    return timedelta(seconds=getattr(
+        settings, 'EMAIL_OUTBOX_RETRY_DELAY', 30
+    ) * 2 ** (attempts - 1))
+
+
+def send_outbox(batch_size=None, max_attempts=None, ids=None):
+    """Отправляет пачку готовых к отправке писем одним соединением.
+
+    Возвращает число отправленных и неудачных писем.
+    """
+    batch_size = batch_size or getattr(
+        settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100
+    )
+    max_attempts = max_attempts or getattr(
+        settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5
+    )
+    emails = OutboxEmail.objects.filter(
+        status=OutboxEmail.PENDING, next_attempt_at__lte=timezone.now()
+    )
+    if ids is not None:
+        emails = emails.filter(pk__in=ids)
+    emails = list(emails.order_by('next_attempt_at')[:batch_size])
+    if not emails:
+        return 0, 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            mark_failed(email, error, max_attempts)
+        return 0, len(emails)
+    sent = failed = 0
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email,
+                [email.recipient], connection=connection
+            )
+            try:
+                message.send()
+            except Exception as error:
+                failed += 1
+                mark_failed(email, error, max_attempts)
+            else:
+                sent += 1
+                OutboxEmail.objects.filter(pk=email.pk).update(
+                    status=OutboxEmail.SENT, sent_at=timezone.now(),
+                    attempts=email.attempts + 1
+                )
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def mark_failed(email, error, max_attempts):
+    email.attempts += 1
+    email.last_error = repr(error)
+    if email.attempts >= max_attempts:
+        email.status = OutboxEmail.FAILED
+        logger.error('Письмо %s не отправлено: %r', email.pk, error)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning('Ошибка отправки письма %s: %r', email.pk, error)
+    email.save(update_fields=(
+        'attempts', 'last_error', 'status', 'next_attempt_at'
+    ))
+
+
+def purge_sent(days):
+    """Удаляет отправленные письма старше ``days`` дней."""
+    deleted, _ = OutboxEmail.objects.filter(
+        status=OutboxEmail.SENT,
+        sent_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
@@ -0,0 +1,245 @@
+"""Кодирование MessagePack.
+
+Используется пакет msgpack из requirements.txt. Реализация на чистом
+Python ниже — запасная, для окружений без него. Она ограничивает
+глубину вложенности и поддерживает только типы, которые встречаются
+в данных API: None, bool, int, float, str, bytes, списки и словари.
+Расширения (ext) не используются: даты и Decimal кодирует функция
+``default`` так же, как в JSON, поэтому схема данных в обоих
+форматах одна.
+"""
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class PackError(ValueError):
+    """Данные не являются корректным MessagePack."""
+
+
+def _pack_int(obj, out):
+    if 0 <= obj < 0x80:
+        out.append(obj)
+    elif -0x20 <= obj < 0:
+        out.append(obj & 0xff)
+    elif obj > 0:
+        for code, fmt, limit in (
+            (0xcc, '>B', 0xff), (0xcd, '>H', 0xffff),
+            (0xce, '>I', 0xffffffff), (0xcf, '>Q', 0xffffffffffffffff),
+        ):
+            if obj <= limit:
+                out.append(code)
+                out += struct.pack(fmt, obj)
+                return
+        raise OverflowError('Целое число больше 64 бит.')
+    else:
+        for code, fmt, limit in (
+            (0xd0, '>b', -0x80), (0xd1, '>h', -0x8000),
+            (0xd2, '>i', -0x80000000), (0xd3, '>q', -0x8000000000000000),
+        ):
+            if obj >= limit:
+                out.append(code)
+                out += struct.pack(fmt, obj)
+                return
+        raise OverflowError('Целое число больше 64 бит.')
+
+
+def _pack_header(size, out, fix_code, fix_limit, codes):
+    """Заголовок строки, массива или словаря длины ``size``."""
+    if fix_code is not None and size < fix_limit:
+        out.append(fix_code | size)
+        return
+    for code, fmt, limit in codes:
+        if code is not None and size <= limit:
+            out.append(code)
+            out += struct.pack(fmt, size)
+            return
+    raise OverflowError('Слишком длинное значение.')
+
+
+STR_CODES = ((0xd9, '>B', 0xff), (0xda, '>H', 0xffff),
+             (0xdb, '>I', 0xffffffff))
+BIN_CODES = ((0xc4, '>B', 0xff), (0xc5, '>H', 0xffff),
+             (0xc6, '>I', 0xffffffff))
+ARRAY_CODES = ((0xdc, '>H', 0xffff), (0xdd, '>I', 0xffffffff))
+MAP_CODES = ((0xde, '>H', 0xffff), (0xdf, '>I', 0xffffffff))
+
+
+CONSTANTS = {None: 0xc0, False: 0xc2, True: 0xc3}
+
+
+def _pack_container(obj, out, default):
+    if isinstance(obj, dict):
+        _pack_header(len(obj), out, 0x80, 16, MAP_CODES)
+        for key, value in obj.items():
+            _pack(key, out, default)
+            _pack(value, out, default)
+    else:
+        _pack_header(len(obj), out, 0x90, 16, ARRAY_CODES)
+        for item in obj:
+            _pack(item, out, default)
+
+
+def _pack(obj, out, default):
+    if obj is None or obj is True or obj is False:
+        out.append(CONSTANTS[obj])
+    elif isinstance(obj, int):
+        _pack_int(obj, out)
+    elif isinstance(obj, float):
+        out.append(0xcb)
+        out += struct.pack('>d', obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        _pack_header(len(data), out, 0xa0, 32, STR_CODES)
+        out += data
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        _pack_header(len(obj), out, None, 0, BIN_CODES)
+        out += obj
+    elif isinstance(obj, (list, tuple, dict)):
+        _pack_container(obj, out, default)
+    elif default is not None:
+        _pack(default(obj), out, default)
+    else:
+        raise TypeError(f'Тип {type(obj).__name__} не кодируется.')
+
+
+def py_packb(obj, default=None):
+    """Кодирует ``obj`` в MessagePack на чистом Python."""
+    out = bytearray()
+    _pack(obj, out, default)
+    return bytes(out)
+
+
+class Unpacker:
+    """Разбор MessagePack на чистом Python.
+
+    Вложенность массивов и словарей ограничена ``MAX_DEPTH``: тело
+    из тысяч байтов ``0x91`` иначе исчерпало бы стек рекурсии.
+    """
+
+    MAX_DEPTH = 100
+
+    FIXED = {
+        0xc0: None, 0xc2: False, 0xc3: True,
+    }
+    NUMBERS = {
+        0xca: '>f', 0xcb: '>d',
+        0xcc: '>B', 0xcd: '>H', 0xce: '>I', 0xcf: '>Q',
+        0xd0: '>b', 0xd1: '>h', 0xd2: '>i', 0xd3: '>q',
+    }
+    SIZES = {
+        0xd9: ('string', '>B'), 0xda: ('string', '>H'),
+        0xdb: ('string', '>I'),
+        0xc4: ('binary', '>B'), 0xc5: ('binary', '>H'),
+        0xc6: ('binary', '>I'),
+        0xdc: ('array', '>H'), 0xdd: ('array', '>I'),
+        0xde: ('map', '>H'), 0xdf: ('map', '>I'),
+    }
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+        self.depth = 0
+
+    def read(self, size):
+        end = self.position + size
+        if end > len(self.data):
+            raise PackError('Данные обрываются.')
+        chunk = self.data[self.position:end]
+        self.position = end
+        return chunk
+
+    def unpack(self, fmt):
+        return struct.unpack(fmt, self.read(struct.calcsize(fmt)))[0]
+
+    def value(self):
+        code = self.read(1)[0]
+        if code < 0x80:
+            return code
+        if code >= 0xe0:
+            return code - 0x100
+        if code < 0xc0:
+            return self.fixed_length(code)
+        if code in self.FIXED:
+            return self.FIXED[code]
+        if code in self.NUMBERS:
+            return self.unpack(self.NUMBERS[code])
+        if code in self.SIZES:
+            kind, fmt = self.SIZES[code]
+            return getattr(self, kind)(self.unpack(fmt))
+        raise PackError(f'Неподдерживаемый тип 0x{code:02x}.')
+
+    def nested(self, read, size):
+        """Элементы контейнера с учётом глубины вложенности."""
+        if self.depth >= self.MAX_DEPTH:
+            raise PackError('Слишком глубокая вложенность.')
+        self.depth += 1
+        try:
+            return read(size)
+        finally:
+            self.depth -= 1
+
+    def fixed_length(self, code):
+        """Короткие строки, массивы и словари: длина в самом коде."""
+        if code >= 0xa0:
+            return self.string(code & 0x1f)
+        if code >= 0x90:
+            return self.array(code & 0x0f)
+        return self.map(code & 0x0f)
+
+    def binary(self, size):
+        return bytes(self.read(size))
+
+    def string(self, size):
+        try:
+            return str(self.read(size), 'utf-8')
+        except UnicodeDecodeError as error:
+            raise PackError(str(error))
+
+    def array(self, size):
+        return self.nested(self.array_items, size)
+
+    def array_items(self, size):
+        return [self.value() for _ in range(size)]
+
+    def map(self, size):
+        return self.nested(self.map_items, size)
+
+    def map_items(self, size):
+        result = {}
+        for _ in range(size):
+            key = self.value()
+            try:
+                result[key] = self.value()
+            except TypeError:
+                raise PackError('Недопустимый ключ словаря.')
+        return result
+
+
+def py_unpackb(data):
+    """Разбирает MessagePack на чистом Python."""
+    unpacker = Unpacker(data)
+    result = unpacker.value()
+    if unpacker.position != len(unpacker.data):
+        raise PackError('Лишние данные после значения.')
+    return result
+
+
+def packb(obj, default=None):
+    """Кодирует ``obj`` в MessagePack."""
+    if msgpack is None:
+        return py_packb(obj, default)
+    return msgpack.packb(obj, default=default, use_bin_type=True)
+
+
+def unpackb(data):
+    """Разбирает MessagePack; ошибки формата — ``ValueError``."""
+    if msgpack is None:
+        return py_unpackb(data)
+    try:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    except (ValueError, TypeError) as error:
+        raise PackError(str(error))
@@ -0,0 +1,44 @@
+"""Парсеры тел запросов API."""
+import io
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from .packing import unpackb
+from .renderers import FastJSONRenderer, MessagePackRenderer, orjson
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSON-парсер на orjson.
+
+    Тела не в UTF-8 и некорректный JSON разбирает стандартный парсер
+    DRF: ответы с ошибками разбора остаются прежними.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context
+            )
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Тела запросов в MessagePack."""
+
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return unpackb(stream.read())
+        except ValueError as error:
+            raise ParseError(f'MessagePack parse error - {error}')
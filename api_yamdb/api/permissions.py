@@ -1,6 +1,9 @@
 """Классы для описания прав доступа."""
+from django.conf import settings
 from rest_framework import permissions
 
+from .authentication import METRICS_AUTH
+
 
 class AdminOnly(permissions.BasePermission):
     """Доступ только для админа."""
@@ -39,3 +42,19 @@ class IsAdminModeratorAuthorOrReadOnly(permissions.BasePermission):
             or request.user.is_moderator
             or request.user == obj.author
         )
+
+
+class MetricsAccess(permissions.BasePermission):
+    """Доступ для админа, по METRICS_TOKEN или с METRICS_ALLOWED_IPS.
+
+    Список адресов по умолчанию пуст: за обратным прокси REMOTE_ADDR
+    всех клиентов — адрес прокси, часто loopback.
+    """
+
+    def has_permission(self, request, view):
+        return (
+            request.auth == METRICS_AUTH
+            or request.META.get('REMOTE_ADDR')
+            in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+            or (request.user.is_authenticated and request.user.is_admin)
+        )
@@ -0,0 +1,80 @@
+"""Рендереры ответов API."""
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+from .packing import packb
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    """Текстовый формат экспозиции метрик Prometheus."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return str(data).encode(self.charset)
+
+
+# Типы вне JSON кодируются как у DRF. Даты и время orjson тоже
+# передаёт сюда (OPT_PASSTHROUGH_DATETIME): DRF пишет нулевое смещение
+# как «Z» для любой зоны, Decimal — числом.
+encode_default = encoders.JSONEncoder().default
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSON-рендерер на orjson с тем же результатом, что у DRF.
+
+    Без orjson, а также при запрошенных отступах (браузерный API,
+    ``indent`` в Accept) работает стандартный рендерер DRF.
+    """
+
+    options = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None
+            or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=encode_default,
+                               option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и DRF, экранируем разделители строк: они недопустимы
+        # в строковых литералах JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Ответы в MessagePack для внутренних сервисов.
+
+    Поля и значения те же, что в JSON: даты — строками ISO 8601,
+    Decimal — числами.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return packb(data, default=encode_default)
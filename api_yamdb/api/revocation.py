@@ -0,0 +1,174 @@
+"""Отзыв токенов доступа до истечения срока."""
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.utils import timezone as django_timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.models import IssuedToken, RevokedToken, User
+
+
+class BloomFilter:
+    """Фильтр Блума на битовом массиве с двойным хешированием.
+
+    Ложноотрицательных ответов не бывает, ложноположительные
+    перепроверяются по БД.
+    """
+
+    def __init__(self, size, hashes):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    def positions(self, value):
+        digest = hashlib.sha256(value.encode()).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        step = int.from_bytes(digest[8:16], 'big') | 1
+        return (
+            (first + index * step) % self.size
+            for index in range(self.hashes)
+        )
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(value)
+        )
+
+
+class RevocationList:
+    """Список отозванных токенов процесса.
+
+    Новые записи таблицы подгружаются по возрастанию id не чаще раза
+    в ``REVOCATION_REFRESH_INTERVAL`` секунд, фильтр целиком
+    перестраивается раз в ``REVOCATION_REBUILD_INTERVAL`` секунд, чтобы
+    забыть удалённые записи. В БД проверяются только попадания в фильтр.
+
+    Транзакция с меньшим id может зафиксироваться позже большего,
+    поэтому каждая подгрузка перечитывает последние
+    ``REVOCATION_REFRESH_LOOKBACK`` id до уже прочитанного.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.bloom = BloomFilter(
+                getattr(settings, 'REVOCATION_BLOOM_SIZE', 1 << 20),
+                getattr(settings, 'REVOCATION_BLOOM_HASHES', 7),
+            )
+            self.last_id = 0
+            self.refreshed_at = 0
+            self.rebuilt_at = 0
+
+    def refresh(self):
+        interval = getattr(settings, 'REVOCATION_REFRESH_INTERVAL', 5)
+        if time.monotonic() - self.refreshed_at < interval:
+            return
+        with self.lock:
+            # Пока поток ждал блокировку, список мог обновить другой.
+            now = time.monotonic()
+            if now - self.refreshed_at < interval:
+                return
+            if now - self.rebuilt_at >= getattr(
+                    settings, 'REVOCATION_REBUILD_INTERVAL', 600):
+                # Новый фильтр заполняется целиком до замены: проверки
+                # без блокировки не должны увидеть его пустым.
+                bloom = BloomFilter(self.bloom.size, self.bloom.hashes)
+                self.last_id = self.load(bloom, 0)
+                self.bloom = bloom
+                self.rebuilt_at = now
+            else:
+                self.last_id = self.load(self.bloom, self.last_id - getattr(
+                    settings, 'REVOCATION_REFRESH_LOOKBACK', 1000
+                ))
+            self.refreshed_at = now
+
+    def load(self, bloom, after_id):
+        """Добавляет в фильтр записи с id больше ``after_id``.
+
+        Возвращает наибольший прочитанный id.
+        """
+        last_id = self.last_id
+        revoked = RevokedToken.objects.filter(
+            id__gt=after_id
+        ).values_list('id', 'jti')
+        for revoked_id, jti in revoked.iterator():
+            bloom.add(jti)
+            last_id = max(last_id, revoked_id)
+        return last_id
+
+    def add(self, jti):
+        with self.lock:
+            self.bloom.add(jti)
+
+    def is_revoked(self, jti):
+        self.refresh()
+        if jti not in self.bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revocation_list = RevocationList()
+
+
+def expiration(token):
+    return datetime.fromtimestamp(token['exp'], tz=timezone.utc)
+
+
+def record_issued_token(user, token):
+    """Запоминает выданный токен, чтобы его можно было отозвать."""
+    IssuedToken.objects.create(
+        jti=token[api_settings.JTI_CLAIM],
+        user=user,
+        expires_at=expiration(token),
+    )
+
+
+def revoke_user_tokens(user):
+    """Отзывает все действующие токены пользователя."""
+    issued = IssuedToken.objects.filter(
+        user=user, expires_at__gt=django_timezone.now()
+    )
+    revoked = [
+        RevokedToken(jti=jti, expires_at=expires_at)
+        for jti, expires_at in issued.values_list('jti', 'expires_at')
+    ]
+    RevokedToken.objects.bulk_create(revoked, ignore_conflicts=True)
+    issued.delete()
+    for token in revoked:
+        revocation_list.add(token.jti)
+
+
+def prune_expired_tokens():
+    """Удаляет записи об истёкших токенах.
+
+    Вызывается командой ``prune_tokens`` по расписанию, а не при
+    выдаче токена. Последняя отозванная запись сохраняется: иначе
+    SQLite может выдать новой записи уже использованный id.
+    Возвращает число удалённых записей.
+    """
+    now = django_timezone.now()
+    deleted = IssuedToken.objects.filter(expires_at__lte=now).delete()[0]
+    latest = RevokedToken.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first()
+    return deleted + RevokedToken.objects.filter(
+        expires_at__lte=now
+    ).exclude(id=latest).delete()[0]
+
+
+@receiver(pre_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_user_tokens(instance)
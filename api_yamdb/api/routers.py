@@ -0,0 +1,74 @@
+"""Маршрутизация чтений API на реплики БД."""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+current_routing = ContextVar('current_routing', default=None)
+
+PRIMARY = 'default'
+# Подписанная cookie «недавно писал»: видна любому воркеру и серверу
+# без общего кеша.
+STICKY_COOKIE = 'replica_sticky'
+STICKY_SALT = 'api.routers.sticky'
+
+
+class RoutingState:
+    """Разрешены ли чтения с реплики в текущем запросе."""
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.written = False
+
+
+class ReplicaRouter:
+    """Чтения безопасных запросов к API — с реплик, остальное — с primary.
+
+    После первой записи в запросе чтения этого запроса идут на primary.
+    Модели из ``REPLICA_PRIMARY_MODELS`` (пользователи, отозванные
+    токены) всегда читаются с primary: по ним проверяются права.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if (
+            state is None or not state.replica or state.written
+            or not replicas
+            or model._meta.label in getattr(
+                settings, 'REPLICA_PRIMARY_MODELS', ()
+            )
+        ):
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current_routing.get()
+        if state is not None:
+            state.written = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+def mark_sticky(response):
+    """Запоминает, что клиент писал: его чтения какое-то время с primary."""
+    response.set_signed_cookie(
+        STICKY_COOKIE, '1', salt=STICKY_SALT, max_age=sticky_seconds(),
+        httponly=True, samesite='Lax',
+    )
+
+
+def is_sticky(request):
+    return request.get_signed_cookie(
+        STICKY_COOKIE, default=None, salt=STICKY_SALT,
+        max_age=sticky_seconds(),
+    ) is not None
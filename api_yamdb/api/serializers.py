@@ -1,17 +1,24 @@
 """Сериализаторы."""
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.settings import api_settings
 
 from reviews.constants import (
     EMAIL_MAX_LENGTH, NAME_MAX_LENGTH, USERNAME_REGEX_SIGNS
 )
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (
+    Category, ChangeLogEntry, Comment, Genre, Review, Title, TitleCard
+)
+from .mixins import MinimalUpdateSerializerMixin, TimedSerializerMixin
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, MinimalUpdateSerializerMixin,
+                     serializers.ModelSerializer):
     class Meta:
         model = User
         ordering = ['id']
@@ -19,7 +26,7 @@ class UserSerializer(serializers.ModelSerializer):
             'username', 'email', 'first_name', 'last_name', 'bio', 'role')
 
 
-class AuthSerializer(serializers.Serializer):
+class AuthSerializer(TimedSerializerMixin, serializers.Serializer):
     email = serializers.EmailField(required=True, max_length=EMAIL_MAX_LENGTH)
     username = serializers.CharField(
         required=True, max_length=NAME_MAX_LENGTH,
@@ -40,12 +47,12 @@ class AuthSerializer(serializers.Serializer):
         return value
 
 
-class TokenSerializer(serializers.Serializer):
+class TokenSerializer(TimedSerializerMixin, serializers.Serializer):
     username = serializers.CharField()
     confirmation_code = serializers.CharField()
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор жанров произведений."""
 
     class Meta:
@@ -54,7 +61,7 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор категорий произведений."""
     class Meta:
         model = Category
@@ -62,7 +69,8 @@ class CategorySerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TitleWriteSerializer(serializers.ModelSerializer):
+class TitleWriteSerializer(TimedSerializerMixin, MinimalUpdateSerializerMixin,
+                           serializers.ModelSerializer):
     """Сериализатор для методов записи/обновления/удаления произведений."""
     genre = serializers.SlugRelatedField(
         slug_field='slug',
@@ -83,11 +91,12 @@ class TitleWriteSerializer(serializers.ModelSerializer):
 
     def to_representation(self, title):
         """Определение сериализатоа для чтения."""
+        self.restore_prefetched(title)
         serializer = TitleReadSerializer(title)
         return serializer.data
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для методов чтения произведений."""
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
@@ -99,7 +108,27 @@ class TitleReadSerializer(serializers.ModelSerializer):
         read_only_fields = ('genre', 'rating')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleCardSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Список произведений из карточек: тот же вывод, что у
+    ``TitleReadSerializer``, без JOIN и подзапросов."""
+    id = serializers.IntegerField(source='title_id', read_only=True)
+    genre = serializers.ListField(source='genres', read_only=True)
+    category = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = TitleCard
+        fields = (
+            'id', 'genre', 'category', 'rating', 'name', 'description',
+            'year'
+        )
+
+    def get_category(self, card):
+        return {'name': card.category_name, 'slug': card.category_slug}
+
+
+class ReviewSerializer(TimedSerializerMixin, MinimalUpdateSerializerMixin,
+                       serializers.ModelSerializer):
     """Сериализатор для отзывов о произведениях."""
 
     author = serializers.SlugRelatedField(
@@ -111,22 +140,34 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        """Проверяет уникальность отзыва пользователя на одно произведение."""
-        request = self.context.get('request')
-        if request.method != 'POST':
-            return data
-        title_id = self.context['view'].kwargs.get('title_id')
-        if Review.objects.filter(
-                title__id=title_id, author=request.user
-        ).exists():
-            raise serializers.ValidationError(
-                'Вы уже оставляли отзыв о данном произведении.'
-            )
-        return data
-
-
-class CommentSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        """Создаёт отзыв одним INSERT.
+
+        Повторный отзыв отсекает ограничение ``unique_review``,
+        несуществующее произведение — внешний ключ; различаются они
+        дополнительным запросом только при ошибке.
+        """
+        if transaction.get_connection().in_atomic_block and not (
+                Title.objects.filter(pk=validated_data['title_id']).exists()):
+            # Во внешней транзакции (очередь записи) внешний ключ
+            # проверится только при её фиксации.
+            raise NotFound
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Title.objects.filter(
+                    pk=validated_data['title_id']).exists():
+                raise NotFound
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже оставляли отзыв о данном произведении.'
+                ]
+            })
+
+
+class CommentSerializer(TimedSerializerMixin, MinimalUpdateSerializerMixin,
+                        serializers.ModelSerializer):
     """Сериализатор для комментариев к отзывам."""
 
     author = serializers.SlugRelatedField(
@@ -137,3 +178,22 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
+
+
+class ChangeLogEntrySerializer(TimedSerializerMixin,
+                               serializers.ModelSerializer):
+    """Запись ленты изменений."""
+
+    class Meta:
+        model = ChangeLogEntry
+        fields = (
+            'id', 'model', 'object_id', 'action', 'title_id', 'review_id',
+            'changed_at'
+        )
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    """Параметры запроса ленты изменений."""
+
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, required=False)
@@ -0,0 +1,97 @@
+"""Журналы SQL-запросов: медленные запросы и выборка нагрузки."""
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from reviews.models import SlowQuery
+
+logger = logging.getLogger(__name__)
+query_log_lock = threading.Lock()
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+
+def explain(connection, sql, params):
+    """План выполнения SELECT-запроса; для прочих запросов пустой."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith(
+            ('SELECT', 'WITH')):
+        return ''
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    if connection.vendor != 'sqlite':
+        return '\n'.join(row[0] for row in rows)
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return '\n'.join(lines)
+
+
+def record_slow_queries(request, timings):
+    """Сохраняет медленные запросы с планами в кольцевой буфер.
+
+    Буфер хранит ``SLOW_QUERY_LOG_SIZE`` последних записей, более
+    старые удаляются. Ошибки записи журнала не влияют на ответ.
+    """
+    if not timings.slow_queries:
+        return
+    resolver_match = request.resolver_match
+    entries = []
+    try:
+        for alias, sql, params, duration in timings.slow_queries:
+            entries.append(SlowQuery(
+                duration_ms=duration * 1000,
+                sql=sql,
+                params=repr(params),
+                plan=explain(connections[alias], sql, params),
+                view=resolver_match.view_name if resolver_match else '',
+                method=request.method,
+                path=request.get_full_path(),
+            ))
+        SlowQuery.objects.bulk_create(entries)
+        size = getattr(settings, 'SLOW_QUERY_LOG_SIZE', 500)
+        boundary = SlowQuery.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[size:size + 1].first()
+        if boundary is not None:
+            SlowQuery.objects.filter(id__lte=boundary).delete()
+    except DatabaseError:
+        logger.warning('Не удалось записать журнал медленных запросов.',
+                       exc_info=True)
+
+
+def record_query_sample(request, timings):
+    """Дописывает SQL-запросы выбранного запроса в ``QUERY_LOG_PATH``.
+
+    В журнал попадает доля ``QUERY_LOG_SAMPLE_RATE`` запросов к API
+    целиком, поэтому пропорции нагрузки сохраняются. Журнал читает
+    команда ``advise_indexes``.
+    """
+    path = getattr(settings, 'QUERY_LOG_PATH', None)
+    if not timings.sampled_queries or path is None:
+        return
+    resolver_match = request.resolver_match
+    view = resolver_match.view_name if resolver_match else ''
+    lines = ''.join(
+        json.dumps({
+            'sql': sql,
+            'duration_ms': round(duration * 1000, 3),
+            'view': view,
+        }, ensure_ascii=False) + '\n'
+        for sql, duration in timings.sampled_queries
+    )
+    try:
+        with query_log_lock, open(path, 'a', encoding='utf-8') as log_file:
+            log_file.write(lines)
+    except OSError:
+        logger.warning('Не удалось записать выборку SQL-запросов.',
+                       exc_info=True)
@@ -0,0 +1,151 @@
+"""Ограничение частоты запросов к эндпоинтам аутентификации."""
+import logging
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+PRUNE_EVERY = 1000
+PRUNE_AGE = 86400
+
+logger = logging.getLogger('api.throttling')
+
+
+class TokenBucketStore:
+    """Корзины токенов в файле SQLite, общем для всех воркеров.
+
+    Пополнение и списание выполняются в одной транзакции
+    ``BEGIN IMMEDIATE``, поэтому воркеры не теряют списания друг друга.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.calls = 0
+
+    def connection(self):
+        path = str(settings.THROTTLE_DB_PATH)
+        connections = self.local.__dict__.setdefault('connections', {})
+        if path not in connections:
+            connection = sqlite3.connect(
+                path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+                'updated REAL NOT NULL)'
+            )
+            connections[path] = connection
+        return connections[path]
+
+    def consume(self, key, capacity, refill_rate):
+        """Списывает токен из корзины.
+
+        Возвращает ``0``, если токен списан, иначе — сколько секунд
+        ждать следующего токена. Пустая корзина только читается:
+        отклонённые запросы не берут блокировку записи файла.
+        """
+        connection = self.connection()
+        wait = self.wait(
+            connection, key, capacity, refill_rate, time.time()
+        )[0]
+        if wait:
+            return wait
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            wait, tokens = self.wait(
+                connection, key, capacity, refill_rate, now
+            )
+            if not wait:
+                connection.execute(
+                    'INSERT OR REPLACE INTO buckets (key, tokens, updated) '
+                    'VALUES (?, ?, ?)', (key, tokens - 1, now)
+                )
+                self.calls += 1
+                if not self.calls % PRUNE_EVERY:
+                    connection.execute(
+                        'DELETE FROM buckets WHERE updated < ?',
+                        (now - PRUNE_AGE,)
+                    )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return wait
+
+    def wait(self, connection, key, capacity, refill_rate, now):
+        """Ожидание до следующего токена и число токенов в корзине."""
+        row = connection.execute(
+            'SELECT tokens, updated FROM buckets WHERE key = ?', (key,)
+        ).fetchone()
+        tokens = capacity if row is None else min(
+            capacity, row[0] + (now - row[1]) * refill_rate
+        )
+        return (0 if tokens >= 1 else (1 - tokens) / refill_rate), tokens
+
+
+bucket_store = TokenBucketStore()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Корзина токенов: ``rate`` задаёт объём и скорость пополнения.
+
+    При ``'10/min'`` допускается всплеск из 10 запросов, затем
+    по одному каждые 6 секунд.
+    """
+
+    field = None
+
+    def get_cache_key(self, request, view):
+        if self.field is None:
+            ident = self.get_ident(request)
+        else:
+            data = request.data if hasattr(request.data, 'get') else {}
+            ident = str(data.get(self.field) or '').strip().lower()
+            if not ident:
+                return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        refill_rate = self.num_requests / self.duration
+        try:
+            self.remaining = bucket_store.consume(
+                key, self.num_requests, refill_rate
+            )
+        except sqlite3.OperationalError as error:
+            # Файл корзин занят дольше таймаута — обычно при том самом
+            # потоке запросов, от которого защищает ограничение.
+            fail_open = getattr(
+                settings, 'THROTTLE_FAILURE_POLICY', 'closed'
+            ) == 'open'
+            logger.warning(
+                'Корзины ограничения частоты недоступны (%s), запрос %s.',
+                error, 'пропущен' if fail_open else 'отклонён'
+            )
+            self.remaining = 0 if fail_open else 1 / refill_rate
+        return not self.remaining
+
+    def wait(self):
+        return self.remaining
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    scope = 'auth_ip'
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    scope = 'auth_username'
+    field = 'username'
+
+
+class AuthEmailThrottle(TokenBucketThrottle):
+    scope = 'auth_email'
+    field = 'email'
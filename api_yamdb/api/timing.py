@@ -0,0 +1,114 @@
+"""Замеры времени обработки запроса по этапам."""
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+current_timings = ContextVar('current_timings', default=None)
+
+SLOW_QUERIES_PER_REQUEST = 20
+
+
+class RequestTimings:
+    """Накопитель длительностей этапов одного запроса.
+
+    Вложенные замеры одного этапа (например, вложенные сериализаторы)
+    учитываются один раз — по внешнему вызову.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.query_count = 0
+        self.slow_queries = deque(maxlen=SLOW_QUERIES_PER_REQUEST)
+        self.slow_threshold = getattr(
+            settings, 'SLOW_QUERY_THRESHOLD_MS', None
+        )
+        self.sampled_queries = (
+            [] if random.random() < getattr(
+                settings, 'QUERY_LOG_SAMPLE_RATE', 0
+            ) else None
+        )
+        self._depth = {}
+
+    def add(self, name, duration):
+        self.durations[name] = self.durations.get(name, 0) + duration
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """Обёртка для ``connection.execute_wrapper``."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.add('db', duration)
+            if (
+                self.slow_threshold is not None
+                and duration * 1000 >= self.slow_threshold
+            ):
+                self.slow_queries.append((
+                    context['connection'].alias, sql, params, duration
+                ))
+            if self.sampled_queries is not None:
+                self.sampled_queries.append((sql, duration))
+
+    def server_timing(self):
+        """Значение заголовка ``Server-Timing``."""
+        metrics = []
+        for name, duration in self.durations.items():
+            metric = f'{name};dur={duration * 1000:.2f}'
+            if name == 'db':
+                metric += f';desc="{self.query_count} queries"'
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        """Длительности в миллисекундах для структурированного лога."""
+        data = {
+            f'{name}_ms': round(duration * 1000, 2)
+            for name, duration in self.durations.items()
+        }
+        data['db_queries'] = self.query_count
+        return data
+
+
+@contextmanager
+def measure(name):
+    """Замеряет этап текущего запроса; вне запроса ничего не делает."""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    depth = timings._depth.get(name, 0)
+    timings._depth[name] = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._depth[name] = depth
+        if not depth:
+            timings.add(name, time.perf_counter() - started)
+
+
+def timed_execute(execute, sql, params, many, context):
+    """Учитывает SQL-запрос в замерах текущего запроса API.
+
+    Обёртка ставится на каждое соединение при подключении, поэтому
+    считаются и запросы из других потоков (``sync_to_async`` под
+    ASGI): переменная контекста копируется в поток вместе с задачей.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.sql_wrapper(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_timed_execute(sender, connection, **kwargs):
+    if timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_execute)
@@ -0,0 +1,21 @@
+"""Токены доступа с ролью пользователя."""
+from rest_framework_simplejwt.tokens import AccessToken
+
+ROLE_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+VERSION_CLAIM = 'ver'
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с подписанными полями для проверки прав.
+
+    Версия токенов пользователя позволяет отклонить токены, выданные
+    до смены роли.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in ROLE_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.token_version
+        return token
@@ -2,7 +2,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (ReviewViewSet, CommentViewSet,
+from .views import (ReviewViewSet, CommentViewSet, ChangeFeedView,
                     GenreViewSet, CategoryViewSet, TitleViewSet,
                     SignUpView, GetTokenView, UserViewSet
                     )
@@ -37,5 +37,6 @@ router_v1.register('titles', TitleViewSet, basename='titles')
 
 urlpatterns = [
     path('v1/auth/', include(auth_urls)),
+    path('v1/changes/', ChangeFeedView.as_view(), name='changes'),
     path('v1/', include(router_v1.urls)),
 ]
@@ -1,8 +1,13 @@
 """Вьюсеты для API."""
+import hashlib
+import json
+
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.db import IntegrityError
 from django.db.models import Avg
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, viewsets, status
 from rest_framework.decorators import action
@@ -10,33 +15,53 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from api_yamdb import settings
-from reviews.models import User, Category, Title, Genre, Comment, Review
-from .filters import TitleFilter
-from .mixins import CreateListDestroyViewSet
+from reviews.models import (
+    User, Category, Title, TitleCard, Genre, Comment, Review
+)
+from .authentication import MetricsTokenAuthentication
+from .changes import read_changes
+from .filters import TitleCardFilter, TitleFilter
+from .metrics import render_metrics
+from .outbox import enqueue_email
+from .mixins import (
+    AuthorWriteMixin, CreateListDestroyViewSet, QueuedWriteMixin, TimingMixin
+)
 from .permissions import (
-    IsAdminOrReadOnly, IsAdminModeratorAuthorOrReadOnly, AdminOnly
+    IsAdminOrReadOnly, IsAdminModeratorAuthorOrReadOnly, AdminOnly,
+    MetricsAccess
 )
+from .renderers import PrometheusRenderer
+from .revocation import record_issued_token
 from .serializers import (
-    TitleReadSerializer, TitleWriteSerializer,
+    ChangeFeedQuerySerializer, ChangeLogEntrySerializer,
+    TitleCardSerializer, TitleReadSerializer, TitleWriteSerializer,
     GenreSerializer, CategorySerializer,
     ReviewSerializer, CommentSerializer,
     UserSerializer, AuthSerializer, TokenSerializer
 )
+from .throttling import (
+    AuthEmailThrottle, AuthIPThrottle, AuthUsernameThrottle
+)
+from .tokens import RoleAccessToken
+from .writer import queued_write, run_write
 
 
-class SignUpView(APIView):
+class SignUpView(TimingMixin, APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (
+        AuthIPThrottle, AuthUsernameThrottle, AuthEmailThrottle
+    )
 
     def post(self, request):
         serializer = AuthSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         try:
-            user, created = User.objects.get_or_create(
+            user, created = run_write(
+                User.objects.get_or_create,
                 username=request.data.get('username'),
                 email=request.data.get('email')
             )
@@ -44,11 +69,11 @@ class SignUpView(APIView):
             return Response(serializer.errors,
                             status=status.HTTP_400_BAD_REQUEST)
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        run_write(
+            enqueue_email,
             'Код подтверждения',
             f'Ваш код - {confirmation_code}',
-            settings.EMAIL_SENDER,
-            [request.data.get('email')]
+            request.data.get('email')
         )
         return Response(
             {'email': serializer.data['email'],
@@ -56,8 +81,9 @@ class SignUpView(APIView):
             status=status.HTTP_200_OK)
 
 
-class GetTokenView(TokenObtainPairView):
+class GetTokenView(TimingMixin, TokenObtainPairView):
     permission_classes = (AllowAny,)
+    throttle_classes = (AuthIPThrottle, AuthUsernameThrottle)
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
@@ -72,11 +98,12 @@ class GetTokenView(TokenObtainPairView):
                 'Неверный confirmation_code',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        token = {'token': str(AccessToken.for_user(user))}
-        return Response(token, status=status.HTTP_200_OK)
+        token = RoleAccessToken.for_user(user)
+        run_write(record_issued_token, user, token)
+        return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(TimingMixin, QueuedWriteMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (AdminOnly,)
@@ -90,16 +117,31 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer_class=UserSerializer,
             pagination_class=None)
     def me(self, request):
-        serializer = self.get_serializer(
-            request.user,
-            data=request.data,
-            partial=True
-        )
-        serializer.is_valid(raise_exception=True)
-        if self.request.method == 'PATCH':
+        """Профиль текущего пользователя.
+
+        GET только читает и отдаёт ETag, PATCH пишет лишь изменённые поля.
+        """
+        user = User.objects.get(pk=request.user.pk)
+        if request.method == 'PATCH':
+            serializer = self.get_serializer(
+                user, data=request.data, partial=True
+            )
+            serializer.is_valid(raise_exception=True)
             serializer.validated_data.pop('role', None)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            run_write(serializer.save)
+        else:
+            serializer = self.get_serializer(user)
+        etag = quote_etag(hashlib.md5(
+            json.dumps(serializer.data, sort_keys=True).encode()
+        ).hexdigest())
+        if request.method == 'GET' and etag in parse_etags(
+                request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(serializer.data, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
 
 class CategoryViewSet(CreateListDestroyViewSet):
@@ -116,12 +158,14 @@ class GenreViewSet(CreateListDestroyViewSet):
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(TimingMixin, QueuedWriteMixin, viewsets.ModelViewSet):
     """Вьюсет для создания объектов класса Title."""
 
     http_method_names = ('get', 'post', 'patch', 'delete', 'head', 'options')
     queryset = (
-        Title.objects.all().annotate(
+        Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).annotate(
             rating=Avg('reviews__score')
         ).order_by('name')
     )
@@ -129,52 +173,122 @@ class TitleViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = PageNumberPagination
     filter_backends = (DjangoFilterBackend,)
-    filterset_class = TitleFilter
+    # Список читается из карточек: одна таблица без JOIN и агрегатов.
+    card_queryset = TitleCard.objects.order_by('name')
+
+    @property
+    def filterset_class(self):
+        if self.action == 'list':
+            return TitleCardFilter
+        return TitleFilter
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return self.card_queryset.all()
+        return super().get_queryset()
 
     def get_serializer_class(self):
         """Определяет какой сериализатор будет использоваться
         для разных типов запроса."""
+        if self.action == 'list':
+            return TitleCardSerializer
         if self.request.method == 'GET':
             return TitleReadSerializer
         return TitleWriteSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(TimingMixin, AuthorWriteMixin, QueuedWriteMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет для управления отзывами."""
 
     http_method_names = ('get', 'post', 'patch', 'delete')
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
+    parent_kwargs = ('title_id',)
 
     def get_queryset(self):
         """Возвращает отзывы для конкретного произведения."""
         title = self.get_title()
-        return title.reviews.all()
+        return title.reviews.select_related('author')
 
+    @queued_write
     def perform_create(self, serializer):
         """Создаёт новый отзыв и устанавливает автора и произведение."""
-        title = self.get_title()
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(
+            author=self.request.user, title_id=self.kwargs.get('title_id')
+        )
 
     def get_title(self):
         """Возвращает произведение по идентификатору."""
         return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(TimingMixin, AuthorWriteMixin, QueuedWriteMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет для управления комментариями к отзывам."""
 
     http_method_names = ('get', 'post', 'patch', 'delete')
     serializer_class = CommentSerializer
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
+    parent_kwargs = ('review_id',)
 
     def get_queryset(self):
         """Возвращает комментарии для конкретного отзыва."""
         review_id = self.kwargs.get('review_id')
-        return Comment.objects.filter(review_id=review_id)
+        return Comment.objects.filter(
+            review_id=review_id
+        ).select_related('author')
 
+    @queued_write
     def perform_create(self, serializer):
         """Создаёт новый комментарий и устанавливает автора."""
         review_id = self.kwargs.get('review_id')
         review = get_object_or_404(Review, id=review_id)
         serializer.save(author=self.request.user, review=review)
+
+
+class ChangeFeedView(TimingMixin, APIView):
+    """Изменения объектов API после курсора ``since``.
+
+    Курсор следующего запроса — ``cursor`` из ответа; пока
+    ``has_more`` истинно, изменения ещё есть.
+    """
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        query = ChangeFeedQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since = query.validated_data['since']
+        limit = min(
+            query.validated_data.get(
+                'limit', getattr(settings, 'CHANGE_FEED_PAGE_SIZE', 100)
+            ),
+            getattr(settings, 'CHANGE_FEED_MAX_LIMIT', 1000)
+        )
+        entries, has_more = read_changes(
+            since, limit,
+            admin=request.user.is_authenticated and request.user.is_admin
+        )
+        return Response({
+            'cursor': entries[-1].id if entries else since,
+            'has_more': has_more,
+            'results': ChangeLogEntrySerializer(entries, many=True).data,
+        })
+
+
+class MetricsView(APIView):
+    """Метрики всех воркеров в формате Prometheus."""
+
+    authentication_classes = (
+        MetricsTokenAuthentication,
+        *api_settings.DEFAULT_AUTHENTICATION_CLASSES,
+    )
+    permission_classes = (MetricsAccess,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        return Response(
+            render_metrics(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -0,0 +1,244 @@
+"""Очередь записи в БД с одним пишущим потоком."""
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, TimeoutError as WaitTimeout
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .timing import current_timings, measure
+
+# Строки, которые записывает текущее задание пишущего потока.
+current_rows = ContextVar('current_rows', default=None)
+
+
+def foreign_keys(model):
+    """Внешние ключи модели с ограничением в БД."""
+    return [
+        field for field in model._meta.concrete_fields
+        if field.remote_field and getattr(field, 'db_constraint', False)
+    ]
+
+
+@lru_cache(maxsize=None)
+def referencing_fields():
+    """Внешние ключи других моделей, ссылающиеся на каждую модель."""
+    fields = defaultdict(list)
+    for model in apps.get_models(include_auto_created=True):
+        for field in foreign_keys(model):
+            fields[field.remote_field.model._meta.concrete_model].append(
+                (model, field)
+            )
+    return fields
+
+
+class JobRows:
+    """Строки, сохранённые и удалённые заданием (по сигналам моделей).
+
+    ``QuerySet.update()`` и массовые вставки сигналов не посылают:
+    такие записи проверяются только при COMMIT.
+    """
+
+    def __init__(self):
+        self.saved = []
+        self.deleted = []
+        self.linked = []
+
+    def check_foreign_keys(self):
+        """Проверяет внешние ключи только строк задания.
+
+        Django создаёт внешние ключи отложенными до COMMIT; без
+        проверки ошибка одного задания откатила бы всю пачку. Каждая
+        проверка — поиск по первичному ключу или индексу внешнего
+        ключа, а не просмотр таблицы.
+        """
+        for instance, update_fields in self.saved:
+            for field in foreign_keys(type(instance)):
+                if update_fields is not None and (
+                        field.name not in update_fields):
+                    continue
+                value = getattr(instance, field.attname)
+                if value is not None and not self.exists(
+                        field.remote_field.model, field.target_field, value):
+                    raise IntegrityError(
+                        f'{instance._meta.db_table}.{field.column} = '
+                        f'{value}: связанной строки нет.'
+                    )
+        for instance in self.deleted:
+            model = instance._meta.concrete_model
+            for related, field in referencing_fields()[model]:
+                value = getattr(instance, field.target_field.attname)
+                if self.exists(related, field, value):
+                    raise IntegrityError(
+                        f'На удалённую строку {model._meta.db_table} '
+                        f'ссылается {related._meta.db_table}.'
+                    )
+        for model, pk_set in self.linked:
+            if model._base_manager.filter(pk__in=pk_set).count() != len(
+                    pk_set):
+                raise IntegrityError(
+                    f'Связь с несуществующей строкой {model._meta.db_table}.'
+                )
+
+    def exists(self, model, field, value):
+        return model._base_manager.filter(
+            **{field.attname: value}
+        ).exists()
+
+
+@receiver(post_save)
+def record_saved_row(sender, instance, update_fields, raw, **kwargs):
+    rows = current_rows.get()
+    if rows is not None and not raw:
+        rows.saved.append((instance, update_fields))
+
+
+@receiver(post_delete)
+def record_deleted_row(sender, instance, **kwargs):
+    rows = current_rows.get()
+    if rows is not None:
+        rows.deleted.append(instance)
+
+
+@receiver(m2m_changed)
+def record_linked_rows(sender, action, model, pk_set, **kwargs):
+    rows = current_rows.get()
+    if rows is not None and action == 'post_add' and pk_set:
+        rows.linked.append((model, set(pk_set)))
+
+
+class WriteQueue:
+    """Выполняет записи в одном потоке со своим соединением.
+
+    Задания, пришедшие почти одновременно, выполняются в одной
+    транзакции (group commit), каждое — в своей точке сохранения
+    с проверкой внешних ключей: ошибка задания откатывает только его.
+    Запросы задания учитываются в замерах запроса, который его
+    поставил. Чтения остаются в потоках запросов и идут параллельно.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.batches = 0
+
+    def submit(self, func, *args, **kwargs):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='db-writer', daemon=True
+                )
+                self.thread.start()
+        future = Future()
+        self.jobs.put((func, args, kwargs, current_timings.get(), future))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.jobs.get()]
+            deadline = time.monotonic() + getattr(
+                settings, 'WRITE_QUEUE_BATCH_WAIT', 0.002
+            )
+            while len(batch) < getattr(settings, 'WRITE_QUEUE_BATCH_SIZE', 64):
+                try:
+                    batch.append(self.jobs.get(
+                        timeout=max(0, deadline - time.monotonic())
+                    ))
+                except queue.Empty:
+                    break
+            self.commit(batch)
+
+    def commit(self, batch):
+        # Задания, отменённые по таймауту до начала, не выполняются.
+        batch = [
+            job for job in batch if job[-1].set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+        connection.close_if_unusable_or_obsolete()
+        results = []
+        try:
+            with transaction.atomic():
+                for *job, future in batch:
+                    try:
+                        result = self.execute(*job, check=len(batch) > 1)
+                    except Exception as error:
+                        results.append((future, None, error))
+                    else:
+                        results.append((future, result, None))
+        except Exception as error:
+            for *_, future in batch:
+                future.set_exception(error)
+            return
+        finally:
+            self.batches += 1
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def execute(self, func, args, kwargs, timings, check):
+        """Выполняет задание в точке сохранения.
+
+        Внешние ключи проверяются, только если в пачке есть другие
+        задания: ошибка единственного задания при COMMIT и так
+        касается только его.
+        """
+        rows = JobRows()
+        tokens = current_timings.set(timings), current_rows.set(rows)
+        try:
+            with transaction.atomic():
+                result = func(*args, **kwargs)
+                if check:
+                    rows.check_foreign_keys()
+                return result
+        finally:
+            current_rows.reset(tokens[1])
+            current_timings.reset(tokens[0])
+
+
+write_queue = WriteQueue()
+
+
+def run_write(func, *args, **kwargs):
+    """Выполняет запись через очередь, если она включена.
+
+    Внутри уже открытой транзакции запись выполняется на месте:
+    пишущий поток не увидит её незафиксированных данных. По
+    ``WRITE_QUEUE_TIMEOUT`` отменяется только ещё не начатое задание:
+    начатое может зафиксироваться, поэтому его результат дожидается.
+    """
+    if (
+        not getattr(settings, 'WRITE_QUEUE_ENABLED', False)
+        or connection.in_atomic_block
+    ):
+        return func(*args, **kwargs)
+    with measure('write'):
+        future = write_queue.submit(func, *args, **kwargs)
+        try:
+            return future.result(
+                timeout=getattr(settings, 'WRITE_QUEUE_TIMEOUT', 30)
+            )
+        except WaitTimeout:
+            if future.cancel():
+                raise
+            return future.result()
+
+
+def queued_write(method):
+    """Декоратор ``perform_*`` вьюсета: запись через ``run_write``."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return run_write(method, self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,108 @@
+"""PostgreSQL с пулом соединений и проверкой их исправности."""
+import os
+import threading
+import time
+
+import psycopg2.extensions
+import psycopg2.extras
+from django.db.backends.postgresql import base
+
+from .pool import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def check_connection(connection):
+    """Исправно ли соединение: ``SELECT 1`` проходит без ошибок."""
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except psycopg2.Error:
+        return False
+    return True
+
+
+def reset_connection(connection):
+    """Откатывает незавершённую транзакцию перед возвратом в пул."""
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд PostgreSQL, берущий соединения из пула процесса.
+
+    Закрытие соединения Django (конец запроса или истечение
+    ``CONN_MAX_AGE``) возвращает его в пул, а не разрывает, поэтому
+    новое рукопожатие с сервером нужно только при росте пула.
+    Параметры пула — в ключе ``POOL`` описания БД: ``MAX_SIZE``,
+    ``TIMEOUT`` и ``HEALTH_CHECK_INTERVAL`` (секунд; с тем же
+    интервалом проверяются и постоянные соединения перед запросом).
+    """
+
+    def get_pool(self, conn_params):
+        key = (os.getpid(), self.alias)
+        with pools_lock:
+            if key not in pools:
+                options = self.settings_dict.get('POOL', {})
+                pools[key] = ConnectionPool(
+                    lambda: base.Database.connect(**conn_params),
+                    check_connection,
+                    reset_connection,
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 5),
+                    check_interval=options.get('HEALTH_CHECK_INTERVAL', 30),
+                )
+            return pools[key]
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool(conn_params).acquire()
+        self.checked_at = time.monotonic()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self.get_pool(self.get_connection_params()).release(
+                self.connection, discard=self.errors_occurred
+            )
+
+    def close_if_unusable_or_obsolete(self):
+        """Дополнительно проверяет давно не проверенное соединение."""
+        interval = self.settings_dict.get('POOL', {}).get(
+            'HEALTH_CHECK_INTERVAL', 30
+        )
+        if (
+            self.connection is not None
+            and not self.in_atomic_block
+            and time.monotonic() - getattr(self, 'checked_at', 0) > interval
+        ):
+            self.checked_at = time.monotonic()
+            if not self.is_usable():
+                self.errors_occurred = True
+                self.close()
+                return
+        super().close_if_unusable_or_obsolete()
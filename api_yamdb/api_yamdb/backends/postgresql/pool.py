@@ -0,0 +1,83 @@
+"""Пул соединений с БД внутри процесса."""
+import threading
+import time
+from collections import deque
+
+
+class PoolExhausted(Exception):
+    """Все соединения пула заняты дольше допустимого ожидания."""
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений DB-API.
+
+    Не более ``max_size`` соединений выдаются одновременно, остальные
+    потоки ждут до ``timeout`` секунд. Соединение, простоявшее в пуле
+    дольше ``check_interval`` секунд, перед выдачей проверяется
+    функцией ``check``; неисправные закрываются и заменяются новыми.
+    ``reset`` возвращает соединение в исходное состояние при возврате
+    в пул или возвращает False, если его нужно закрыть.
+    """
+
+    def __init__(self, connect, check, reset, max_size=10, timeout=5,
+                 check_interval=30):
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.idle = deque()
+        self.created = 0
+
+    def acquire(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PoolExhausted(
+                f'Нет свободных соединений за {self.timeout} с.'
+            )
+        try:
+            return self.take_idle() or self.open()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def take_idle(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, released_at = self.idle.pop()
+            if time.monotonic() - released_at < self.check_interval:
+                return connection
+            if self.check(connection):
+                return connection
+            self.close(connection)
+
+    def open(self):
+        connection = self.connect()
+        with self.lock:
+            self.created += 1
+        return connection
+
+    def release(self, connection, discard=False):
+        try:
+            if discard or not self.reset(connection):
+                self.close(connection)
+            else:
+                with self.lock:
+                    self.idle.append((connection, time.monotonic()))
+        finally:
+            self.slots.release()
+
+    def close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection, _ in idle:
+            self.close(connection)
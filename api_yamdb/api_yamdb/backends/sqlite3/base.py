@@ -0,0 +1,37 @@
+"""SQLite с настройками для конкурентной нагрузки."""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+}
+
+
+def apply_pragmas(connection, pragmas):
+    """Выполняет ``PRAGMA имя = значение`` для открытого соединения."""
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд SQLite, настраивающий каждое новое соединение.
+
+    ``PRAGMAS`` в описании БД задаёт режим журнала, синхронизацию,
+    размеры кеша и mmap, ожидание блокировки. ``TRANSACTION_MODE``
+    (``DEFERRED``, ``IMMEDIATE``, ``EXCLUSIVE``) задаёт начало
+    транзакций ``atomic``: при ``IMMEDIATE`` блокировка записи берётся
+    сразу и ждёт ``busy_timeout``, а не падает с «database is locked»
+    при попытке записи из читающей транзакции.
+    """
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(
+            connection, self.settings_dict.get('PRAGMAS', DEFAULT_PRAGMAS)
+        )
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE', 'DEFERRED')
+        self.cursor().execute(f'BEGIN {mode}')
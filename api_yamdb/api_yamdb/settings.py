@@ -1,4 +1,6 @@
 """Настройки проекта."""
+import os
+import tempfile
 from pathlib import Path
 
 from datetime import timedelta
@@ -31,6 +33,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'api.middleware.AsyncUrlconfMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +49,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'api_yamdb.urls'
 
+# Маршруты запросов через ASGI: горячие чтения — асинхронными вьюхами.
+ASGI_URLCONF = 'api_yamdb.urls_asgi'
+
+# Потоки выборок асинхронных вьюх без асинхронного ORM; каждый держит
+# своё соединение с БД.
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', 4))
+
 TEMPLATES_DIR = BASE_DIR / 'templates'
 TEMPLATES = [
     {
@@ -64,12 +78,75 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # Требуется psycopg2 (pip install psycopg2-binary).
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api_yamdb.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'yamdb'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Соединение возвращается в пул процесса в конце запроса.
+            # Постоянное соединение (CONN_MAX_AGE > 0) держит место в
+            # пуле за потоком и между запросами, поэтому потоков сервера
+            # должно быть не больше MAX_SIZE.
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+            'POOL': {
+                'MAX_SIZE': int(os.getenv('DB_POOL_SIZE', 10)),
+                'TIMEOUT': 5,
+                'HEALTH_CHECK_INTERVAL': 30,
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api_yamdb.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            # Применяются к каждому новому соединению. WAL позволяет
+            # читать во время записи, busy_timeout (мс) — ждать
+            # блокировку записи.
+            'PRAGMAS': {
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64 * 1024,
+                'temp_store': 'memory',
+                'busy_timeout': 5000,
+            },
+            'TRANSACTION_MODE': 'IMMEDIATE',
+        }
+    }
+
+# Реплики только для чтения: DB_REPLICAS — через запятую файлы SQLite
+# или хосты PostgreSQL. Файлы SQLite обновляет команда sync_replicas.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgresql' else 'NAME': replica.strip(),
+    }
+    # Реплики только читают: блокировка записи в начале транзакции
+    # заставляла бы читателей ждать друг друга.
+    DATABASES[alias].pop('TRANSACTION_MODE', None)
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = 5
+
+# Лента изменений читается с primary: курсор клиента не должен
+# обгонять реплику.
+REPLICA_PRIMARY_MODELS = (
+    'reviews.User', 'reviews.RevokedToken', 'reviews.IssuedToken',
+    'reviews.ChangeLogEntry',
+)
 
 
 # Password validation
@@ -109,24 +186,162 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
+# Сжатие ответов: ответы короче порога (байт) не сжимаются. Копии
+# статики сжимает заранее команда compress_static.
+COMPRESSION_MIN_SIZE = 1024
+
+COMPRESSION_BROTLI_QUALITY = 5
+
 AUTH_USER_MODEL = 'reviews.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': '30/min',
+        'auth_username': '10/min',
+        'auth_email': '5/min',
+    },
+    # Число доверенных прокси перед приложением: без прокси ключом
+    # ограничений служит REMOTE_ADDR, а не X-Forwarded-For клиента.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
 
+# Очередь записи: все записи вьюсетов выполняет один поток процесса,
+# близкие по времени записи фиксируются одной транзакцией.
+WRITE_QUEUE_ENABLED = os.getenv('WRITE_QUEUE_ENABLED', '') == '1'
+
+WRITE_QUEUE_BATCH_SIZE = 64
+
+WRITE_QUEUE_BATCH_WAIT = 0.002
+
+WRITE_QUEUE_TIMEOUT = 30
+
+# Общий для воркеров файл корзин ограничения частоты запросов.
+THROTTLE_DB_PATH = Path(os.getenv(
+    'THROTTLE_DB_PATH', Path(tempfile.gettempdir()) / 'yamdb_throttle.sqlite3'
+))
+
+# Что делать с запросом, если файл корзин занят дольше таймаута:
+# 'closed' — отклонить (429), 'open' — пропустить без ограничения.
+THROTTLE_FAILURE_POLICY = os.getenv('THROTTLE_FAILURE_POLICY', 'closed')
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=45),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Число воркеров сервера (переменную читает и gunicorn). Больше одного
+# воркера требует общего бэкенда CACHES: иначе приложение не запустится.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
+# Кеш проверенных токенов (записей на процесс) и полей пользователя
+# (секунд). Сброс кеша пользователя виден другим воркерам только при
+# общем бэкенде CACHES (Memcached, Redis).
+AUTH_TOKEN_CACHE_SIZE = 10000
+
+AUTH_PRINCIPAL_TTL = 300
+
+# Фильтр Блума отозванных токенов: размер в битах и число хешей,
+# период подгрузки новых записей и полной перестройки (секунд), сколько
+# последних id перечитывать (их транзакции могли зафиксироваться позже).
+REVOCATION_BLOOM_SIZE = 1 << 20
+
+REVOCATION_BLOOM_HASHES = 7
+
+REVOCATION_REFRESH_INTERVAL = 5
+
+REVOCATION_REBUILD_INTERVAL = 600
+
+REVOCATION_REFRESH_LOOKBACK = 1000
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 EMAIL_SENDER = 'practicum@yandex.com'
+
+# Письма уходят через очередь: python manage.py send_outbox_emails --loop.
+# EMAIL_OUTBOX_EAGER отправляет письмо сразу после записи в очередь.
+EMAIL_OUTBOX_EAGER = False
+
+EMAIL_OUTBOX_BATCH_SIZE = 100
+
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+EMAIL_OUTBOX_RETRY_DELAY = 30
+
+# Лента изменений /api/v1/changes/: записей на странице по умолчанию
+# и не больше. Команда compact_changes удаляет записи старше
+# CHANGE_LOG_COMPACT_AFTER_DAYS дней, перекрытые более поздними.
+CHANGE_FEED_PAGE_SIZE = 100
+
+CHANGE_FEED_MAX_LIMIT = 1000
+
+CHANGE_LOG_COMPACT_AFTER_DAYS = 7
+
+# Instrumentation
+
+SERVER_TIMING_HEADER = True
+
+SLOW_QUERY_THRESHOLD_MS = 100
+
+SLOW_QUERY_LOG_SIZE = 500
+
+QUERY_LOG_PATH = os.getenv('QUERY_LOG_PATH')
+
+QUERY_LOG_SAMPLE_RATE = float(os.getenv('QUERY_LOG_SAMPLE_RATE', 0))
+
+METRICS_DIR = Path(
+    os.getenv('METRICS_DIR', Path(tempfile.gettempdir()) / 'yamdb_metrics')
+)
+
+METRICS_FLUSH_INTERVAL = 5
+
+# Доступ к /metrics без учётной записи администратора: заголовок
+# Authorization: Bearer <METRICS_TOKEN> или адрес из METRICS_ALLOWED_IPS
+# (через запятую). Loopback не разрешён по умолчанию: за обратным прокси
+# с него приходят все запросы.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+METRICS_ALLOWED_IPS = tuple(
+    address for address in os.getenv('METRICS_ALLOWED_IPS', '').split(',')
+    if address
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
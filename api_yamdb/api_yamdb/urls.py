@@ -3,9 +3,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 
+from api.compression import serve_static
+from api.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('static/<path:path>', serve_static, name='static'),
     path(
         'redoc/',
         TemplateView.as_view(template_name='redoc.html'),
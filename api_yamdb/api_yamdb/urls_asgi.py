@@ -0,0 +1,29 @@
+"""Маршруты проекта под ASGI.
+
+Горячие чтения API обслуживают асинхронные вьюхи, остальные
+маршруты совпадают с ``api_yamdb.urls``.
+"""
+from django.urls import path
+
+from api import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/v1/titles/', async_views.title_list, name='titles-list'),
+    path(
+        'api/v1/titles/<int:pk>/',
+        async_views.title_detail,
+        name='titles-detail'
+    ),
+    path(
+        'api/v1/titles/<int:title_id>/reviews/',
+        async_views.review_list,
+        name='reviews-list'
+    ),
+    path(
+        'api/v1/titles/<int:title_id>/reviews/<int:review_id>/comments/',
+        async_views.comment_list,
+        name='comments-list'
+    ),
+] + sync_urlpatterns
@@ -1,7 +1,10 @@
 """Настройка админ панели."""
 from django.contrib.admin import ModelAdmin, register
 
-from .models import Category, Comment, Genre, Review, Title
+from .models import (
+    Category, ChangeLogEntry, Comment, Genre, OutboxEmail, Review,
+    SlowQuery, Title
+)
 
 
 @register(Category)
@@ -42,3 +45,50 @@ class TitleAdmin(ModelAdmin):
 
     list_display = ('id', 'name', 'year', 'description', 'category')
     empty_value_display = '-empty-'
+
+
+@register(OutboxEmail)
+class OutboxEmailAdmin(ModelAdmin):
+    """Очередь исходящих писем."""
+
+    list_display = (
+        'id', 'recipient', 'subject', 'status', 'attempts',
+        'next_attempt_at', 'sent_at'
+    )
+    list_filter = ('status',)
+    search_fields = ('recipient',)
+    readonly_fields = ('created', 'sent_at', 'last_error')
+
+
+@register(SlowQuery)
+class SlowQueryAdmin(ModelAdmin):
+    """Журнал медленных запросов."""
+
+    list_display = ('id', 'created', 'duration_ms', 'view', 'method', 'sql')
+    list_filter = ('view', 'method')
+    search_fields = ('sql', 'plan', 'path')
+    readonly_fields = (
+        'created', 'duration_ms', 'view', 'method', 'path',
+        'sql', 'params', 'plan',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@register(ChangeLogEntry)
+class ChangeLogEntryAdmin(ModelAdmin):
+    """Журнал изменений."""
+
+    list_display = ('id', 'changed_at', 'model', 'object_id', 'action')
+    list_filter = ('model', 'action')
+    search_fields = ('object_id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,288 @@
+"""Подбор индексов по записанной нагрузке."""
+import json
+import re
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, migrations, models
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from reviews.models import SlowQuery
+
+TABLE_PREFIX = 'reviews_'
+LITERAL_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+COLUMN = r'"(\w+)"\."(\w+)"'
+JOIN_PATTERN = re.compile(rf'{COLUMN}\s*=\s*{COLUMN}')
+EQUALITY_PATTERN = re.compile(rf'{COLUMN}\s*(?:=|IN\b|IS\b)', re.I)
+RANGE_PATTERN = re.compile(rf'{COLUMN}\s*(?:<=|>=|<|>|BETWEEN\b)', re.I)
+ORDER_PATTERN = re.compile(r'\bORDER BY (.+?)(?:\bLIMIT\b|$)', re.I)
+
+
+def fingerprint(sql):
+    """Текст запроса без литералов и параметров."""
+    for pattern, replacement in LITERAL_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def read_log(paths):
+    """Записи журналов в формате JSON Lines с полями sql и duration_ms."""
+    for path in paths:
+        with open(path, encoding='utf-8') as log_file:
+            for line in log_file:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if 'sql' in record:
+                    yield record['sql'], float(record.get('duration_ms', 0))
+
+
+def read_slow_log():
+    """Записи журнала медленных запросов."""
+    yield from SlowQuery.objects.values_list('sql', 'duration_ms')
+
+
+def candidate_columns(sql):
+    """Колонки, которые индекс должен покрыть, по таблицам запроса.
+
+    Сначала идут колонки сравнения на равенство (в том числе условия
+    соединения), затем одна колонка диапазона либо колонки сортировки.
+    """
+    where = sql.split(' WHERE ', 1)[1] if ' WHERE ' in sql else ''
+    join_conditions = ' '.join(re.findall(r'\bON \((.+?)\)', sql))
+    equality = defaultdict(list)
+    ranges = defaultdict(list)
+    ordering = defaultdict(list)
+    for left_table, left, right_table, right in JOIN_PATTERN.findall(
+            join_conditions):
+        equality[left_table].append(left)
+        equality[right_table].append(right)
+    for table, column in EQUALITY_PATTERN.findall(where):
+        equality[table].append(column)
+    for table, column in RANGE_PATTERN.findall(where):
+        ranges[table].append(column)
+    order_by = ORDER_PATTERN.search(sql)
+    if order_by:
+        for table, column in re.findall(COLUMN, order_by.group(1)):
+            ordering[table].append(column)
+    result = {}
+    for table in set(equality) | set(ranges) | set(ordering):
+        if not table.startswith(TABLE_PREFIX):
+            continue
+        columns = list(dict.fromkeys(equality[table]))
+        equality_count = len(columns)
+        tail = ranges[table][:1] or ordering[table]
+        columns += [column for column in tail if column not in columns]
+        if columns:
+            result[table] = (tuple(columns), equality_count)
+    return result
+
+
+def existing_indexes(table):
+    """Колонки индексов таблицы и признак уникальности."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        (
+            tuple(constraint['columns']),
+            constraint['unique'] or constraint['primary_key']
+        )
+        for constraint in constraints.values()
+        if constraint['index'] or constraint['unique']
+        or constraint['primary_key']
+    ]
+
+
+def is_covered(columns, equality_count, indexes):
+    """Обслуживают ли запрос существующие индексы.
+
+    Запрос покрыт, если равенство задано по всем колонкам уникального
+    индекса (выбирается одна строка) или если есть индекс, начинающийся
+    с тех же колонок. Колонки равенства можно переставлять, поэтому
+    сравниваются множества.
+    """
+    equality = set(columns[:equality_count])
+    for index, unique in indexes:
+        if unique and set(index) <= equality:
+            return True
+        if (
+            set(index[:equality_count]) == equality
+            and index[equality_count:len(columns)] == columns[equality_count:]
+        ):
+            return True
+    return False
+
+
+def group_by_fingerprint(records):
+    """Число и суммарное время запросов по отпечаткам."""
+    groups = {}
+    for sql, duration in records:
+        group = groups.setdefault(
+            fingerprint(sql), {'count': 0, 'total_ms': 0, 'sql': sql}
+        )
+        group['count'] += 1
+        group['total_ms'] += duration
+    return groups
+
+
+def suggest(groups):
+    """Кандидаты в индексы, от самых затратных запросов к дешёвым."""
+    suggestions = {}
+    for group in groups.values():
+        candidates = candidate_columns(group['sql'])
+        for table, (columns, equality_count) in candidates.items():
+            suggestion = suggestions.setdefault(
+                (table, columns, equality_count), {'count': 0, 'total_ms': 0}
+            )
+            suggestion['count'] += group['count']
+            suggestion['total_ms'] += group['total_ms']
+    return sorted(suggestions.items(), key=lambda item: -item[1]['total_ms'])
+
+
+def model_for_table(table):
+    """Модель, в том числе промежуточная M2M, по имени таблицы."""
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def build_index(model, columns):
+    """Индекс модели по колонкам; None, если колонка не поле модели."""
+    fields = []
+    for column in columns:
+        field = next(
+            (
+                field for field in model._meta.concrete_fields
+                if field.column == column
+            ),
+            None
+        )
+        if field is None:
+            return None
+        fields.append(field.name)
+    index = models.Index(fields=fields)
+    index.set_name_with_model(model)
+    return index
+
+
+class Command(BaseCommand):
+    """Предлагает составные индексы для таблиц ``reviews_*``.
+
+    Группирует запросы из журналов по отпечатку, выделяет колонки
+    условий и сортировки и сравнивает их с существующими индексами.
+    Оценка выгоды — суммарное время запросов, которые обслужит индекс:
+    это верхняя граница экономии.
+    """
+
+    help = 'Предлагает индексы по записанному журналу SQL-запросов.'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.indexes = {}
+        self.reported = 0
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'logs', nargs='*',
+            help='Журналы SQL-запросов (JSON Lines, поля sql, duration_ms).'
+        )
+        parser.add_argument(
+            '--slow-log', action='store_true',
+            help='Использовать журнал медленных запросов из БД.'
+        )
+        parser.add_argument(
+            '--min-count', type=int, default=1,
+            help='Минимальное число запросов для рекомендации.'
+        )
+        parser.add_argument(
+            '--write', action='store_true',
+            help='Записать миграцию с предложенными индексами.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['logs'] and not options['slow_log']:
+            raise CommandError('Укажите журналы запросов или --slow-log.')
+        records = list(read_log(options['logs']))
+        if options['slow_log']:
+            records += list(read_slow_log())
+        groups = group_by_fingerprint(records)
+        self.stdout.write(
+            f'Запросов: {len(records)}, отпечатков: {len(groups)}.'
+        )
+        operations = []
+        for (table, columns, equality_count), stats in suggest(groups):
+            if stats['count'] < options['min_count']:
+                continue
+            operation = self.propose(table, columns, equality_count, stats)
+            if operation is not None:
+                operations.append(operation)
+        if not operations:
+            if not self.reported:
+                self.stdout.write(self.style.SUCCESS(
+                    'Существующие индексы покрывают нагрузку.'
+                ))
+            return
+        self.write_migration(operations, options['write'])
+
+    def propose(self, table, columns, equality_count, stats):
+        """Операция миграции для непокрытого индекса или None."""
+        if table not in self.indexes:
+            self.indexes[table] = existing_indexes(table)
+        if is_covered(columns, equality_count, self.indexes[table]):
+            return None
+        model = model_for_table(table)
+        index = build_index(model, columns) if model else None
+        if index is None:
+            return None
+        self.indexes[table].append((columns, False))
+        self.stdout.write(
+            f'{table}({", ".join(columns)}): запросов {stats["count"]}, '
+            f'выгода до {stats["total_ms"]:.1f} мс'
+        )
+        self.reported += 1
+        if model._meta.auto_created:
+            # AddIndex для автоматической промежуточной модели M2M
+            # не применяется: у неё нет состояния в миграциях.
+            self.stdout.write(
+                '    Промежуточная таблица M2M: объявите through-модель '
+                'с этим индексом.'
+            )
+            return None
+        self.stdout.write(
+            f'    {model.__name__}.Meta.indexes: '
+            f'models.Index(fields={list(index.fields)!r}, '
+            f'name={index.name!r})'
+        )
+        return migrations.AddIndex(
+            model_name=model._meta.model_name, index=index
+        )
+
+    def write_migration(self, operations, write):
+        loader = MigrationLoader(connection)
+        leaf = loader.graph.leaf_nodes('reviews')[0]
+        number = int(leaf[1].split('_', 1)[0]) + 1
+        migration = migrations.Migration(
+            f'{number:04d}_advised_indexes', 'reviews'
+        )
+        migration.dependencies = [leaf]
+        migration.operations = operations
+        writer = MigrationWriter(migration)
+        if not write:
+            self.stdout.write(writer.as_string())
+            return
+        with open(writer.path, 'w', encoding='utf-8') as migration_file:
+            migration_file.write(writer.as_string())
+        self.stdout.write(self.style.SUCCESS(
+            f'Миграция записана в {writer.path}. Перенесите индексы '
+            'в Meta.indexes моделей.'
+        ))
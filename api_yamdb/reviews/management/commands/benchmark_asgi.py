@@ -0,0 +1,181 @@
+"""Сравнение пропускной способности ASGI и WSGI на горячих чтениях."""
+import asyncio
+import io
+import logging
+import statistics
+import threading
+import time
+
+from django.core.asgi import get_asgi_application
+from django.core.management import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from reviews.models import Review
+
+HOST = 'benchmark'
+
+
+def percentile(values, share):
+    if not values:
+        return 0
+    return sorted(values)[min(len(values) - 1, int(len(values) * share))]
+
+
+def wsgi_get(application, path):
+    """GET-запрос к WSGI-приложению; возвращает код ответа."""
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': HOST,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'http',
+    }
+    body = application(
+        environ, lambda code, headers: status.append(int(code[:3]))
+    )
+    try:
+        for _ in body:
+            pass
+    finally:
+        close = getattr(body, 'close', None)
+        if close is not None:
+            close()
+    return status[0]
+
+
+async def asgi_get(application, path):
+    """GET-запрос к ASGI-приложению; возвращает код ответа."""
+    status = []
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', HOST.encode())],
+        'server': (HOST, 80),
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+class Command(BaseCommand):
+    """Нагрузка на горячие чтения API через ASGI и WSGI в одном процессе.
+
+    Для каждого эндпоинта (список и карточка произведения, отзывы,
+    комментарии) ``--concurrency`` клиентов в течение ``--duration``
+    секунд шлют анонимные GET-запросы: под WSGI — из потоков, под
+    ASGI — задачами цикла событий. Сеть и HTTP-сервер не участвуют,
+    сравниваются только обработчики Django с вьюхами за ними.
+    """
+
+    help = 'Сравнивает ASGI и WSGI на горячих чтениях API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность прогона каждого эндпоинта, секунд.'
+        )
+
+    def handle(self, *args, **options):
+        review = Review.objects.filter(comments__isnull=False).first()
+        if review is None:
+            raise CommandError(
+                'Нужен хотя бы один отзыв с комментарием, загрузите '
+                'данные командой load_data_from_csv.'
+            )
+        paths = {
+            'titles-list': '/api/v1/titles/',
+            'titles-detail': f'/api/v1/titles/{review.title_id}/',
+            'reviews-list': f'/api/v1/titles/{review.title_id}/reviews/',
+            'comments-list': (
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+                '/comments/'
+            ),
+        }
+        wsgi = get_wsgi_application()
+        asgi = get_asgi_application()
+        timing_logger = logging.getLogger('api.timing')
+        level = timing_logger.level
+        timing_logger.setLevel(logging.WARNING)
+        try:
+            for name, path in paths.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{name}:'))
+                self.report('WSGI', self.run_wsgi(wsgi, path, options),
+                            options['duration'])
+                self.report('ASGI', asyncio.run(
+                    self.run_asgi(asgi, path, options)
+                ), options['duration'])
+        finally:
+            timing_logger.setLevel(level)
+
+    def run_wsgi(self, application, path, options):
+        deadline = time.monotonic() + options['duration']
+        results = []
+        lock = threading.Lock()
+
+        def client():
+            latencies, errors = [], 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                if wsgi_get(application, path) != 200:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+            with lock:
+                results.append((latencies, errors))
+
+        threads = [
+            threading.Thread(target=client, daemon=True)
+            for _ in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    async def run_asgi(self, application, path, options):
+        deadline = time.monotonic() + options['duration']
+
+        async def client():
+            latencies, errors = [], 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                if await asgi_get(application, path) != 200:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+            return latencies, errors
+
+        return await asyncio.gather(*(
+            client() for _ in range(options['concurrency'])
+        ))
+
+    def report(self, label, results, duration):
+        latencies = [
+            latency for client_latencies, _ in results
+            for latency in client_latencies
+        ]
+        errors = sum(errors for _, errors in results)
+        mean = statistics.mean(latencies) * 1000 if latencies else 0
+        self.stdout.write(
+            f'  {label}: {len(latencies) / duration:.0f} запр/с, '
+            f'среднее {mean:.2f} мс, '
+            f'p95 {percentile(latencies, 0.95) * 1000:.2f} мс, '
+            f'ошибок {errors}'
+        )
@@ -0,0 +1,125 @@
+"""Сравнение рендеринга и разбора JSON стандартными классами DRF и orjson."""
+import datetime
+import io
+import time
+from collections import OrderedDict
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+
+
+def title_page(rows):
+    """Страница списка произведений в формате ``TitleReadSerializer``."""
+    return OrderedDict(
+        count=rows * 10,
+        next='http://testserver/api/v1/titles/?page=2',
+        previous=None,
+        results=[
+            OrderedDict(
+                id=number,
+                genre=[
+                    OrderedDict(name='Драма', slug='drama'),
+                    OrderedDict(name='Комедия', slug='comedy'),
+                ],
+                category=OrderedDict(name='Фильм', slug='movie'),
+                rating=number % 10 + 1,
+                name=f'Произведение №{number} «Сталкер»',
+                year=1900 + number % 120,
+                description='Описание произведения на русском языке. ' * 4,
+            )
+            for number in range(rows)
+        ],
+    )
+
+
+def review_page(rows):
+    """Страница отзывов с датами, как у ``ReviewSerializer``."""
+    pub_date = timezone.now()
+    return OrderedDict(
+        count=rows,
+        next=None,
+        previous=None,
+        results=[
+            OrderedDict(
+                id=number,
+                text='Отличный фильм, пересматривал много раз. ' * 3,
+                author=f'пользователь{number}',
+                score=number % 10 + 1,
+                pub_date=pub_date - datetime.timedelta(minutes=number),
+            )
+            for number in range(rows)
+        ],
+    )
+
+
+class Command(BaseCommand):
+    """Время рендеринга и разбора больших страниц API.
+
+    Страницы произведений и отзывов (с объектами ``datetime``)
+    рендерятся ``JSONRenderer`` DRF и ``FastJSONRenderer`` и разбираются
+    ``JSONParser`` и ``FastJSONParser``; проверяется, что результаты
+    совпадают.
+    """
+
+    help = 'Сравнивает скорость JSON-рендерера и парсера DRF и orjson.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000,
+            help='Число объектов на странице.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Число повторов каждого замера.'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write(
+                'orjson не установлен: FastJSONRenderer работает '
+                'на стандартном json.'
+            )
+        for name, page in (
+            ('titles', title_page(options['rows'])),
+            ('reviews', review_page(options['rows'])),
+        ):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Страница {name}:'))
+            body = JSONRenderer().render(page)
+            if FastJSONRenderer().render(page) != body:
+                self.stderr.write('  Вывод рендереров различается!')
+            results = (
+                ('render DRF', lambda: JSONRenderer().render(page)),
+                ('render orjson', lambda: FastJSONRenderer().render(page)),
+                ('parse DRF', lambda: JSONParser().parse(io.BytesIO(body))),
+                ('parse orjson',
+                 lambda: FastJSONParser().parse(io.BytesIO(body))),
+            )
+            timings = {
+                label: self.measure(func, options['repeat'])
+                for label, func in results
+            }
+            for label, seconds in timings.items():
+                self.stdout.write(
+                    f'  {label}: {seconds * 1000:.2f} мс на страницу, '
+                    f'{len(body) / seconds / 2 ** 20:.1f} МБ/с'
+                )
+            self.stdout.write(
+                f'  ускорение: рендеринг '
+                f'{timings["render DRF"] / timings["render orjson"]:.1f}x, '
+                f'разбор '
+                f'{timings["parse DRF"] / timings["parse orjson"]:.1f}x'
+            )
+
+    def measure(self, func, repeat):
+        """Лучшее время одного вызова из ``repeat``."""
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
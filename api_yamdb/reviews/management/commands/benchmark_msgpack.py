@@ -0,0 +1,75 @@
+"""Сравнение MessagePack и JSON по размеру и скорости."""
+import io
+import time
+
+from django.core.management import BaseCommand
+from django.utils.text import compress_string
+
+from api.packing import msgpack
+from api.parsers import FastJSONParser, MessagePackParser
+from api.renderers import FastJSONRenderer, MessagePackRenderer
+
+from .benchmark_json import review_page, title_page
+
+
+class Command(BaseCommand):
+    """Размер и время кодирования и разбора больших страниц API.
+
+    Для страниц произведений и отзывов сравниваются JSON
+    (``FastJSONRenderer``/``FastJSONParser``) и MessagePack
+    (``MessagePackRenderer``/``MessagePackParser``): размер без сжатия
+    и после gzip, время кодирования и разбора.
+    """
+
+    help = 'Сравнивает MessagePack и JSON на больших страницах API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000,
+            help='Число объектов на странице.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Число повторов каждого замера.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            'MessagePack: '
+            + ('пакет msgpack' if msgpack else 'реализация на Python')
+        )
+        formats = (
+            ('JSON', FastJSONRenderer(), FastJSONParser()),
+            ('MessagePack', MessagePackRenderer(), MessagePackParser()),
+        )
+        for name, page in (
+            ('titles', title_page(options['rows'])),
+            ('reviews', review_page(options['rows'])),
+        ):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Страница {name}:'))
+            decoded = {}
+            for label, renderer, parser in formats:
+                body = renderer.render(page)
+                decoded[label] = parser.parse(io.BytesIO(body))
+                encode = self.measure(
+                    lambda: renderer.render(page), options['repeat']
+                )
+                decode = self.measure(
+                    lambda: parser.parse(io.BytesIO(body)), options['repeat']
+                )
+                self.stdout.write(
+                    f'  {label}: {len(body)} байт, gzip '
+                    f'{len(compress_string(body))} байт, кодирование '
+                    f'{encode * 1000:.2f} мс, разбор {decode * 1000:.2f} мс'
+                )
+            if decoded['JSON'] != decoded['MessagePack']:
+                self.stderr.write('  Данные форматов различаются!')
+
+    def measure(self, func, repeat):
+        """Лучшее время одного вызова из ``repeat``."""
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
@@ -0,0 +1,171 @@
+"""Сравнение конкурентной работы SQLite с настройками и без."""
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from api_yamdb.backends.sqlite3.base import apply_pragmas
+
+SCHEMA = (
+    'CREATE TABLE review ('
+    'id INTEGER PRIMARY KEY, title_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, score INTEGER NOT NULL, pub_date TEXT NOT NULL)',
+    'CREATE INDEX review_title_idx ON review (title_id, pub_date)',
+)
+TITLES = 100
+PROFILES = {
+    'default': ({}, 'DEFERRED'),
+}
+
+
+class Worker(threading.Thread):
+    """Поток, выполняющий чтения или записи до истечения времени."""
+
+    def __init__(self, path, pragmas, mode, write, deadline, number):
+        super().__init__(daemon=True)
+        self.path = path
+        self.pragmas = pragmas
+        self.mode = mode
+        self.write = write
+        self.deadline = deadline
+        self.number = number
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        connection = sqlite3.connect(
+            self.path, timeout=5, isolation_level=None,
+            check_same_thread=False
+        )
+        apply_pragmas(connection, self.pragmas)
+        operation = self.insert if self.write else self.select
+        counter = 0
+        while time.monotonic() < self.deadline:
+            counter += 1
+            title_id = (self.number * 7919 + counter) % TITLES
+            started = time.perf_counter()
+            try:
+                operation(connection, title_id)
+            except sqlite3.OperationalError:
+                self.errors += 1
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                continue
+            self.latencies.append(time.perf_counter() - started)
+        connection.close()
+
+    def insert(self, connection, title_id):
+        connection.execute(f'BEGIN {self.mode}')
+        connection.execute(
+            'SELECT count(*) FROM review WHERE title_id = ?', (title_id,)
+        ).fetchone()
+        connection.execute(
+            'INSERT INTO review (title_id, text, score, pub_date) '
+            "VALUES (?, 'benchmark', 5, datetime('now'))", (title_id,)
+        )
+        connection.execute('COMMIT')
+
+    def select(self, connection, title_id):
+        connection.execute(
+            'SELECT id, text, score, pub_date FROM review '
+            'WHERE title_id = ? ORDER BY pub_date LIMIT 10', (title_id,)
+        ).fetchall()
+        connection.execute(
+            'SELECT avg(score) FROM review WHERE title_id = ?', (title_id,)
+        ).fetchone()
+
+
+def percentile(values, share):
+    if not values:
+        return 0
+    return sorted(values)[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    """Нагрузка читателями и писателями на отдельный файл SQLite.
+
+    Профиль ``default`` — настройки SQLite по умолчанию (журнал
+    отката, транзакции ``DEFERRED``), ``tuned`` — ``PRAGMAS``
+    и ``TRANSACTION_MODE`` из ``DATABASES['default']``. Для каждого
+    профиля выводятся число операций в секунду, задержки и ошибки
+    «database is locked».
+    """
+
+    help = 'Сравнивает конкурентную работу SQLite до и после настройки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность прогона каждого профиля, секунд.'
+        )
+        parser.add_argument(
+            '--rows', type=int, default=10000,
+            help='Число отзывов в начальных данных.'
+        )
+
+    def handle(self, *args, **options):
+        database = settings.DATABASES['default']
+        profiles = dict(PROFILES)
+        profiles['tuned'] = (
+            database.get('PRAGMAS', {}),
+            database.get('TRANSACTION_MODE', 'DEFERRED'),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, (pragmas, mode) in profiles.items():
+                path = str(Path(directory) / f'{name}.sqlite3')
+                self.prepare(path, pragmas, options['rows'])
+                readers, writers = self.run(path, pragmas, mode, options)
+                self.report(name, readers, writers, options['duration'])
+
+    def prepare(self, path, pragmas, rows):
+        connection = sqlite3.connect(path, isolation_level=None)
+        apply_pragmas(connection, pragmas)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO review (title_id, text, score, pub_date) '
+            "VALUES (?, 'seed', 7, datetime('now'))",
+            ((number % TITLES,) for number in range(rows))
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def run(self, path, pragmas, mode, options):
+        deadline = time.monotonic() + options['duration']
+        readers = [
+            Worker(path, pragmas, mode, False, deadline, number)
+            for number in range(options['readers'])
+        ]
+        writers = [
+            Worker(path, pragmas, mode, True, deadline, number)
+            for number in range(options['writers'])
+        ]
+        for worker in readers + writers:
+            worker.start()
+        for worker in readers + writers:
+            worker.join()
+        return readers, writers
+
+    def report(self, name, readers, writers, duration):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Профиль {name}:'))
+        for label, workers in (('чтение', readers), ('запись', writers)):
+            latencies = [
+                latency for worker in workers for latency in worker.latencies
+            ]
+            errors = sum(worker.errors for worker in workers)
+            mean = statistics.mean(latencies) * 1000 if latencies else 0
+            self.stdout.write(
+                f'  {label}: {len(latencies) / duration:.0f} оп/с, '
+                f'среднее {mean:.2f} мс, '
+                f'p95 {percentile(latencies, 0.95) * 1000:.2f} мс, '
+                f'p99 {percentile(latencies, 0.99) * 1000:.2f} мс, '
+                f'ошибок блокировки {errors}'
+            )
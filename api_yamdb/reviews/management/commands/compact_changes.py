@@ -0,0 +1,32 @@
+"""Сжатие журнала изменений."""
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from api.changes import compact_changes
+
+
+class Command(BaseCommand):
+    """Удаляет старые записи ``ChangeLogEntry``, перекрытые более
+    поздними записями того же объекта.
+
+    Последняя запись каждого объекта, включая запись об удалении,
+    сохраняется, поэтому курсоры клиентов остаются действительными.
+    Команду стоит запускать по расписанию, например раз в сутки.
+    """
+
+    help = 'Сжимает журнал изменений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            default=getattr(settings, 'CHANGE_LOG_COMPACT_AFTER_DAYS', 7),
+            help='Записи моложе этого числа дней не трогаются.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Записей, удаляемых одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        deleted = compact_changes(options['days'], options['batch_size'])
+        self.stdout.write(f'Удалено записей журнала: {deleted}.')
@@ -0,0 +1,43 @@
+"""Подготовка сжатых копий статики."""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from api.compression import ENCODINGS, precompress
+
+
+class Command(BaseCommand):
+    """Пишет рядом с файлами статики копии ``.gz`` (и ``.br``).
+
+    Обрабатывается ``STATIC_ROOT``, если он задан (после
+    ``collectstatic``), иначе ``STATICFILES_DIRS``. Копии отдаёт
+    вьюха ``static`` или nginx с ``gzip_static on``, сжимать файл
+    при каждом запросе не нужно.
+    """
+
+    help = 'Сжимает файлы статики заранее.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-size', type=int,
+            help='Минимальный размер файла, байт '
+                 '(по умолчанию COMPRESSION_MIN_SIZE).'
+        )
+
+    def handle(self, *args, **options):
+        static_root = getattr(settings, 'STATIC_ROOT', None)
+        roots = [static_root] if static_root else settings.STATICFILES_DIRS
+        suffixes = tuple(ENCODINGS.values())
+        written = 0
+        for root in roots:
+            for path in sorted(Path(root).rglob('*')):
+                if not path.is_file() or path.suffix in suffixes:
+                    continue
+                for target in precompress(path, options['min_size']):
+                    written += 1
+                    self.stdout.write(
+                        f'{target}: {path.stat().st_size} → '
+                        f'{target.stat().st_size} байт'
+                    )
+        self.stdout.write(f'Сжатых копий: {written}.')
@@ -0,0 +1,18 @@
+"""Удаление записей об истёкших токенах."""
+from django.core.management import BaseCommand
+
+from api.revocation import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    """Удаляет выданные и отозванные токены с истёкшим сроком.
+
+    Истёкший токен отклоняется и без записи об отзыве, поэтому записи
+    больше не нужны. Команду стоит запускать по расписанию.
+    """
+
+    help = 'Удаляет записи об истёкших токенах.'
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_tokens()
+        self.stdout.write(f'Удалено записей о токенах: {deleted}.')
@@ -0,0 +1,32 @@
+"""Пересборка карточек произведений."""
+from django.core.management import BaseCommand
+
+from api.cards import rebuild_title_cards
+
+
+class Command(BaseCommand):
+    """Заполняет таблицу ``TitleCard`` заново по произведениям,
+    жанрам, категориям и отзывам.
+
+    Нужна после миграции на карточки, после ``loaddata`` (сигналы
+    при загрузке фикстур не обновляют карточки) и после правок
+    таблиц в обход моделей.
+    """
+
+    help = 'Пересобирает карточки произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids', nargs='*', type=int,
+            help='id произведений (по умолчанию все).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Число карточек в одном INSERT.'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_title_cards(
+            options['title_ids'] or None, options['batch_size']
+        )
+        self.stdout.write(f'Карточек пересобрано: {count}.')
@@ -0,0 +1,385 @@
+"""Нагрузочный прогон postman-коллекции и журналов запросов."""
+import argparse
+import json
+import re
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import User
+
+DEFAULT_COLLECTION = (
+    settings.BASE_DIR.parent
+    / 'postman_collection/Ymdb-collection.postman_collection.json'
+)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+VARIABLE_PATTERN = re.compile(r'{{(\w+)}}')
+CAPTURE_PATTERN = re.compile(
+    r'const (\w+) = _\.get\(responseData, ["\'](\w+)["\']\)'
+)
+EXPORT_PATTERN = re.compile(r'collectionVariables\.set\("(\w+)", (\w+)\)')
+ID_PATTERN = re.compile(r'/\d+(?=/)')
+ROLE_VARIABLES = ('superuser', 'admin', 'moderator', 'user')
+
+
+def walk_collection(items):
+    """Обходит вложенные папки коллекции в порядке выполнения."""
+    for item in items:
+        if 'item' in item:
+            yield from walk_collection(item['item'])
+        else:
+            yield item
+
+
+def parse_captures(item):
+    """Переменные, которые тест-скрипт запроса берёт из ответа."""
+    source = '\n'.join(
+        line
+        for event in item.get('event', ())
+        for line in event.get('script', {}).get('exec', ())
+    )
+    fields = dict(CAPTURE_PATTERN.findall(source))
+    return {
+        variable: fields[local]
+        for variable, local in EXPORT_PATTERN.findall(source)
+        if local in fields
+    }
+
+
+def load_collection(path):
+    """Превращает postman-коллекцию в список шаблонов запросов."""
+    with open(path, encoding='utf-8') as collection_file:
+        collection = json.load(collection_file)
+    variables = {
+        variable['key']: variable.get('value', '')
+        for variable in collection.get('variable', ())
+    }
+    templates = []
+    for item in walk_collection(collection['item']):
+        request = item['request']
+        url = request['url']
+        auth = request.get('auth') or {}
+        token = None
+        if auth.get('type') == 'bearer':
+            token = auth['bearer'][0]['value']
+        templates.append({
+            'name': item['name'],
+            'method': request['method'],
+            'path': '/' + '/'.join(url['path']),
+            'query': '&'.join(
+                f'{param["key"]}={param["value"]}'
+                for param in url.get('query', ())
+            ),
+            'body': request.get('body', {}).get('raw'),
+            'token': token,
+            'captures': parse_captures(item),
+        })
+    return templates, variables
+
+
+def load_request_log(path):
+    """Читает журнал запросов в формате JSON Lines.
+
+    Каждая строка содержит ``method`` и ``path``, а также необязательные
+    ``body`` (JSON-объект или строка) и ``auth`` (роль из ROLE_VARIABLES,
+    от имени которой выполняется запрос). Строки без ``method`` и
+    ``path`` пропускаются, поэтому подходят и структурированные логи.
+    """
+    templates = []
+    with open(path, encoding='utf-8') as log_file:
+        for line in log_file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'method' not in record or 'path' not in record:
+                continue
+            body = record.get('body')
+            if body is not None and not isinstance(body, str):
+                body = json.dumps(body, ensure_ascii=False)
+            path, _, query = record['path'].partition('?')
+            auth = record.get('auth')
+            templates.append({
+                'name': f'{record["method"]} {path}',
+                'method': record['method'].upper(),
+                'path': path,
+                'query': query,
+                'body': body,
+                'token': f'{{{{{auth}Token}}}}' if auth else None,
+                'captures': {},
+            })
+    return templates
+
+
+def parse_users(value):
+    """Разбирает ``роль=username,...`` для опции ``--users``."""
+    users = {}
+    for pair in value.split(','):
+        role, _, username = pair.partition('=')
+        role = role.strip()
+        if role not in ROLE_VARIABLES or not username.strip():
+            raise argparse.ArgumentTypeError(
+                f'Ожидается роль=username, роли: {", ".join(ROLE_VARIABLES)}.'
+            )
+        users[role] = username.strip()
+    return users
+
+
+def collection_usernames(path):
+    """Имена пользователей ролей из переменных postman-коллекции."""
+    try:
+        _, variables = load_collection(path)
+    except OSError:
+        return {}
+    return {
+        f'{role}Username': variables[f'{role}Username']
+        for role in ROLE_VARIABLES if f'{role}Username' in variables
+    }
+
+
+def seed_role_variables(variables):
+    """Коды подтверждения и токены для пользователей коллекции.
+
+    Пользователи создаются скриптом ``set_up_data.sh``; обычный
+    пользователь регистрируется при первом прогоне коллекции.
+    """
+    for role in ROLE_VARIABLES:
+        username = variables.get(f'{role}Username')
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            continue
+        variables[f'{role}ConfirmationCode'] = (
+            default_token_generator.make_token(user)
+        )
+        variables[f'{role}Token'] = str(AccessToken.for_user(user))
+
+
+def substitute(template, variables):
+    """Подставляет значения переменных вида ``{{name}}``."""
+    if template is None:
+        return None
+    return VARIABLE_PATTERN.sub(
+        lambda match: str(variables.get(match.group(1), match.group(0))),
+        template
+    )
+
+
+class LoadStats:
+    """Потокобезопасный сборщик результатов прогона."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = Counter()
+        self.errors = Counter()
+
+    def add(self, endpoint, status, latency_ms):
+        with self.lock:
+            self.latencies[endpoint].append(latency_ms)
+            self.statuses[status] += 1
+            if status is None or status >= 500:
+                self.errors[endpoint] += 1
+
+    @property
+    def total(self):
+        return sum(self.statuses.values())
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, int(round(fraction * len(ordered))) - 1)
+    return ordered[index]
+
+
+def build_request(template, variables, base_url):
+    """Собирает URL, заголовки и тело запроса по шаблону."""
+    url = base_url.rstrip('/') + substitute(template['path'], variables)
+    query = substitute(template['query'], variables)
+    if query:
+        url = f'{url}?{query}'
+    headers = {'Content-Type': 'application/json'}
+    token = substitute(template['token'], variables)
+    if token and not VARIABLE_PATTERN.search(token):
+        headers['Authorization'] = f'Bearer {token}'
+    body = substitute(template['body'], variables)
+    return url, headers, body.encode('utf-8') if body else None
+
+
+def endpoint_label(template):
+    """Имя эндпоинта для отчёта: идентификаторы заменены на ``{id}``."""
+    path = VARIABLE_PATTERN.sub('0', template['path'])
+    return f'{template["method"]} {ID_PATTERN.sub("/{id}", path)}'
+
+
+def capture_variables(response, template, variables):
+    """Сохраняет значения из успешного ответа в переменные клиента."""
+    if not response.ok or not template['captures']:
+        return
+    try:
+        data = response.json()
+    except ValueError:
+        return
+    if not isinstance(data, dict):
+        return
+    for variable, field in template['captures'].items():
+        if isinstance(data.get(field), (str, int)):
+            variables[variable] = data[field]
+
+
+def run_worker(templates, variables, options, stats, deadline):
+    """Последовательно выполняет сценарий от имени одного клиента."""
+    session = requests.Session()
+    variables = dict(variables)
+    for _ in range(options['iterations']):
+        for template in templates:
+            if deadline and time.monotonic() > deadline:
+                return
+            url, headers, body = build_request(
+                template, variables, options['base_url']
+            )
+            started = time.perf_counter()
+            try:
+                response = session.request(
+                    template['method'], url, data=body, headers=headers,
+                    timeout=options['timeout'],
+                )
+            except requests.RequestException:
+                response = None
+            stats.add(
+                endpoint_label(template),
+                response.status_code if response is not None else None,
+                (time.perf_counter() - started) * 1000
+            )
+            if response is not None:
+                capture_variables(response, template, variables)
+
+
+class Command(BaseCommand):
+    """Нагрузочный прогон API запущенного локально сервера.
+
+    Воспроизводит postman-коллекцию или журнал запросов в несколько
+    потоков и выводит пропускную способность, долю ошибок и гистограмму
+    задержек по эндпоинтам. Ошибками считаются ответы 5xx и сбои
+    соединения: коллекция намеренно содержит запросы с ответами 4xx.
+    """
+
+    help = 'Нагрузочный прогон postman-коллекции или журнала запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--collection', default=str(DEFAULT_COLLECTION),
+            help='Путь к postman-коллекции.'
+        )
+        parser.add_argument(
+            '--log', help='Журнал запросов (JSON Lines) вместо коллекции.'
+        )
+        parser.add_argument(
+            '--users', type=parse_users, default={},
+            help='Пользователи ролей: admin=name,user=name. По умолчанию '
+                 'берутся из переменных коллекции.'
+        )
+        parser.add_argument(
+            '--base-url', default='http://127.0.0.1:8000',
+            help='Адрес запущенного сервера.'
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--iterations', type=int, default=1)
+        parser.add_argument(
+            '--duration', type=float, default=0,
+            help='Ограничение времени прогона в секундах.'
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument(
+            '--no-seed', action='store_true',
+            help='Не выпускать токены и коды подтверждения через БД.'
+        )
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency должно быть не меньше 1.')
+        if options['log']:
+            templates = load_request_log(options['log'])
+            variables = collection_usernames(options['collection'])
+        else:
+            templates, variables = load_collection(options['collection'])
+        variables.update(
+            (f'{role}Username', username)
+            for role, username in options['users'].items()
+        )
+        if not templates:
+            raise CommandError('Нет запросов для воспроизведения.')
+        if not options['no_seed']:
+            seed_role_variables(variables)
+
+        stats = LoadStats()
+        deadline = (
+            time.monotonic() + options['duration']
+            if options['duration'] else None
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            futures = [
+                pool.submit(
+                    run_worker, templates, variables, options, stats, deadline
+                )
+                for _ in range(options['concurrency'])
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+        self.report(stats, elapsed)
+
+    def report(self, stats, elapsed):
+        total = stats.total
+        if not total:
+            raise CommandError('Ни один запрос не был выполнен.')
+        errors = sum(stats.errors.values())
+        latencies = [
+            value for values in stats.latencies.values() for value in values
+        ]
+        self.stdout.write(
+            f'Запросов: {total} за {elapsed:.2f} с, '
+            f'{total / elapsed:.1f} запросов/с'
+        )
+        self.stdout.write(
+            f'Ошибки (5xx и сбои соединения): {errors} '
+            f'({errors / total:.2%})'
+        )
+        self.stdout.write('Статусы: ' + ', '.join(
+            f'{status or "error"}: {count}'
+            for status, count in sorted(
+                stats.statuses.items(), key=lambda item: item[0] or 0
+            )
+        ))
+        self.stdout.write(
+            f'Задержка, мс: p50 {percentile(latencies, 0.5):.1f}, '
+            f'p90 {percentile(latencies, 0.9):.1f}, '
+            f'p99 {percentile(latencies, 0.99):.1f}, '
+            f'max {max(latencies):.1f}'
+        )
+        self.stdout.write('Гистограмма задержек:')
+        lower = 0
+        width = 40
+        for upper in LATENCY_BUCKETS_MS + (float('inf'),):
+            count = sum(1 for value in latencies if lower <= value < upper)
+            bar = '#' * round(width * count / len(latencies))
+            label = f'< {upper}' if upper != float('inf') else f'>= {lower}'
+            self.stdout.write(f'  {label:>8} мс {count:>7} {bar}')
+            lower = upper
+        self.stdout.write('По эндпоинтам (запросов, ошибок, p50, p99, мс):')
+        for endpoint, values in sorted(stats.latencies.items()):
+            self.stdout.write(
+                f'  {endpoint:<55} {len(values):>6} '
+                f'{stats.errors[endpoint]:>5} '
+                f'{statistics.median(values):>8.1f} '
+                f'{percentile(values, 0.99):>8.1f}'
+            )
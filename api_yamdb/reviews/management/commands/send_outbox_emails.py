@@ -0,0 +1,59 @@
+"""Отправка писем из очереди исходящих."""
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from api.outbox import purge_sent, send_outbox
+
+
+class Command(BaseCommand):
+    """Рассылает письма из ``OutboxEmail`` пачками.
+
+    Неудачные письма повторяются с экспоненциальной задержкой и после
+    ``--max-attempts`` попыток помечаются как неотправленные. Рассчитан
+    на один запущенный экземпляр.
+    """
+
+    help = 'Отправляет письма из очереди исходящих.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100),
+            help='Писем за одно соединение с почтовым сервером.'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int,
+            default=getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5),
+            help='Попыток отправки одного письма.'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, опрашивая очередь.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза между опросами пустой очереди, секунд.'
+        )
+        parser.add_argument(
+            '--keep-days', type=int, default=7,
+            help='Сколько дней хранить отправленные письма.'
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_sent(options['keep_days'])
+        if purged:
+            self.stdout.write(f'Удалено отправленных писем: {purged}.')
+        while True:
+            sent, failed = send_outbox(
+                options['batch_size'], options['max_attempts']
+            )
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено: {sent}, ошибок: {failed}.'
+                )
+            if not options['loop']:
+                break
+            if sent + failed < options['batch_size']:
+                time.sleep(options['interval'])
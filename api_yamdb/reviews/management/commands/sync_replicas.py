@@ -0,0 +1,57 @@
+"""Копирование БД SQLite в файлы реплик."""
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+from api.routers import PRIMARY
+
+
+def sync_replica(alias):
+    """Копирует primary в реплику через backup API SQLite.
+
+    Копия снимается с согласованного состояния primary, читатели
+    реплики видят либо старую, либо новую версию целиком.
+    """
+    source = connections[PRIMARY]
+    target = connections[alias]
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
+
+
+class Command(BaseCommand):
+    """Обновляет реплики SQLite из ``DATABASE_REPLICAS``.
+
+    Для PostgreSQL используйте встроенную репликацию сервера.
+    """
+
+    help = 'Копирует основную БД SQLite в реплики.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять копирование с этим интервалом, секунд.'
+        )
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not replicas:
+            raise CommandError('Реплики не заданы (DB_REPLICAS).')
+        if connections[PRIMARY].vendor != 'sqlite':
+            raise CommandError(
+                'Команда копирует только SQLite; для PostgreSQL '
+                'настройте репликацию сервера.'
+            )
+        while True:
+            started = time.perf_counter()
+            for alias in replicas:
+                sync_replica(alias)
+            self.stdout.write(
+                f'Реплик обновлено: {len(replicas)} за '
+                f'{(time.perf_counter() - started) * 1000:.1f} мс.'
+            )
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-19 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_alter_title_year'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата записи')),
+                ('duration_ms', models.FloatField(verbose_name='Длительность, мс')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.TextField(blank=True, verbose_name='Параметры SQL')),
+                ('plan', models.TextField(blank=True, verbose_name='План выполнения')),
+                ('view', models.CharField(blank=True, max_length=256, verbose_name='Маршрут')),
+                ('method', models.CharField(blank=True, max_length=10, verbose_name='Метод')),
+                ('path', models.TextField(blank=True, verbose_name='Адрес запроса')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,148 @@
+# Generated by Django 3.2 on 2026-10-19 08:25
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+# Сумма оценок, число отзывов и рейтинг в карточке меняются вместе
+# с отзывами; триггер не добавляет запросов в пути записи отзыва.
+SUBTRACT_OLD = '''
+    UPDATE reviews_titlecard SET
+        score_total = score_total - OLD.score,
+        review_count = review_count - 1,
+        rating = CASE WHEN review_count > 1
+            THEN CAST(score_total - OLD.score AS DOUBLE PRECISION) / (review_count - 1)
+        END
+    WHERE title_id = OLD.title_id;
+'''
+ADD_NEW = '''
+    UPDATE reviews_titlecard SET
+        score_total = score_total + NEW.score,
+        review_count = review_count + 1,
+        rating = CAST(score_total + NEW.score AS DOUBLE PRECISION) / (review_count + 1)
+    WHERE title_id = NEW.title_id;
+'''
+REVIEW_TRIGGERS = {
+    'sqlite': (
+        'CREATE TRIGGER reviews_titlecard_review_insert '
+        f'AFTER INSERT ON reviews_review BEGIN {ADD_NEW} END',
+        'CREATE TRIGGER reviews_titlecard_review_delete '
+        f'AFTER DELETE ON reviews_review BEGIN {SUBTRACT_OLD} END',
+        'CREATE TRIGGER reviews_titlecard_review_update '
+        'AFTER UPDATE OF score, title_id ON reviews_review '
+        f'BEGIN {SUBTRACT_OLD} {ADD_NEW} END',
+    ),
+    'postgresql': (
+        'CREATE OR REPLACE FUNCTION reviews_titlecard_review() '
+        'RETURNS trigger AS $$ BEGIN '
+        f"IF TG_OP <> 'INSERT' THEN {SUBTRACT_OLD} END IF; "
+        f"IF TG_OP <> 'DELETE' THEN {ADD_NEW} END IF; "
+        'RETURN NULL; END; $$ LANGUAGE plpgsql',
+        'CREATE TRIGGER reviews_titlecard_review '
+        'AFTER INSERT OR DELETE OR UPDATE OF score, title_id '
+        'ON reviews_review FOR EACH ROW '
+        'EXECUTE PROCEDURE reviews_titlecard_review()',
+    ),
+}
+DROP_REVIEW_TRIGGERS = {
+    'sqlite': (
+        'DROP TRIGGER IF EXISTS reviews_titlecard_review_insert',
+        'DROP TRIGGER IF EXISTS reviews_titlecard_review_delete',
+        'DROP TRIGGER IF EXISTS reviews_titlecard_review_update',
+    ),
+    'postgresql': (
+        'DROP TRIGGER IF EXISTS reviews_titlecard_review ON reviews_review',
+        'DROP FUNCTION IF EXISTS reviews_titlecard_review()',
+    ),
+}
+
+
+def create_review_triggers(apps, schema_editor):
+    for sql in REVIEW_TRIGGERS.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql, params=None)
+
+
+def drop_review_triggers(apps, schema_editor):
+    for sql in DROP_REVIEW_TRIGGERS.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql, params=None)
+
+
+def backfill_title_cards(apps, schema_editor):
+    """Карточки для уже существующих произведений."""
+    Title = apps.get_model('reviews', 'Title')
+    TitleCard = apps.get_model('reviews', 'TitleCard')
+    titles = Title.objects.select_related('category').annotate(
+        score_sum=Sum('reviews__score'), reviews_number=Count('reviews')
+    ).order_by('pk')
+    cards = []
+    for title in titles.iterator(chunk_size=500):
+        genres = [
+            {'name': genre.name, 'slug': genre.slug}
+            for genre in title.genre.order_by('name')
+        ]
+        cards.append(TitleCard(
+            title_id=title.pk,
+            name=title.name,
+            year=title.year,
+            description=title.description,
+            category_id=title.category_id,
+            category_name=title.category.name,
+            category_slug=title.category.slug,
+            genres=genres,
+            genre_slugs=','.join(
+                ['', *(genre['slug'] for genre in genres), '']
+            ),
+            score_total=title.score_sum or 0,
+            review_count=title.reviews_number,
+            rating=(
+                title.score_sum / title.reviews_number
+                if title.reviews_number else None
+            ),
+        ))
+    TitleCard.objects.bulk_create(cards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleCard',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('name', models.CharField(max_length=256, verbose_name='Название')),
+                ('year', models.SmallIntegerField(db_index=True, verbose_name='Год выпуска')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Описание')),
+                ('category_name', models.CharField(max_length=256, verbose_name='Название категории')),
+                ('category_slug', models.SlugField(verbose_name='Слаг категории')),
+                ('genres', models.JSONField(default=list, verbose_name='Жанры')),
+                ('genre_slugs', models.TextField(default=',', help_text='Через запятую, с запятыми по краям: ,drama,comedy,', verbose_name='Слаги жанров')),
+                ('score_total', models.IntegerField(default=0, verbose_name='Сумма оценок')),
+                ('review_count', models.IntegerField(default=0, verbose_name='Число отзывов')),
+                ('rating', models.FloatField(blank=True, null=True, verbose_name='Рейтинг')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'Карточка произведения',
+                'verbose_name_plural': 'Карточки произведений',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titlecard',
+            index=models.Index(fields=['name'], name='titlecard_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlecard',
+            index=models.Index(fields=['category_slug', 'name'], name='titlecard_category_name_idx'),
+        ),
+        migrations.RunPython(
+            create_review_triggers, drop_review_triggers
+        ),
+        migrations.RunPython(
+            backfill_title_cards, migrations.RunPython.noop
+        ),
+    ]
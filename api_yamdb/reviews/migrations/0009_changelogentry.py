@@ -0,0 +1,209 @@
+# Generated by Django 3.2 on 2026-10-19 08:32
+
+from django.db import migrations, models
+
+# Журнал изменений ведут триггеры: так в него попадают и записи
+# в обход сигналов (queryset.update/delete), а запись отзыва
+# не получает лишних запросов со стороны Django.
+NOW = {
+    'sqlite': "strftime('%Y-%m-%d %H:%M:%f', 'now')",
+    'postgresql': 'now()',
+}
+
+# Таблица, модель, ключ в API, произведение, отзыв, колонки,
+# изменение которых попадает в журнал.
+TABLES = (
+    ('reviews_user', 'user', 'username', 'NULL', 'NULL',
+     'username, email, first_name, last_name, bio, role'),
+    ('reviews_category', 'category', 'slug', 'NULL', 'NULL', 'name, slug'),
+    ('reviews_genre', 'genre', 'slug', 'NULL', 'NULL', 'name, slug'),
+    ('reviews_title', 'title', 'id', '{row}.id', 'NULL',
+     'name, year, description, category_id'),
+    ('reviews_review', 'review', 'id', '{row}.title_id', 'NULL',
+     'text, score, author_id, pub_date'),
+    ('reviews_comment', 'comment', 'id',
+     '(SELECT title_id FROM reviews_review WHERE id = {row}.review_id)',
+     '{row}.review_id', 'text, author_id, pub_date'),
+)
+
+
+def log(model, key, action, title='NULL', review='NULL', tail=''):
+    return (
+        'INSERT INTO reviews_changelogentry '
+        '(model, object_id, action, title_id, review_id, changed_at) '
+        f"SELECT '{model}', CAST({key} AS TEXT), '{action}', "
+        f'{title}, {review}, {{now}}{tail}'
+    )
+
+
+def title_updated(title_id, tail=''):
+    """Произведение меняется вместе с рейтингом, жанрами и категорией."""
+    return log('title', title_id, 'updated', title_id, tail=tail)
+
+
+# Статементы триггеров: таблица -> операция -> список SQL.
+STATEMENTS = {}
+for table, model, key, title, review, columns in TABLES:
+    new, old = (
+        {'title': title.format(row=row), 'review': review.format(row=row)}
+        for row in ('NEW', 'OLD')
+    )
+    STATEMENTS[table] = {
+        'INSERT': [log(model, f'NEW.{key}', 'created', **new)],
+        'DELETE': [log(model, f'OLD.{key}', 'deleted', **old)],
+        'UPDATE': [log(model, f'NEW.{key}', 'updated', **new)],
+    }
+    if key != 'id':
+        # Смена ключа: клиент должен удалить объект под старым ключом.
+        STATEMENTS[table]['UPDATE'].insert(0, log(
+            model, f'OLD.{key}', 'deleted', **old,
+            tail=f' WHERE OLD.{key} <> NEW.{key}'
+        ))
+STATEMENTS['reviews_review']['INSERT'].append(title_updated('NEW.title_id'))
+STATEMENTS['reviews_review']['DELETE'].append(title_updated('OLD.title_id'))
+STATEMENTS['reviews_review']['UPDATE'].append(title_updated(
+    'NEW.title_id', ' WHERE OLD.score <> NEW.score'
+))
+STATEMENTS['reviews_genre']['UPDATE'].append(title_updated(
+    'title_id', ' FROM reviews_title_genre WHERE genre_id = NEW.id'
+))
+STATEMENTS['reviews_category']['UPDATE'].append(title_updated(
+    'id', ' FROM reviews_title WHERE category_id = NEW.id'
+))
+# Отзывы и комментарии показывают автора по username.
+RENAMED = ' AND OLD.username <> NEW.username'
+STATEMENTS['reviews_user']['UPDATE'] += [
+    log('review', 'id', 'updated', 'title_id', tail=(
+        ' FROM reviews_review WHERE author_id = NEW.id' + RENAMED
+    )),
+    log('comment', 'comment.id', 'updated', 'review.title_id',
+        'comment.review_id', tail=(
+            ' FROM reviews_comment comment JOIN reviews_review review '
+            'ON review.id = comment.review_id '
+            'WHERE comment.author_id = NEW.id' + RENAMED
+        )),
+]
+STATEMENTS['reviews_title_genre'] = {
+    'INSERT': [title_updated('NEW.title_id')],
+    'DELETE': [title_updated('OLD.title_id')],
+}
+UPDATE_COLUMNS = {table: columns for table, *_, columns in TABLES}
+
+
+def sqlite_triggers():
+    for table, operations in STATEMENTS.items():
+        for operation, statements in operations.items():
+            event = operation
+            if operation == 'UPDATE':
+                event += f' OF {UPDATE_COLUMNS[table]}'
+            body = '; '.join(statements).format(now=NOW['sqlite'])
+            yield (
+                f'CREATE TRIGGER {table}_changelog_{operation.lower()} '
+                f'AFTER {event} ON {table} FOR EACH ROW BEGIN {body}; END'
+            )
+
+
+# PostgreSQL выдаёт id при INSERT, а фиксирует транзакции в другом
+# порядке. Транзакция перед первой записью в журнал берёт разделяемую
+# advisory-блокировку с ключом, равным текущему значению
+# последовательности: все её id больше ключа. Лента отдаёт только id
+# меньше ключей удерживаемых блокировок (api.changes.feed_watermark).
+HOLD_FUNCTION = (
+    'CREATE OR REPLACE FUNCTION reviews_changelog_hold() '
+    'RETURNS void AS $$ BEGIN '
+    "IF current_setting('reviews.changelog_hold', true) "
+    'IS DISTINCT FROM txid_current()::text THEN '
+    'PERFORM pg_advisory_xact_lock_shared(last_value) '
+    'FROM reviews_changelogentry_id_seq; '
+    "PERFORM set_config('reviews.changelog_hold', "
+    'txid_current()::text, true); '
+    'END IF; END; $$ LANGUAGE plpgsql'
+)
+
+
+def postgresql_triggers():
+    yield HOLD_FUNCTION
+    for table, operations in STATEMENTS.items():
+        branches = ' '.join(
+            f"IF TG_OP = '{operation}' THEN "
+            f"{'; '.join(statements).format(now=NOW['postgresql'])}; "
+            'END IF;'
+            for operation, statements in operations.items()
+        )
+        yield (
+            f'CREATE OR REPLACE FUNCTION {table}_changelog() '
+            'RETURNS trigger AS $$ BEGIN PERFORM reviews_changelog_hold(); '
+            f'{branches} RETURN NULL; END; $$ '
+            'LANGUAGE plpgsql'
+        )
+        events = ' OR '.join(
+            f'UPDATE OF {UPDATE_COLUMNS[table]}' if operation == 'UPDATE'
+            else operation
+            for operation in operations
+        )
+        yield (
+            f'CREATE TRIGGER {table}_changelog AFTER {events} ON {table} '
+            f'FOR EACH ROW EXECUTE PROCEDURE {table}_changelog()'
+        )
+
+
+def drop_triggers(vendor):
+    for table, operations in STATEMENTS.items():
+        if vendor == 'sqlite':
+            for operation in operations:
+                yield (
+                    'DROP TRIGGER IF EXISTS '
+                    f'{table}_changelog_{operation.lower()}'
+                )
+        elif vendor == 'postgresql':
+            yield f'DROP TRIGGER IF EXISTS {table}_changelog ON {table}'
+            yield f'DROP FUNCTION IF EXISTS {table}_changelog()'
+    if vendor == 'postgresql':
+        yield 'DROP FUNCTION IF EXISTS reviews_changelog_hold()'
+
+
+def create_change_triggers(apps, schema_editor):
+    triggers = {
+        'sqlite': sqlite_triggers, 'postgresql': postgresql_triggers,
+    }.get(schema_editor.connection.vendor)
+    for sql in triggers() if triggers else ():
+        schema_editor.execute(sql, params=None)
+
+
+def drop_change_triggers(apps, schema_editor):
+    for sql in drop_triggers(schema_editor.connection.vendor):
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_titlecard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=16, verbose_name='Модель')),
+                ('object_id', models.CharField(max_length=150, verbose_name='Объект')),
+                ('action', models.CharField(choices=[('created', 'created'), ('updated', 'updated'), ('deleted', 'deleted')], max_length=10, verbose_name='Действие')),
+                ('title_id', models.BigIntegerField(blank=True, null=True, verbose_name='Произведение')),
+                ('review_id', models.BigIntegerField(blank=True, null=True, verbose_name='Отзыв')),
+                ('changed_at', models.DateTimeField(db_index=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение',
+                'verbose_name_plural': 'Журнал изменений',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['model', 'object_id', 'id'], name='changelog_object_idx'),
+        ),
+        migrations.RunPython(
+            create_change_triggers, drop_change_triggers
+        ),
+    ]
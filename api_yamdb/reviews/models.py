@@ -3,7 +3,7 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import (
     MaxValueValidator, MinValueValidator
 )
-from django.db import models
+from django.db import models, router, transaction
 
 from .constants import (
     TEXT_FIELD_LENGTH, SLUG_FIELD_LENGTH,
@@ -59,6 +59,11 @@ class User(AbstractUser):
         max_length=ROLE_MAX_LENGTH,
         verbose_name='Роль пользователя',
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Версия токенов',
+        help_text='Увеличивается при смене прав; старые токены отклоняются.',
+    )
 
     @property
     def is_admin(self):
@@ -77,7 +82,26 @@ class User(AbstractUser):
         return self.username
 
 
-class Genre(models.Model):
+class CardSourceModel(models.Model):
+    """Модель, поля которой копируются в карточки произведений.
+
+    ``save()`` выполняется в одной транзакции с обработчиками
+    ``post_save``, которые обновляют ``TitleCard``: если карточку
+    обновить не удалось, запись тоже откатывается.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class Genre(CardSourceModel):
     """Жанры произведений."""
 
     name = models.CharField('Название', max_length=TEXT_FIELD_LENGTH)
@@ -94,7 +118,7 @@ class Genre(models.Model):
         return self.name
 
 
-class Category(models.Model):
+class Category(CardSourceModel):
     """Категории произведений."""
 
     name = models.CharField('Название', max_length=TEXT_FIELD_LENGTH)
@@ -111,7 +135,7 @@ class Category(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class Title(CardSourceModel):
     """Произведения."""
 
     name = models.CharField('Название', max_length=TEXT_FIELD_LENGTH)
@@ -139,6 +163,62 @@ class Title(models.Model):
         return self.name
 
 
+class TitleCard(models.Model):
+    """Карточка произведения для списка: все поля в одной строке.
+
+    Поля произведения, категории и жанров обновляют сигналы
+    ``api.cards``, сумму оценок, число отзывов и рейтинг — триггеры БД
+    на таблице отзывов. Пересобрать карточки можно командой
+    ``rebuild_title_cards``.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='card',
+        verbose_name='Произведение'
+    )
+    name = models.CharField('Название', max_length=TEXT_FIELD_LENGTH)
+    year = models.SmallIntegerField('Год выпуска', db_index=True)
+    description = models.TextField('Описание', blank=True, null=True)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Категория'
+    )
+    category_name = models.CharField(
+        'Название категории', max_length=TEXT_FIELD_LENGTH
+    )
+    category_slug = models.SlugField(
+        'Слаг категории', max_length=SLUG_FIELD_LENGTH
+    )
+    genres = models.JSONField('Жанры', default=list)
+    genre_slugs = models.TextField(
+        'Слаги жанров', default=',',
+        help_text='Через запятую, с запятыми по краям: ,drama,comedy,'
+    )
+    score_total = models.IntegerField('Сумма оценок', default=0)
+    review_count = models.IntegerField('Число отзывов', default=0)
+    rating = models.FloatField('Рейтинг', blank=True, null=True)
+
+    class Meta:
+        ordering = ('name',)
+        verbose_name = 'Карточка произведения'
+        verbose_name_plural = 'Карточки произведений'
+        indexes = [
+            models.Index(fields=('name',), name='titlecard_name_idx'),
+            models.Index(
+                fields=('category_slug', 'name'),
+                name='titlecard_category_name_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
 class Review(models.Model):
     title = models.ForeignKey(
         Title,
@@ -175,6 +255,12 @@ class Review(models.Model):
                 name='unique_review'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date'),
+                name='review_title_pub_date_idx'
+            )
+        ]
         ordering = ('pub_date',)
 
     def __str__(self):
@@ -204,7 +290,166 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date'),
+                name='comment_review_pub_date_idx'
+            )
+        ]
         ordering = ('-pub_date',)
 
     def __str__(self):
         return self.author
+
+
+class SlowQuery(models.Model):
+    """Медленный SQL-запрос с планом выполнения."""
+
+    created = models.DateTimeField(
+        'Дата записи', auto_now_add=True, db_index=True
+    )
+    duration_ms = models.FloatField('Длительность, мс')
+    sql = models.TextField('SQL')
+    params = models.TextField('Параметры SQL', blank=True)
+    plan = models.TextField('План выполнения', blank=True)
+    view = models.CharField(
+        'Маршрут', max_length=TEXT_FIELD_LENGTH, blank=True
+    )
+    method = models.CharField('Метод', max_length=10, blank=True)
+    path = models.TextField('Адрес запроса', blank=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+
+    def __str__(self):
+        return f'{self.duration_ms:.1f} мс: {self.sql[:50]}'
+
+
+class IssuedToken(models.Model):
+    """Выданный токен доступа, который может понадобиться отозвать."""
+
+    jti = models.CharField('Идентификатор токена', max_length=64, unique=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='issued_tokens',
+        verbose_name='Пользователь',
+    )
+    expires_at = models.DateTimeField('Истекает', db_index=True)
+
+    class Meta:
+        verbose_name = 'Выданный токен'
+        verbose_name_plural = 'Выданные токены'
+
+    def __str__(self):
+        return self.jti
+
+
+class RevokedToken(models.Model):
+    """Отозванный токен доступа."""
+
+    jti = models.CharField('Идентификатор токена', max_length=64, unique=True)
+    expires_at = models.DateTimeField('Истекает', db_index=True)
+    revoked_at = models.DateTimeField('Дата отзыва', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-revoked_at',)
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+
+    def __str__(self):
+        return self.jti
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, PENDING),
+        (SENT, SENT),
+        (FAILED, FAILED),
+    ]
+
+    recipient = models.EmailField('Получатель', max_length=EMAIL_MAX_LENGTH)
+    subject = models.CharField('Тема', max_length=TEXT_FIELD_LENGTH)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=EMAIL_MAX_LENGTH)
+    status = models.CharField(
+        'Статус', choices=STATUS_CHOICES, default=PENDING, max_length=10
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField('Следующая попытка')
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    sent_at = models.DateTimeField('Дата отправки', blank=True, null=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Исходящие письма'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipient', 'subject'),
+                condition=models.Q(status='pending'),
+                name='unique_pending_email'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbox_status_next_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+
+class ChangeLogEntry(models.Model):
+    """Изменение объекта API для синхронизации клиентов.
+
+    Записи добавляют триггеры БД (миграция ``0009_changelogentry``)
+    на создание, изменение и удаление пользователей, категорий, жанров,
+    произведений, отзывов и комментариев. ``object_id`` — значение,
+    по которому объект ищется в API: ``username``, ``slug`` или ``id``.
+    """
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+    ACTION_CHOICES = [
+        (CREATED, CREATED),
+        (UPDATED, UPDATED),
+        (DELETED, DELETED),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField('Модель', max_length=16)
+    object_id = models.CharField('Объект', max_length=NAME_MAX_LENGTH)
+    action = models.CharField(
+        'Действие', choices=ACTION_CHOICES, max_length=10
+    )
+    title_id = models.BigIntegerField('Произведение', blank=True, null=True)
+    review_id = models.BigIntegerField('Отзыв', blank=True, null=True)
+    changed_at = models.DateTimeField('Дата изменения', db_index=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = [
+            models.Index(
+                fields=('model', 'object_id', 'id'),
+                name='changelog_object_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}: {self.action}'
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
+import pytest
+
+from api.metrics import collect, registry
+from reviews.models import SlowQuery
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08Instrumentation:
+
+    TITLES_URL = '/api/v1/titles/'
+    METRICS_URL = '/metrics'
+
+    def test_01_server_timing_header(self, admin_client, client):
+        create_titles(admin_client)
+        response = client.get(self.TITLES_URL)
+        header = response.get('Server-Timing')
+        assert header, (
+            f'Проверьте, что ответ на GET-запрос к `{self.TITLES_URL}` '
+            'содержит заголовок `Server-Timing`.'
+        )
+        metrics = {
+            metric.split(';')[0].strip() for metric in header.split(',')
+        }
+        for name in ('db', 'ser', 'perm', 'view', 'total'):
+            assert name in metrics, (
+                f'Проверьте, что заголовок `Server-Timing` содержит '
+                f'метрику `{name}`.'
+            )
+        assert 'queries"' in header, (
+            'Проверьте, что метрика `db` заголовка `Server-Timing` содержит '
+            'количество SQL-запросов.'
+        )
+
+    def test_02_structured_log(self, client, caplog):
+        with caplog.at_level(logging.INFO, logger='api.timing'):
+            client.get(self.TITLES_URL)
+        records = [
+            json.loads(record.getMessage())
+            for record in caplog.records if record.name == 'api.timing'
+        ]
+        assert records, (
+            'Проверьте, что замеры запроса пишутся в лог `api.timing`.'
+        )
+        record = records[-1]
+        assert record['view'] == 'titles-list'
+        assert record['status'] == 200
+        assert record['db_queries'] >= 1
+        assert 'total_ms' in record
+
+    def test_03_metrics_endpoint(self, client, admin_client, settings):
+        settings.METRICS_ALLOWED_IPS = ('127.0.0.1',)
+        client.get(self.TITLES_URL)
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.METRICS_URL}` с разрешённого '
+            'адреса возвращает ответ со статусом 200.'
+        )
+        body = response.content.decode()
+        assert response['Content-Type'].startswith('text/plain')
+        assert (
+            'yamdb_http_requests_total{method="GET",status="200",'
+            'view="titles-list"}'
+        ) in body, (
+            'Проверьте, что метрики запросов подписаны именем маршрута '
+            'и методом.'
+        )
+        assert 'yamdb_http_request_duration_seconds_bucket{' in body
+        assert 'yamdb_db_queries_per_request_count{' in body
+
+        settings.METRICS_ALLOWED_IPS = ()
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что `{self.METRICS_URL}` недоступен анонимному '
+            'пользователю с неразрешённого адреса.'
+        )
+        response = admin_client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.METRICS_URL}` доступен администратору.'
+        )
+
+    def test_04_slow_query_log(self, admin_client, client, settings):
+        create_titles(admin_client)
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        settings.SLOW_QUERY_LOG_SIZE = 3
+        client.get(self.TITLES_URL, {'year': 1984})
+        client.get(self.TITLES_URL, {'year': 1984})
+        entries = list(SlowQuery.objects.all())
+        assert len(entries) == 3, (
+            'Проверьте, что журнал медленных запросов хранит не более '
+            '`SLOW_QUERY_LOG_SIZE` записей.'
+        )
+        entry = entries[0]
+        assert entry.view == 'titles-list'
+        assert 'year=1984' in entry.path
+        assert any('reviews_title' in entry.plan for entry in entries), (
+            'Проверьте, что для медленного запроса сохраняется план '
+            'выполнения `EXPLAIN QUERY PLAN`.'
+        )
+
+    def test_05_metrics_token(self, client, settings):
+        settings.METRICS_ALLOWED_IPS = ()
+        settings.METRICS_TOKEN = 'scrape-secret'
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что `{self.METRICS_URL}` не доступен с loopback '
+            'без явного списка адресов: за прокси это любой клиент.'
+        )
+        for token, expected in (
+            ('wrong', HTTPStatus.UNAUTHORIZED),
+            ('scrape-secret', HTTPStatus.OK),
+        ):
+            response = client.get(
+                self.METRICS_URL, HTTP_AUTHORIZATION=f'Bearer {token}'
+            )
+            assert response.status_code == expected, (
+                f'Проверьте доступ к `{self.METRICS_URL}` по '
+                '`METRICS_TOKEN`.'
+            )
+
+    def test_06_dead_worker_files_removed(self, settings, tmp_path):
+        settings.METRICS_DIR = tmp_path
+        worker = subprocess.Popen([sys.executable, '-c', ''])
+        worker.wait()
+        dead = tmp_path / f'{worker.pid}.json'
+        dead.write_text(json.dumps([
+            ['yamdb_http_requests_total', [['view', 'dead']], 1]
+        ]), encoding='utf-8')
+        merged = collect()
+        assert not [key for key in merged if ('view', 'dead') in key[1]], (
+            'Проверьте, что метрики завершившегося воркера не суммируются.'
+        )
+        assert not dead.exists(), (
+            'Проверьте, что файл завершившегося воркера удаляется.'
+        )
+        assert (tmp_path / f'{os.getpid()}.json').exists()
+        registry.remove()
+        assert not (tmp_path / f'{os.getpid()}.json').exists()
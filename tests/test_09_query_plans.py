@@ -0,0 +1,223 @@
+import json
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from tests.utils import create_comments
+
+SCAN_PATTERN = re.compile(
+    r'SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?'
+)
+SEARCH_PATTERN = re.compile(
+    r'SEARCH (?:TABLE )?(\w+)(?: AS \w+)? USING (?:COVERING )?INDEX (\w+)'
+)
+
+
+def index_name(table, columns):
+    """Имя индекса таблицы, построенного ровно по указанным колонкам.
+
+    Учитываются и автоматические индексы SQLite для UNIQUE-полей.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA index_list({table})')
+        for name in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'PRAGMA index_info({name})')
+            if tuple(row[2] for row in cursor.fetchall()) == columns:
+                return name
+    raise AssertionError(
+        f'В таблице `{table}` нет индекса по колонкам {columns}.'
+    )
+
+
+def capture_plans(client, url):
+    """Планы выполнения всех SELECT-запросов, выполненных для url."""
+    statements = []
+
+    def capture(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом 200.'
+    )
+    plans = []
+    with connection.cursor() as cursor:
+        for sql, params in statements:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plans.append((sql, [row[3] for row in cursor.fetchall()]))
+    return plans
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Планы снимаются для SQLite.'
+)
+@pytest.mark.django_db(transaction=True)
+class Test09QueryPlans:
+    """Списки и фильтры API должны использовать индексы.
+
+    Для каждого сценария указаны индексы, которые обязаны встретиться
+    в планах, и таблицы, полный просмотр которых допустим (например,
+    сам список произведений, фильтры ``icontains`` по названию
+    и по слагам жанров в карточке или регистронезависимый поиск
+    пользователя).
+    Новый фильтр или сортировка, приводящие к полному просмотру другой
+    таблицы, уронят тест.
+    """
+
+    USERS = ('reviews_user',)
+    TITLES = ('reviews_titlecard',)
+
+    @pytest.fixture
+    def data(self, admin_client, admin, user_client, user,
+             moderator_client, moderator):
+        authors_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        }
+        _, reviews, titles = create_comments(admin_client, authors_map)
+        return {
+            'title_id': titles[0]['id'],
+            'review_id': reviews[0]['id'],
+            'year': titles[0]['year'],
+            'genre': titles[0]['genre'][0],
+            'category': titles[0]['category'],
+            'name': titles[0]['name'],
+            'username': user.username,
+        }
+
+    def cases(self, data):
+        return (
+            (
+                '/api/v1/titles/',
+                (), self.TITLES
+            ),
+            (
+                '/api/v1/titles/?year={year}',
+                (('reviews_titlecard', ('year',)),), ()
+            ),
+            (
+                '/api/v1/titles/?genre={genre}',
+                (), self.TITLES
+            ),
+            (
+                '/api/v1/titles/?category={category}',
+                (('reviews_titlecard', ('category_slug', 'name')),), ()
+            ),
+            (
+                '/api/v1/titles/?name={name}',
+                (), self.TITLES
+            ),
+            (
+                '/api/v1/titles/{title_id}/reviews/',
+                (('reviews_review', ('title_id', 'pub_date')),), ()
+            ),
+            (
+                '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+                (('reviews_comment', ('review_id', 'pub_date')),), ()
+            ),
+            (
+                '/api/v1/genres/',
+                (), ('reviews_genre',)
+            ),
+            (
+                '/api/v1/categories/',
+                (), ('reviews_category',)
+            ),
+            (
+                '/api/v1/users/',
+                (), self.USERS
+            ),
+            (
+                '/api/v1/users/?search={username}',
+                (), self.USERS
+            ),
+        )
+
+    def test_01_list_endpoints_use_indexes(self, admin_client, data):
+        for url, expected_indexes, allowed_scans in self.cases(data):
+            url = url.format(**data)
+            plans = capture_plans(admin_client, url)
+            details = [line for _, plan in plans for line in plan]
+            used_indexes = {
+                match.group(2)
+                for line in details
+                for match in (
+                    SEARCH_PATTERN.search(line), SCAN_PATTERN.search(line)
+                )
+                if match and match.group(2)
+            }
+            for table, columns in expected_indexes:
+                name = index_name(table, columns)
+                assert name in used_indexes, (
+                    f'Проверьте, что запрос к `{url}` использует индекс '
+                    f'`{table}({", ".join(columns)})`. Планы: {details}'
+                )
+            tables = connection.introspection.table_names()
+            for line in details:
+                match = SCAN_PATTERN.search(line)
+                if match is None or match.group(1) not in tables:
+                    continue
+                assert match.group(1) in allowed_scans, (
+                    f'Запрос к `{url}` полностью просматривает таблицу '
+                    f'`{match.group(1)}`. Добавьте индекс или пересмотрите '
+                    f'фильтр/сортировку. Планы: {details}'
+                )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09IndexAdvisor:
+
+    REVIEW_SQL = (
+        'SELECT "reviews_review"."id" FROM "reviews_review" '
+        'WHERE "reviews_review"."{column}" = %s '
+        'ORDER BY "reviews_review"."pub_date" ASC'
+    )
+
+    def test_01_advise_indexes(self, tmp_path):
+        log = tmp_path / 'queries.jsonl'
+        log.write_text('\n'.join(
+            json.dumps({'sql': self.REVIEW_SQL.format(column=column),
+                        'duration_ms': 2})
+            for column in ('title_id', 'author_id', 'author_id')
+        ))
+        out = StringIO()
+        call_command('advise_indexes', str(log), stdout=out)
+        output = out.getvalue()
+        assert 'reviews_review(author_id, pub_date): запросов 2' in output, (
+            'Проверьте, что `advise_indexes` предлагает составной индекс '
+            'для условий и сортировки без подходящего индекса.'
+        )
+        assert 'reviews_review(title_id, pub_date)' not in output, (
+            'Проверьте, что `advise_indexes` не предлагает уже '
+            'существующие индексы.'
+        )
+        assert "fields=['author', 'pub_date']" in output
+        assert 'migrations.AddIndex(' in output
+
+    def test_02_auto_created_through_reported(self, tmp_path):
+        log = tmp_path / 'queries.jsonl'
+        log.write_text(json.dumps({
+            'sql': (
+                'SELECT "reviews_title_genre"."genre_id" '
+                'FROM "reviews_title_genre" '
+                'WHERE "reviews_title_genre"."title_id" = %s '
+                'ORDER BY "reviews_title_genre"."id" ASC'
+            ),
+            'duration_ms': 2,
+        }))
+        out = StringIO()
+        call_command('advise_indexes', str(log), stdout=out)
+        output = out.getvalue()
+        assert 'reviews_title_genre(title_id, id)' in output
+        assert 'покрывают нагрузку' not in output
+        assert 'migrations.AddIndex(' not in output, (
+            'Проверьте, что `advise_indexes` не создаёт AddIndex для '
+            'автоматической промежуточной модели M2M.'
+        )
@@ -0,0 +1,278 @@
+import sqlite3
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.revocation import revocation_list, revoke_user_tokens
+from api.throttling import bucket_store
+from reviews.models import IssuedToken, RevokedToken
+
+
+def user_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return [
+        query['sql'] for query in context.captured_queries
+        if '"reviews_user"' in query['sql']
+    ]
+
+
+def role_token_client(client, user):
+    response = client.post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == HTTPStatus.OK
+    role_client = APIClient()
+    role_client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+    )
+    return role_client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Authentication:
+
+    CATEGORIES_URL = '/api/v1/categories/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_cached_principal(self, user_client):
+        user_queries(user_client, self.CATEGORIES_URL)
+        queries = user_queries(user_client, self.CATEGORIES_URL)
+        assert not queries, (
+            'Проверьте, что повторный запрос с тем же токеном не загружает '
+            f'пользователя из БД. Запросы: {queries}'
+        )
+
+    def test_02_role_change_invalidates_cache(self, admin_client,
+                                              user_client, user):
+        data = {'name': 'Фильм', 'slug': 'films'}
+        response = user_client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        response = user_client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что смена роли пользователя сбрасывает кеш '
+            'аутентификации.'
+        )
+
+    def test_03_deleted_user_rejected(self, admin_client, user_client, user):
+        user_queries(user_client, self.CATEGORIES_URL)
+        response = admin_client.delete(f'{self.USERS_URL}{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = user_client.get(self.CATEGORIES_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удалённого пользователя отклоняется.'
+        )
+
+    def test_04_role_token_principal(self, client, admin):
+        admin_client = role_token_client(client, admin)
+        user_queries(admin_client, self.CATEGORIES_URL)
+        data = {'name': 'Фильм', 'slug': 'films'}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if '"reviews_user"' in query['sql']
+        ]
+        assert not queries, (
+            'Проверьте, что права по токену с ролью проверяются без '
+            'обращения к таблице пользователей.'
+        )
+
+    def test_05_role_change_rejects_role_token(self, client, admin_client,
+                                               admin):
+        role_client = role_token_client(client, admin)
+        response = role_client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.OK
+
+        response = admin_client.patch(
+            f'{self.USERS_URL}{admin.username}/', data={'role': 'user'}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        response = role_client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли токен со старой ролью '
+            'отклоняется.'
+        )
+        response = admin_client.patch(
+            f'{self.USERS_URL}{admin.username}/', data={'bio': 'Новое'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_06_revoked_token_rejected(self, client, admin):
+        revocation_list.reset()
+        role_client = role_token_client(client, admin)
+        response = role_client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.OK
+
+        revoke_user_tokens(admin)
+        response = role_client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что отозванный токен отклоняется.'
+        )
+
+    def test_07_revocation_check_without_queries(self, client, admin,
+                                                 settings):
+        settings.REVOCATION_REFRESH_INTERVAL = 3600
+        revocation_list.reset()
+        role_client = role_token_client(client, admin)
+        role_client.get(self.CATEGORIES_URL)
+        with CaptureQueriesContext(connection) as context:
+            response = role_client.get(self.CATEGORIES_URL)
+        assert response.status_code == HTTPStatus.OK
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if '"reviews_revokedtoken"' in query['sql']
+        ]
+        assert not queries, (
+            'Проверьте, что проверка отзыва не обращается к БД для '
+            f'неотозванных токенов. Запросы: {queries}'
+        )
+
+    def test_08_auth_endpoints_throttled(self, client):
+        for number in range(10):
+            response = client.post('/api/v1/auth/token/', data={
+                'username': 'stuffing_target',
+                'confirmation_code': number,
+            })
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.post('/api/v1/auth/token/', data={
+            'username': 'Stuffing_Target', 'confirmation_code': 0
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что подбор кода для одного `username` ограничен.'
+        )
+        assert 'Retry-After' in response
+
+        for number in range(5):
+            response = client.post('/api/v1/auth/signup/', data={
+                'username': f'flood_{number}', 'email': 'flood@yamdb.fake'
+            })
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'flood_next', 'email': 'flood@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что регистрации на один `email` ограничены.'
+        )
+
+    def test_09_empty_bucket_not_written(self, client):
+        for number in range(11):
+            client.post('/api/v1/auth/token/', data={
+                'username': 'empty_bucket', 'confirmation_code': number,
+            })
+        key = 'throttle_auth_username_empty_bucket'
+        updated = bucket_store.connection().execute(
+            'SELECT updated FROM buckets WHERE key = ?', (key,)
+        ).fetchone()
+        for _ in range(3):
+            assert bucket_store.consume(key, 10, 10 / 60)
+        assert bucket_store.connection().execute(
+            'SELECT updated FROM buckets WHERE key = ?', (key,)
+        ).fetchone() == updated, (
+            'Проверьте, что отклонённый запрос не пишет в файл корзин.'
+        )
+
+    @pytest.mark.parametrize('policy, expected', (
+        ('closed', HTTPStatus.TOO_MANY_REQUESTS),
+        ('open', HTTPStatus.NOT_FOUND),
+    ))
+    def test_10_locked_store(self, client, settings, monkeypatch, policy,
+                             expected):
+        def locked(*args):
+            raise sqlite3.OperationalError('database is locked')
+
+        monkeypatch.setattr(bucket_store, 'consume', locked)
+        settings.THROTTLE_FAILURE_POLICY = policy
+        response = client.post('/api/v1/auth/token/', data={
+            'username': 'locked_store', 'confirmation_code': 0,
+        })
+        assert response.status_code == expected, (
+            'Проверьте, что занятый файл корзин обрабатывается по '
+            '`THROTTLE_FAILURE_POLICY`, а не приводит к ошибке 500.'
+        )
+
+    def test_11_late_revocation_seen(self, settings):
+        settings.REVOCATION_REFRESH_INTERVAL = 0
+        settings.REVOCATION_REBUILD_INTERVAL = 3600
+        revocation_list.reset()
+        expires_at = timezone.now() + timedelta(hours=1)
+        RevokedToken.objects.create(id=100, jti='late-100',
+                                    expires_at=expires_at)
+        assert revocation_list.is_revoked('late-100')
+        RevokedToken.objects.create(id=50, jti='late-50',
+                                    expires_at=expires_at)
+        assert revocation_list.is_revoked('late-50'), (
+            'Проверьте, что отзыв с меньшим id, зафиксированный после '
+            'подгрузки, всё равно попадает в список.'
+        )
+
+    def test_12_prune_off_login(self, client, admin):
+        IssuedToken.objects.create(
+            jti='expired', user=admin,
+            expires_at=timezone.now() - timedelta(hours=1)
+        )
+        with CaptureQueriesContext(connection) as context:
+            role_token_client(client, admin)
+        deletes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('DELETE')
+        ]
+        assert not deletes, (
+            'Проверьте, что выдача токена не удаляет истёкшие записи: '
+            f'это делает команда `prune_tokens`. Запросы: {deletes}'
+        )
+        call_command('prune_tokens')
+        assert not IssuedToken.objects.filter(jti='expired').exists(), (
+            'Проверьте, что `prune_tokens` удаляет истёкшие токены.'
+        )
+
+    def test_13_model_save_rejects_role_token(self, client, admin, user):
+        for changed, field, value in (
+            (admin, 'role', 'moderator'),
+            (user, 'is_active', False),
+        ):
+            role_client = role_token_client(client, changed)
+            response = role_client.get(self.CATEGORIES_URL)
+            assert response.status_code == HTTPStatus.OK
+            setattr(changed, field, value)
+            changed.save(update_fields=[field])
+            response = role_client.get(self.CATEGORIES_URL)
+            assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+                f'Проверьте, что смена `{field}` через `save()` (админка, '
+                'shell) отклоняет выданные токены.'
+            )
+        role_client = role_token_client(client, admin)
+        admin.bio = 'Новое'
+        admin.save()
+        response = role_client.get(self.CATEGORIES_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что правка профиля без смены прав не отзывает '
+            'токены.'
+        )
+
+    def test_14_forwarded_for_not_trusted(self, client):
+        for number in range(31):
+            response = client.post('/api/v1/auth/token/', data={
+                'username': f'rotating_{number}', 'confirmation_code': 0,
+            }, REMOTE_ADDR='198.51.100.7',
+                HTTP_X_FORWARDED_FOR=f'203.0.113.{number}')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что без доверенных прокси ограничение по IP '
+            'не сбрасывается подменой заголовка `X-Forwarded-For`.'
+        )
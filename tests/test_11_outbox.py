@@ -0,0 +1,67 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import OutboxEmail
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11Outbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    DATA = {'email': 'outbox@yamdb.fake', 'username': 'outbox_user'}
+
+    def test_01_signup_queues_email(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        outbox_before_count = len(mail.outbox)
+        for _ in range(2):
+            response = client.post(self.URL_SIGNUP, data=self.DATA)
+            assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что регистрация не отправляет письмо сама, а ставит '
+            'его в очередь.'
+        )
+        assert OutboxEmail.objects.filter(
+            recipient=self.DATA['email'], status=OutboxEmail.PENDING
+        ).count() == 1, (
+            'Проверьте, что повторная регистрация не дублирует письмо '
+            'в очереди.'
+        )
+
+        call_command('send_outbox_emails')
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert mail.outbox[-1].to == [self.DATA['email']]
+        assert OutboxEmail.objects.get().status == OutboxEmail.SENT
+
+    def test_02_failed_email_retried(self, client, settings, monkeypatch):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        client.post(self.URL_SIGNUP, data=self.DATA)
+
+        def fail(*args, **kwargs):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(
+            'django.core.mail.message.EmailMessage.send', fail
+        )
+        call_command('send_outbox_emails')
+        email = OutboxEmail.objects.get()
+        assert email.status == OutboxEmail.PENDING
+        assert email.attempts == 1
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что неудачное письмо откладывается перед повтором.'
+        )
+
+        OutboxEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command('send_outbox_emails')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.FAILED, (
+            'Проверьте, что после исчерпания попыток письмо помечается '
+            'как неотправленное.'
+        )
@@ -0,0 +1,351 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as WaitTimeout
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.timing import RequestTimings, current_timings
+from api.writer import run_write, write_queue
+from reviews.models import Category, Comment, Genre, Title
+
+from tests.utils import create_comments, create_reviews, create_titles
+
+
+def write_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].lstrip().upper().startswith(
+            ('UPDATE', 'INSERT', 'DELETE')
+        )
+    ]
+
+
+def queries_after_last_write(context):
+    queries = [query['sql'] for query in context.captured_queries]
+    writes = [
+        index for index, sql in enumerate(queries)
+        if sql.lstrip().upper().startswith(('UPDATE', 'INSERT', 'DELETE'))
+    ]
+    return queries[writes[-1] + 1:] if writes else queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12UsersMe:
+
+    USERS_ME_URL = '/api/v1/users/me/'
+
+    def test_01_get_is_read_only(self, user_client):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(self.USERS_ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert not write_queries(context), (
+            f'Проверьте, что GET-запрос к `{self.USERS_ME_URL}` не изменяет '
+            'данные в БД.'
+        )
+        etag = response['ETag']
+        response = user_client.get(
+            self.USERS_ME_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{self.USERS_ME_URL}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+
+        user_client.patch(self.USERS_ME_URL, data={'bio': 'Новое'})
+        response = user_client.get(
+            self.USERS_ME_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
+
+    def test_02_patch_writes_changed_fields(self, user_client, user):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(
+                self.USERS_ME_URL, data={'bio': user.bio}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert not write_queries(context), (
+            'Проверьте, что PATCH-запрос без изменений не пишет в БД.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(
+                self.USERS_ME_URL,
+                data={'bio': user.bio, 'first_name': 'Имя'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        updates = write_queries(context)
+        assert len(updates) == 1 and '"first_name"' in updates[0], updates
+        assert '"bio"' not in updates[0] and '"password"' not in updates[0], (
+            'Проверьте, что PATCH-запрос обновляет только изменённые поля.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12PartialUpdate:
+
+    def test_01_title_patch(self, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(
+                url, data={'name': titles[0]['name']}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert not write_queries(context), (
+            'Проверьте, что PATCH-запрос без изменений не пишет в БД.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(
+                url, data={'genre': [genres[2]['slug']], 'year': 1985}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            genres[2]['slug']
+        ]
+        assert response.json()['year'] == 1985
+        updates = [
+            sql for sql in write_queries(context)
+            if sql.startswith('UPDATE "reviews_title"')
+        ]
+        assert len(updates) == 1 and '"name"' not in updates[0], (
+            'Проверьте, что PATCH-запрос обновляет только изменённые поля.'
+        )
+        assert not queries_after_last_write(context), (
+            'Проверьте, что ответ на PATCH-запрос строится без повторного '
+            'чтения из БД.'
+        )
+
+    def test_02_review_patch(self, admin_client, admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(url, data={'text': 'Новый текст'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['author'] == admin.username
+        updates = write_queries(context)
+        assert len(updates) == 1 and '"score"' not in updates[0], updates
+        assert not queries_after_last_write(context)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12AuthorWrites:
+
+    @pytest.fixture
+    def data(self, admin_client, user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client}
+        )
+        review_url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        return {
+            'review_url': review_url,
+            'comment_url': f'{review_url}comments/{comments[0]["id"]}/',
+        }
+
+    def test_01_author_patch_single_update(self, user_client, user, data):
+        user_client.get(data['review_url'])
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(
+                data['review_url'], data={'text': 'Правка автора'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['text'] == 'Правка автора'
+        assert response.json()['author'] == user.username
+        queries = [query['sql'] for query in context.captured_queries]
+        assert queries[0].startswith('UPDATE "reviews_review"') and (
+            '"author_id" =' in queries[0]
+        ), (
+            'Проверьте, что автор правит отзыв одним условным UPDATE без '
+            f'предварительного чтения. Запросы: {queries}'
+        )
+        assert len(queries) == 2, queries
+
+    def test_02_author_delete_comment(self, user_client, data):
+        user_client.get(data['review_url'])
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.delete(data['comment_url'])
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert not any(
+            query['sql'].startswith('SELECT') and '"reviews_review"' in (
+                query['sql']
+            )
+            for query in context.captured_queries
+        ), 'Проверьте, что автор удаляет комментарий без чтения отзыва.'
+        response = user_client.delete(data['comment_url'])
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_moderators_keep_regular_path(self, moderator_client,
+                                             admin_client, data):
+        response = admin_client.patch(
+            data['review_url'], data={'text': 'Админ'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = moderator_client.delete(data['comment_url'])
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_04_non_numeric_pk(self, user_client, data):
+        for url in (data['review_url'], data['comment_url']):
+            url = url.rstrip('/').rsplit('/', 1)[0] + '/abc/'
+            for method in (user_client.patch, user_client.delete):
+                response = method(url, data={'text': 'Правка'})
+                assert response.status_code == HTTPStatus.NOT_FOUND, (
+                    f'Проверьте, что `{url}` с нечисловым id возвращает '
+                    '404, а не 500.'
+                )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ReviewCreate:
+
+    def test_01_single_insert(self, admin_client, user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client.get(url)
+        data = {'text': 'Отзыв', 'score': 7}
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(('BEGIN', 'SAVEPOINT', 'RELEASE'))
+        ]
+        assert len(queries) == 1 and queries[0].startswith('INSERT'), (
+            'Проверьте, что создание отзыва выполняется одним INSERT. '
+            f'Запросы: {queries}'
+        )
+
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'non_field_errors': [
+            'Вы уже оставляли отзыв о данном произведении.'
+        ]}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12WriteQueue:
+
+    def test_01_views_write_through_queue(self, admin_client, user_client,
+                                          settings):
+        settings.WRITE_QUEUE_ENABLED = True
+        batches = write_queue.batches
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        review_id = response.json()['id']
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        response = user_client.post(
+            '/api/v1/titles/999/reviews/', data=data
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = user_client.delete(f'{url}{review_id}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert write_queue.batches > batches, (
+            'Проверьте, что при включённой очереди записи выполняет '
+            'пишущий поток.'
+        )
+
+    @pytest.mark.parametrize(
+        'broken_job', ('exception', 'foreign_key', 'many_to_many')
+    )
+    def test_02_group_commit(self, settings, broken_job):
+        settings.WRITE_QUEUE_BATCH_WAIT = 0.05
+        batches = write_queue.batches
+        futures = []
+
+        def create(slug):
+            if slug != 'broken':
+                return Genre.objects.create(name=slug, slug=slug)
+            if broken_job == 'foreign_key':
+                # Внешние ключи отложены до COMMIT всей пачки.
+                return Comment.objects.create(
+                    review_id=999999, author_id=999999, text=slug
+                )
+            if broken_job == 'many_to_many':
+                category = Category.objects.create(name=slug, slug=slug)
+                title = Title.objects.create(
+                    name=slug, year=2000, category=category
+                )
+                return title.genre.add(999999)
+            Genre.objects.create(name='Сломанный', slug=slug)
+            raise ValueError(slug)
+
+        def submit(slug):
+            futures.append(write_queue.submit(create, slug))
+
+        threads = [
+            threading.Thread(target=submit, args=(slug,))
+            for slug in [f'genre-{number}' for number in range(9)]
+            + ['broken']
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        errors = [future.exception(timeout=10) for future in futures]
+        assert sum(error is not None for error in errors) == 1
+        assert Genre.objects.count() == 9, (
+            'Проверьте, что ошибка задания откатывает только его запись.'
+        )
+        assert write_queue.batches - batches < len(futures), (
+            'Проверьте, что близкие по времени записи фиксируются вместе.'
+        )
+
+    def test_03_writer_queries_timed(self, settings):
+        settings.WRITE_QUEUE_ENABLED = True
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            run_write(Genre.objects.create, name='Новый', slug='new')
+        finally:
+            current_timings.reset(token)
+        assert timings.query_count >= 1 and timings.durations.get('db'), (
+            'Проверьте, что запросы пишущего потока попадают в '
+            '`Server-Timing` и число запросов запроса API.'
+        )
+
+    def test_04_timeout_cancels_queued_job(self, settings):
+        settings.WRITE_QUEUE_ENABLED = True
+        settings.WRITE_QUEUE_TIMEOUT = 0.1
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait(timeout=10)
+            return Genre.objects.create(name='Начатый', slug='started')
+
+        blocking = write_queue.submit(block)
+        assert started.wait(timeout=10)
+        with pytest.raises(WaitTimeout):
+            run_write(Genre.objects.create, name='Отменённый', slug='late')
+        release.set()
+        blocking.result(timeout=10)
+        write_queue.submit(lambda: None).result(timeout=10)
+        assert not Genre.objects.filter(slug='late').exists(), (
+            'Проверьте, что задание, не дождавшееся очереди, отменяется '
+            'и не записывается после ответа с ошибкой.'
+        )
+
+    def test_05_started_job_not_timed_out(self, settings):
+        settings.WRITE_QUEUE_ENABLED = True
+        settings.WRITE_QUEUE_TIMEOUT = 0.05
+
+        def slow_create():
+            time.sleep(0.3)
+            return Genre.objects.create(name='Медленный', slug='slow')
+
+        genre = run_write(slow_create)
+        assert Genre.objects.filter(pk=genre.pk).exists(), (
+            'Проверьте, что начатое задание дожидается фиксации, '
+            'а не завершается ошибкой таймаута.'
+        )
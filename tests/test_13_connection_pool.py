@@ -0,0 +1,179 @@
+import os
+import runpy
+import sqlite3
+import threading
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, connections
+
+from api_yamdb import settings as project_settings
+from api_yamdb.backends.postgresql.pool import ConnectionPool, PoolExhausted
+from api_yamdb.backends.sqlite3.base import DatabaseWrapper
+from reviews.models import ChangeLogEntry, TitleCard
+from tests.utils import create_reviews
+
+# Запуск: DB_ENGINE=postgresql и переменные POSTGRES_* из README.
+postgresql = pytest.mark.skipif(
+    os.getenv('DB_ENGINE') != 'postgresql',
+    reason='Нужен PostgreSQL: задайте DB_ENGINE=postgresql.'
+)
+
+
+def check(connection):
+    try:
+        connection.execute('SELECT 1')
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def make_pool(**kwargs):
+    return ConnectionPool(
+        lambda: sqlite3.connect(':memory:', check_same_thread=False),
+        check, lambda connection: not connection.in_transaction, **kwargs
+    )
+
+
+class Test13ConnectionPool:
+
+    def test_01_connection_reused(self):
+        pool = make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        assert pool.acquire() is connection, (
+            'Проверьте, что возвращённое в пул соединение выдаётся повторно.'
+        )
+        assert pool.created == 1
+
+    def test_02_pool_size_limited(self):
+        pool = make_pool(max_size=1, timeout=0.01)
+        connection = pool.acquire()
+        with pytest.raises(PoolExhausted):
+            pool.acquire()
+        pool.release(connection)
+        assert pool.acquire() is connection
+
+    def test_03_broken_connection_replaced(self):
+        pool = make_pool(check_interval=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.close()
+        replacement = pool.acquire()
+        assert replacement is not connection and check(replacement), (
+            'Проверьте, что неисправное соединение из пула заменяется новым.'
+        )
+
+    def test_04_dirty_connection_discarded(self):
+        pool = make_pool()
+        connection = pool.acquire()
+        connection.execute('CREATE TABLE t (id INTEGER)')
+        connection.execute('INSERT INTO t VALUES (1)')
+        pool.release(connection)
+        assert pool.acquire() is not connection
+
+
+class Test13SQLite:
+
+    @pytest.mark.django_db
+    def test_01_new_connection_configured(self, tmp_path):
+        settings_dict = {
+            **project_settings.DATABASES['default'],
+            'NAME': str(tmp_path / 'db.sqlite3'),
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias='sqlite_check')
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                assert cursor.fetchone() == ('wal',), (
+                    'Проверьте, что новое соединение переводится в WAL.'
+                )
+                cursor.execute('PRAGMA busy_timeout')
+                assert cursor.fetchone() == (
+                    settings_dict['PRAGMAS']['busy_timeout'],
+                ), 'Проверьте, что соединению задаётся `busy_timeout`.'
+            statements = []
+            wrapper.connection.set_trace_callback(statements.append)
+            wrapper._start_transaction_under_autocommit()
+            wrapper.rollback()
+        finally:
+            wrapper.close()
+        assert statements[0] == 'BEGIN IMMEDIATE', (
+            'Проверьте, что транзакции записи начинаются с '
+            '`TRANSACTION_MODE` из настроек БД.'
+        )
+
+    def test_02_replicas_begin_deferred(self, monkeypatch):
+        monkeypatch.setenv('DB_ENGINE', 'sqlite')
+        monkeypatch.setenv('DB_REPLICAS', 'replica.sqlite3')
+        databases = runpy.run_path(project_settings.__file__)['DATABASES']
+        assert databases['default']['TRANSACTION_MODE'] == 'IMMEDIATE'
+        assert 'TRANSACTION_MODE' not in databases['replica_1'], (
+            'Проверьте, что реплики только для чтения не начинают '
+            'транзакции с блокировкой записи.'
+        )
+
+
+def trigger_names():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT tgname FROM pg_trigger WHERE NOT tgisinternal'
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+@postgresql
+@pytest.mark.django_db(transaction=True)
+class Test13PostgreSQL:
+
+    def test_01_pool_checkout_return(self):
+        database = connections['default']
+        database.close()
+        database.ensure_connection()
+        raw = database.connection
+        pool = database.get_pool(database.get_connection_params())
+        created = pool.created
+        database.close()
+        assert raw in [idle for idle, _ in pool.idle], (
+            'Проверьте, что закрытое соединение Django возвращается в пул.'
+        )
+        database.ensure_connection()
+        assert database.connection is raw and pool.created == created, (
+            'Проверьте, что новое соединение берётся из пула.'
+        )
+
+        def worker():
+            try:
+                with connections['default'].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(pool.idle) >= 1 and pool.created <= created + 3, (
+            'Проверьте, что соединения потоков возвращаются в пул.'
+        )
+
+    def test_02_migrations(self, admin_client, admin, user_client, user):
+        expected = {'reviews_titlecard_review', 'reviews_review_changelog'}
+        assert expected <= trigger_names()
+        call_command('migrate', 'reviews', '0007', verbosity=0)
+        assert not expected & trigger_names(), (
+            'Проверьте, что откат миграций 0008 и 0009 удаляет триггеры.'
+        )
+        call_command('migrate', 'reviews', verbosity=0)
+        assert expected <= trigger_names()
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        card = TitleCard.objects.get(pk=titles[0]['id'])
+        assert (card.review_count, card.score_total) == (2, 10), (
+            'Проверьте, что триггер миграции 0008 считает оценки.'
+        )
+        assert ChangeLogEntry.objects.filter(
+            model='review', object_id=str(reviews[0]['id'])
+        ).exists(), 'Проверьте, что триггеры миграции 0009 пишут журнал.'
@@ -0,0 +1,108 @@
+from http import HTTPStatus
+
+import pytest
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+REPLICA = 'replica_1'
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """Реплика SQLite в отдельном файле, добавленная на время теста."""
+    connections.databases[REPLICA] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    connections.ensure_defaults(REPLICA)
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield connections[REPLICA]
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+def table_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if '"reviews_titlecard"' in query['sql']
+    ]
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Реплики копируются для SQLite.'
+)
+@pytest.mark.django_db(transaction=True)
+class Test14Replicas:
+
+    URL = '/api/v1/titles/'
+
+    def test_01_reads_from_replica(self, admin_client, user_client,
+                                   replica):
+        create_titles(admin_client)
+        call_command('sync_replicas')
+        with CaptureQueriesContext(connection) as primary:
+            with CaptureQueriesContext(replica) as context:
+                response = user_client.get(self.URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 2
+        assert table_queries(context) and not table_queries(primary), (
+            'Проверьте, что GET-запросы к API читают с реплики.'
+        )
+
+    def test_02_sticky_primary_after_write(self, admin_client, replica):
+        create_titles(admin_client)
+        call_command('sync_replicas')
+        response = admin_client.post(
+            '/api/v1/genres/', data={'name': 'Новый', 'slug': 'new'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = admin_client.get('/api/v1/genres/?search=Новый')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что после записи клиент читает с primary, пока '
+            'реплика не обновлена.'
+        )
+
+    def test_03_sticky_cookie_across_workers(self, admin_client, replica):
+        create_titles(admin_client)
+        call_command('sync_replicas')
+        response = admin_client.post(
+            '/api/v1/genres/', data={'name': 'Новый', 'slug': 'new'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        cache.clear()
+        response = admin_client.get('/api/v1/genres/?search=Новый')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что метка записи хранится в подписанной cookie и '
+            'видна другому воркеру с пустым локальным кешем.'
+        )
+        admin_client.cookies['replica_sticky'] = '1'
+        response = admin_client.get('/api/v1/genres/?search=Новый')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что неподписанная cookie не отключает реплику.'
+        )
+
+
+class Test14SharedCache:
+
+    def test_01_local_cache_with_workers(self, settings, tmp_path):
+        config = apps.get_app_config('api')
+        settings.WEB_CONCURRENCY = 4
+        with pytest.raises(ImproperlyConfigured):
+            config.check_shared_cache()
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        config.check_shared_cache()
+        settings.WEB_CONCURRENCY = 1
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }}
+        config.check_shared_cache()
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+
+from api.async_views import aload_first, aload_page, read_executor
+from reviews.models import Title
+from tests.utils import create_comments
+
+
+@pytest.fixture
+def content(admin_client, user_client, moderator_client, user, moderator):
+    comments, reviews, titles = create_comments(
+        admin_client, {user: user_client, moderator: moderator_client}
+    )
+    return titles[0]['id'], reviews[0]['id']
+
+
+@async_to_sync
+async def async_request(method, url, **extra):
+    return await getattr(AsyncClient(), method)(url, **extra)
+
+
+def async_get(url, **extra):
+    return async_request('get', url, **extra)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15AsyncReads:
+
+    def urls(self, title_id, review_id):
+        return (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        )
+
+    def test_01_same_data_as_wsgi(self, content, monkeypatch):
+        wsgi = {url: Client().get(url) for url in self.urls(*content)}
+
+        async def no_fallback(request, *args, **kwargs):
+            raise AssertionError(
+                f'Проверьте, что `{request.path}` под ASGI обслуживает '
+                'асинхронная вьюха.'
+            )
+
+        monkeypatch.setattr('api.async_views.fallback', no_fallback)
+        for url, expected in wsgi.items():
+            response = async_get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.json() == expected.json(), (
+                f'Проверьте, что под ASGI `{url}` отдаёт те же данные, '
+                'что и вьюсет DRF.'
+            )
+            assert 'queries"' in response['Server-Timing'], (
+                'Проверьте, что под ASGI учитываются SQL-запросы '
+                'асинхронных вьюх.'
+            )
+
+    def test_02_fallback_to_viewsets(self, content, token_admin):
+        title_id, review_id = content
+        response = async_get(f'/api/v1/titles/{title_id + 100}/reviews/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что отзывы несуществующего произведения под ASGI '
+            'возвращают 404.'
+        )
+        response = async_get('/api/v1/titles/?year=1988')
+        assert [title['year'] for title in response.json()['results']] == [
+            1988
+        ], 'Проверьте, что фильтры списка произведений работают под ASGI.'
+        response = async_get('/api/v1/titles/', authorization='Bearer x')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что под ASGI неверный токен отклоняется.'
+        )
+        response = async_request(
+            'post', '/api/v1/genres/', data={'name': 'Новый', 'slug': 'new'},
+            content_type='application/json',
+            authorization=f'Bearer {token_admin["access"]}',
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что запись через ASGI обрабатывают вьюсеты.'
+        )
+
+    def test_03_thread_connections_reused(self, content):
+        opened = []
+
+        def remember(sender, connection, **kwargs):
+            if threading.get_ident() != main_thread:
+                opened.append(connection)
+
+        main_thread = threading.get_ident()
+        connection_created.connect(remember)
+
+        @async_to_sync
+        async def burst():
+            queryset = Title.objects.order_by('pk')
+            await asyncio.gather(*(
+                aload_page(queryset, 1, 5) if number % 2
+                else aload_first(queryset)
+                for number in range(50)
+            ))
+
+        try:
+            burst()
+            burst()
+        finally:
+            connection_created.disconnect(remember)
+        assert len(opened) <= read_executor._max_workers, (
+            'Проверьте, что потоки чтения асинхронных вьюх не открывают '
+            'новое соединение с БД на каждую выборку.'
+        )
@@ -0,0 +1,79 @@
+import datetime
+import decimal
+import io
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from tests.utils import create_titles
+
+DATA = OrderedDict(
+    name='Терминатор   «Судный день»',
+    created=datetime.datetime(2021, 5, 1, 12, 30, 15, 123456,
+                              tzinfo=timezone.utc),
+    naive=datetime.datetime(2021, 5, 1, 12, 30),
+    offset=datetime.datetime(
+        2021, 5, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=3))
+    ),
+    date=datetime.date(2021, 5, 1),
+    time=datetime.time(9, 15, 0, 500),
+    duration=datetime.timedelta(minutes=90),
+    price=decimal.Decimal('9.90'),
+    uuid=uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    lazy=gettext_lazy('Фильм'),
+    genres=({'slug': 'drama', 1: 'one'},),
+    empty=None,
+)
+
+
+class Test16FastJSON:
+
+    def test_01_renderer_matches_drf(self):
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(
+            DATA
+        ), (
+            'Проверьте, что `FastJSONRenderer` отдаёт те же байты, что '
+            '`JSONRenderer` DRF: даты, Decimal, кириллица, разделители строк.'
+        )
+
+    def test_02_indent_uses_drf(self):
+        media_type = 'application/json; indent=4'
+        assert FastJSONRenderer().render(DATA, media_type) == (
+            JSONRenderer().render(DATA, media_type)
+        ), 'Проверьте, что отступы в ответе задаются как в DRF.'
+
+    def test_03_parser(self):
+        body = '{"name": "Кин-дза-дза!", "year": 1986, "score": 9.5}'
+        parsed = FastJSONParser().parse(io.BytesIO(body.encode()))
+        assert parsed == {'name': 'Кин-дза-дза!', 'year': 1986,
+                          'score': 9.5}
+        with pytest.raises(ParseError) as fast_error:
+            FastJSONParser().parse(io.BytesIO(b'{"name": '))
+        with pytest.raises(ParseError) as drf_error:
+            JSONParser().parse(io.BytesIO(b'{"name": '))
+        assert str(fast_error.value) == str(drf_error.value), (
+            'Проверьте, что ошибки разбора JSON совпадают с DRF.'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_api_uses_fast_json(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.post(
+            '/api/v1/genres/', data={'name': 'Нуар', 'slug': 'noir'},
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = admin_client.get('/api/v1/titles/')
+        assert response.accepted_renderer.__class__ is FastJSONRenderer
+        assert response.content == JSONRenderer().render(response.data), (
+            'Проверьте, что ответ API совпадает с выводом `JSONRenderer`.'
+        )
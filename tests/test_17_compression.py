@@ -0,0 +1,107 @@
+import gzip
+import shutil
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory
+
+from api.compression import choose_encoding, compress_response
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def static_dir(settings, tmp_path):
+    """Копия статики проекта во временном каталоге."""
+    target = tmp_path / 'static'
+    shutil.copytree(Path(django_settings.STATICFILES_DIRS[0]), target)
+    settings.STATICFILES_DIRS = (target,)
+    return target
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Compression:
+
+    URL = '/api/v1/titles/'
+
+    def test_01_compresses_large_json(self, admin_client, settings):
+        create_titles(admin_client)
+        plain = admin_client.get(self.URL)
+        settings.COMPRESSION_MIN_SIZE = 100
+        response = admin_client.get(self.URL, HTTP_ACCEPT_ENCODING='gzip')
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Encoding'] == 'gzip', (
+            'Проверьте, что ответы API сжимаются gzip, если клиент его '
+            'принимает.'
+        )
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(response.content) == plain.content
+
+    def test_02_min_size(self, admin_client, settings):
+        create_titles(admin_client)
+        settings.COMPRESSION_MIN_SIZE = 1 << 20
+        response = admin_client.get(self.URL, HTTP_ACCEPT_ENCODING='gzip')
+        assert not response.has_header('Content-Encoding'), (
+            'Проверьте, что ответы короче `COMPRESSION_MIN_SIZE` '
+            'не сжимаются.'
+        )
+        settings.COMPRESSION_MIN_SIZE = 100
+        response = admin_client.get(
+            self.URL, HTTP_ACCEPT_ENCODING='gzip;q=0, identity'
+        )
+        assert not response.has_header('Content-Encoding'), (
+            'Проверьте, что `gzip;q=0` запрещает сжатие.'
+        )
+
+    def test_03_streaming(self):
+        chunks = [('строка %d\n' % number).encode() for number in range(500)]
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = compress_response(request, StreamingHttpResponse(
+            iter(chunks), content_type='text/csv'
+        ))
+        assert response.streaming
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(
+            b''.join(response.streaming_content)
+        ) == b''.join(chunks), 'Проверьте сжатие потоковых ответов.'
+
+    def test_04_precompressed_static(self, client, static_dir):
+        call_command('compress_static')
+        original = (static_dir / 'redoc.yaml').read_bytes()
+        assert gzip.decompress(
+            (static_dir / 'redoc.yaml.gz').read_bytes()
+        ) == original, 'Проверьте, что `compress_static` сжимает redoc.yaml.'
+        response = client.get(
+            '/static/redoc.yaml', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        assert response['Content-Encoding'] == 'gzip'
+        assert b''.join(response.streaming_content) == (
+            static_dir / 'redoc.yaml.gz'
+        ).read_bytes(), 'Проверьте, что отдаётся заранее сжатая копия.'
+        response = client.get('/static/redoc.yaml')
+        assert not response.has_header('Content-Encoding')
+        assert b''.join(response.streaming_content) == original
+
+    @pytest.mark.parametrize('header, expected', (
+        ('gzip, br', 'br'),
+        ('gzip;q=1, br;q=0.5', 'gzip'),
+        ('br;q=0.8, gzip;q=0.9', 'gzip'),
+        ('br;q=0.5, gzip;q=0.5', 'br'),
+        ('*', 'br'),
+        ('*;q=0.5, br;q=0.1', 'gzip'),
+        ('*, br;q=0', 'gzip'),
+        ('gzip;q=0, *;q=0', None),
+        ('gzip;q=abc', None),
+        ('identity', None),
+        ('', None),
+    ))
+    def test_05_encoding_order(self, header, expected):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+        assert choose_encoding(request, ('br', 'gzip')) == expected, (
+            f'Проверьте выбор кодировки для `Accept-Encoding: {header}`: '
+            'больший вес `q` важнее порядка сервера, `*` задаёт вес '
+            'остальных кодировок.'
+        )
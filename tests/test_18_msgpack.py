@@ -0,0 +1,81 @@
+import math
+from http import HTTPStatus
+
+import pytest
+
+from api.packing import PackError, py_packb, py_unpackb, unpackb
+from api.renderers import MessagePackRenderer
+from tests.utils import create_titles
+
+VALUES = (
+    None, True, False, 0, 127, 128, 255, 256, 65535, 65536, 2 ** 32,
+    2 ** 64 - 1, -1, -32, -33, -128, -129, -2 ** 15 - 1, -2 ** 31 - 1,
+    -2 ** 63, 1.5, -0.25, '', 'Сталкер', 'я' * 40, 'ы' * 40000,
+    b'\x00\xff', [], list(range(20)), {'a': [1, {'b': None}]},
+    {str(number): number for number in range(20)}, {1: 'один'},
+)
+
+
+class Test18MessagePack:
+
+    def test_01_spec_example(self):
+        assert py_packb({'compact': True, 'schema': 0}) == (
+            b'\x82\xa7compact\xc3\xa6schema\x00'
+        ), 'Проверьте кодирование MessagePack по спецификации.'
+
+    def test_02_round_trip(self):
+        for value in VALUES:
+            assert py_unpackb(py_packb(value)) == value, (
+                f'Проверьте кодирование и разбор значения {value!r:.40}.'
+            )
+        assert math.isnan(py_unpackb(py_packb(float('nan'))))
+
+    def test_03_errors(self):
+        for data in (b'\x92\x01', b'\xc1', b'\x01\x02', b'\xa2\xff\xfe'):
+            with pytest.raises(PackError):
+                unpackb(data)
+        for data in (b'\x91' * 100000 + b'\xc0', b'\x81\xc0' * 5000):
+            with pytest.raises(PackError):
+                py_unpackb(data)
+        nested = None
+        for _ in range(50):
+            nested = [nested]
+        assert py_unpackb(py_packb(nested)) == nested
+        with pytest.raises(OverflowError):
+            py_packb(2 ** 64)
+        with pytest.raises(TypeError):
+            py_packb(object())
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_api_negotiation(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        expected = admin_client.get('/api/v1/titles/').json()
+        response = admin_client.get(
+            '/api/v1/titles/', HTTP_ACCEPT='application/msgpack'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'application/msgpack'
+        assert unpackb(response.content) == expected, (
+            'Проверьте, что в MessagePack отдаются те же поля, что в JSON.'
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = user_client.post(
+            url, MessagePackRenderer().render({'text': 'Шедевр', 'score': 9}),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что API принимает тела запросов в MessagePack.'
+        )
+        review = unpackb(response.content)
+        assert review['text'] == 'Шедевр' and review['pub_date'].endswith(
+            'Z'
+        ), 'Проверьте, что даты кодируются строками, как в JSON.'
+        for body in (b'\x92\x01', b'\x91' * 100000 + b'\xc0'):
+            response = user_client.post(
+                url, body, content_type='application/msgpack'
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что некорректное тело MessagePack отклоняется '
+                'со статусом 400.'
+            )
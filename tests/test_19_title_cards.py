@@ -0,0 +1,151 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Review, Title, TitleCard
+from tests.utils import create_reviews, create_titles
+
+
+def list_titles(client, query=''):
+    response = client.get('/api/v1/titles/' + query)
+    assert response.status_code == HTTPStatus.OK
+    return response.json()['results']
+
+
+def detail_titles(client, titles):
+    return [
+        client.get(f'/api/v1/titles/{title["id"]}/').json()
+        for title in titles
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19TitleCards:
+
+    def test_01_list_matches_detail(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert list_titles(admin_client) == sorted(
+            detail_titles(admin_client, titles), key=lambda t: t['name']
+        ), (
+            'Проверьте, что список произведений из карточек совпадает '
+            'с карточками отдельных произведений.'
+        )
+
+    def test_02_list_reads_one_table(self, admin_client, client):
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            client.get('/api/v1/titles/?genre=comedy')
+        queries = [query['sql'].upper() for query in context]
+        assert queries
+        for sql in queries:
+            assert 'JOIN' not in sql and 'GROUP BY' not in sql, (
+                'Проверьте, что список произведений читается из одной '
+                f'таблицы без JOIN и агрегатов: {sql}'
+            )
+
+    def test_03_reviews_update_rating(self, admin_client, admin,
+                                      user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        card = TitleCard.objects.get(pk=titles[0]['id'])
+        assert (card.review_count, card.score_total, card.rating) == (
+            2, 10, 5
+        ), 'Проверьте, что новые отзывы учитываются в карточке.'
+        response = user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 2}
+        )
+        assert response.status_code == HTTPStatus.OK
+        card.refresh_from_db()
+        assert (card.score_total, card.rating) == (7, 3.5), (
+            'Проверьте, что изменение оценки пересчитывает рейтинг.'
+        )
+        Review.objects.filter(pk=reviews[0]['id']).delete()
+        card.refresh_from_db()
+        assert (card.review_count, card.rating) == (1, 2)
+        Review.objects.filter(pk=reviews[1]['id']).delete()
+        card.refresh_from_db()
+        assert (card.review_count, card.rating) == (0, None), (
+            'Проверьте, что без отзывов рейтинг карточки пуст.'
+        )
+
+    def test_04_related_changes(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        genre = Genre.objects.get(slug='comedy')
+        genre.name, genre.slug = 'Аниме', 'anime'
+        genre.save()
+        category = Category.objects.get(slug='films')
+        category.name = 'Кино'
+        category.save()
+        title = Title.objects.get(pk=titles[1]['id'])
+        title.genre.add(genre)
+        title.year = 1990
+        title.save(update_fields=['year'])
+        Genre.objects.get(slug='horror').delete()
+        assert list_titles(admin_client) == sorted(
+            detail_titles(admin_client, titles), key=lambda t: t['name']
+        ), (
+            'Проверьте, что изменения жанров, категорий и произведений '
+            'попадают в карточки.'
+        )
+        assert [t['name'] for t in list_titles(
+            admin_client, '?genre=anime'
+        )] == ['Крепкий орешек', 'Терминатор']
+        genre.genres.clear()
+        assert list_titles(admin_client, '?genre=anime') == []
+
+    def test_05_filters(self, admin_client):
+        create_titles(admin_client)
+        for query, names in (
+            ('?genre=horror', ['Терминатор']),
+            ('?genre=horr', []),
+            ('?genre=HORROR', []),
+            ('?genre=h_rror', []),
+            ('?genre=horror,comedy', []),
+            ('?genre=comedy,horror', []),
+            ('?category=books', ['Крепкий орешек']),
+            ('?year=1984', ['Терминатор']),
+            ('?name=репкий', ['Крепкий орешек']),
+        ):
+            assert [
+                title['name'] for title in list_titles(admin_client, query)
+            ] == names, f'Проверьте фильтр `{query}` по карточкам.'
+
+    def test_06_rebuild_command(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        expected = list_titles(admin_client)
+        TitleCard.objects.all().delete()
+        call_command('rebuild_title_cards')
+        assert list_titles(admin_client) == expected, (
+            'Проверьте, что `rebuild_title_cards` восстанавливает карточки.'
+        )
+        TitleCard.objects.filter(pk=titles[0]['id']).update(name='?')
+        call_command('rebuild_title_cards', titles[0]['id'])
+        assert list_titles(admin_client) == expected
+
+    def test_07_card_failure_rolls_back_write(self, admin_client,
+                                              monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+
+        def broken(*args, **kwargs):
+            raise DatabaseError('Карточка недоступна.')
+
+        monkeypatch.setattr('api.cards.title_values', broken)
+        monkeypatch.setattr('api.cards.refresh_card_genres', broken)
+        title = Title.objects.get(pk=titles[0]['id'])
+        title.name = 'Другое'
+        genre = Genre.objects.get(slug='horror')
+        genre.name = 'Хоррор'
+        for instance in (title, genre):
+            with pytest.raises(DatabaseError):
+                instance.save()
+        assert Title.objects.get(pk=title.pk).name == titles[0]['name'], (
+            'Проверьте, что произведение и его карточка сохраняются в '
+            'одной транзакции.'
+        )
+        assert Genre.objects.get(pk=genre.pk).name != 'Хоррор'
@@ -0,0 +1,234 @@
+import threading
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from reviews.models import ChangeLogEntry, Genre, Review, User
+from tests.utils import create_comments, create_titles
+
+URL = '/api/v1/changes/'
+
+
+def last_cursor():
+    return ChangeLogEntry.objects.aggregate(cursor=Max('id'))['cursor'] or 0
+
+
+def read_feed(client, since, limit=None):
+    """Все записи ленты после ``since``, по страницам."""
+    results = []
+    while True:
+        query = f'?since={since}' + (f'&limit={limit}' if limit else '')
+        response = client.get(URL + query)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{URL}` возвращает статус 200.'
+        )
+        data = response.json()
+        results += data['results']
+        since = data['cursor']
+        if not data['has_more']:
+            return results
+
+
+def changes(entries):
+    return [
+        (entry['model'], entry['object_id'], entry['action'])
+        for entry in entries
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ChangeFeed:
+
+    def test_01_records_creates(self, admin_client, admin, client,
+                                user_client, user):
+        since = last_cursor()
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        feed = changes(read_feed(client, since))
+        for expected in (
+            ('genre', 'horror', 'created'),
+            ('category', 'films', 'created'),
+            ('title', str(titles[0]['id']), 'created'),
+            ('review', str(reviews[0]['id']), 'created'),
+            ('comment', str(comments[0]['id']), 'created'),
+        ):
+            assert expected in feed, (
+                f'Проверьте, что в ленте изменений есть запись {expected}.'
+            )
+        assert not [entry for entry in feed if entry[0] == 'user'], (
+            'Проверьте, что изменения пользователей видит только '
+            'администратор.'
+        )
+        entry = read_feed(admin_client, since)[-1]
+        assert entry['model'] == 'comment'
+        assert (entry['title_id'], entry['review_id']) == (
+            titles[0]['id'], reviews[0]['id']
+        ), 'Проверьте, что запись комментария содержит его отзыв.'
+
+    def test_02_pagination(self, admin_client, client):
+        since = last_cursor()
+        create_titles(admin_client)
+        full = read_feed(client, since)
+        response = client.get(f'{URL}?since={since}&limit=2').json()
+        assert len(response['results']) == 2 and response['has_more']
+        assert response['cursor'] == response['results'][-1]['id']
+        assert read_feed(client, since, limit=3) == full, (
+            'Проверьте, что постраничное чтение ленты по курсору не '
+            'теряет и не повторяет записи.'
+        )
+        response = client.get(f'{URL}?since={full[-1]["id"]}').json()
+        assert response == {
+            'cursor': full[-1]['id'], 'has_more': False, 'results': []
+        }
+
+    def test_03_updates_and_deletes(self, admin_client, admin, client,
+                                    user_client, user):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = str(titles[0]['id'])
+        since = last_cursor()
+        genre = Genre.objects.get(slug='horror')
+        genre.slug = 'scary'
+        genre.save()
+        assert changes(read_feed(client, since)) == [
+            ('genre', 'horror', 'deleted'),
+            ('genre', 'scary', 'updated'),
+            ('title', title_id, 'updated'),
+        ], (
+            'Проверьте, что смена слага удаляет объект под старым '
+            'ключом и меняет произведения жанра.'
+        )
+        since = last_cursor()
+        response = user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/',
+            data={'score': 3}
+        )
+        assert response.status_code == HTTPStatus.OK
+        Review.objects.filter(pk=reviews[0]['id']).delete()
+        feed = changes(read_feed(client, since))
+        assert feed[:2] == [
+            ('review', str(reviews[1]['id']), 'updated'),
+            ('title', title_id, 'updated'),
+        ], 'Проверьте, что изменение оценки попадает в ленту.'
+        assert ('review', str(reviews[0]['id']), 'deleted') in feed
+        assert feed[-1] == ('title', title_id, 'updated')
+        assert [entry for entry in feed if entry[0] == 'comment'], (
+            'Проверьте, что каскадное удаление попадает в ленту.'
+        )
+
+    def test_04_username_change(self, admin_client, admin, client,
+                                user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        since = last_cursor()
+        renamed = User.objects.get(pk=user.pk)
+        renamed.bio = 'Новое'
+        renamed.save()
+        assert read_feed(client, since) == [], (
+            'Проверьте, что отзывы не попадают в ленту, если имя автора '
+            'не менялось.'
+        )
+        renamed.username = 'renamed'
+        renamed.save()
+        feed = read_feed(client, since)
+        assert sorted(changes(feed)) == [
+            ('comment', str(comments[1]['id']), 'updated'),
+            ('review', str(reviews[1]['id']), 'updated'),
+        ], (
+            'Проверьте, что при смене username в ленту попадают отзывы '
+            'и комментарии пользователя: в них указан автор.'
+        )
+        comment = [entry for entry in feed if entry['model'] == 'comment'][0]
+        assert (comment['title_id'], comment['review_id']) == (
+            titles[0]['id'], reviews[0]['id']
+        )
+
+    def test_05_invalid_params(self, client):
+        for query in ('?since=abc', '?since=-1', '?limit=0'):
+            response = client.get(URL + query)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `{URL}{query}` возвращает статус 400.'
+            )
+
+    def test_06_compaction(self, admin_client, client):
+        since = last_cursor()
+        create_titles(admin_client)
+        genre = Genre.objects.get(slug='comedy')
+        for name in ('Комедия 2', 'Комедия 3'):
+            genre.name = name
+            genre.save()
+        Genre.objects.get(slug='drama').delete()
+        expected = {}
+        for model, object_id, action in changes(read_feed(client, since)):
+            expected[model, object_id] = action
+        ChangeLogEntry.objects.update(
+            changed_at=timezone.now() - timedelta(days=30)
+        )
+        call_command('compact_changes', days=7, batch_size=2)
+        feed = changes(read_feed(client, since))
+        assert len(feed) == len(expected), (
+            'Проверьте, что после сжатия у объекта остаётся одна запись.'
+        )
+        assert {
+            (model, object_id): action for model, object_id, action in feed
+        } == expected, (
+            'Проверьте, что сжатие сохраняет последнюю запись объекта.'
+        )
+        assert ('genre', 'drama', 'deleted') in feed
+
+    def test_07_watermark(self, admin_client, client, monkeypatch):
+        since = last_cursor()
+        create_titles(admin_client)
+        full = read_feed(client, since)
+        held = full[3]['id']
+        monkeypatch.setattr(
+            'api.changes.feed_watermark', lambda using: held
+        )
+        response = client.get(f'{URL}?since={since}').json()
+        assert response['results'] == full[:3], (
+            'Проверьте, что лента не отдаёт записи начиная с '
+            '`feed_watermark`: их транзакции ещё не завершены.'
+        )
+        assert response['cursor'] == full[2]['id']
+        assert not response['has_more']
+
+    @pytest.mark.skipif(
+        connection.vendor != 'postgresql',
+        reason='Порядок фиксации транзакций важен для PostgreSQL.'
+    )
+    def test_08_uncommitted_entry_holds_feed(self, client):
+        since = last_cursor()
+        inserted, release = threading.Event(), threading.Event()
+
+        def slow_writer():
+            try:
+                with transaction.atomic():
+                    Genre.objects.create(name='Первый', slug='first')
+                    inserted.set()
+                    release.wait(10)
+            finally:
+                connections.close_all()
+
+        writer = threading.Thread(target=slow_writer)
+        writer.start()
+        inserted.wait(10)
+        Genre.objects.create(name='Второй', slug='second')
+        try:
+            assert read_feed(client, since) == [], (
+                'Проверьте, что лента не отдаёт запись, перед которой '
+                'есть id незавершённой транзакции.'
+            )
+        finally:
+            release.set()
+            writer.join()
+        assert changes(read_feed(client, since)) == [
+            ('genre', 'first', 'created'), ('genre', 'second', 'created'),
+        ]
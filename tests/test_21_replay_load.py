@@ -0,0 +1,57 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Genre
+
+
+def write_log(path, records):
+    path.write_text(
+        '\n'.join(json.dumps(record, ensure_ascii=False) for record in records),
+        encoding='utf-8'
+    )
+    return str(path)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ReplayLoad:
+
+    def test_01_replays_log(self, live_server, admin, tmp_path):
+        log = write_log(tmp_path / 'requests.jsonl', [
+            {'method': 'GET', 'path': '/api/v1/titles/?year=2000'},
+            {'method': 'GET', 'path': '/api/v1/users/', 'auth': 'admin'},
+            {
+                'method': 'POST', 'path': '/api/v1/genres/', 'auth': 'admin',
+                'body': {'name': 'Повтор', 'slug': 'replayed'},
+            },
+            {'view': 'titles-list', 'status': 200},
+        ])
+        out = StringIO()
+        call_command(
+            'replay_load', log=log, base_url=live_server.url,
+            users={'admin': admin.username}, concurrency=1, stdout=out
+        )
+        report = out.getvalue()
+        assert 'Запросов: 3 ' in report, (
+            'Проверьте, что `replay_load --log` выполняет запросы журнала '
+            'и пропускает строки без `method` и `path`.'
+        )
+        assert 'Статусы: 200: 2, 201: 1' in report, (
+            'Проверьте, что запросы с `auth` идут с токеном пользователя '
+            'из опции `--users`.'
+        )
+        assert Genre.objects.filter(slug='replayed').exists()
+
+    def test_02_users_option(self, tmp_path):
+        log = write_log(tmp_path / 'empty.jsonl', [{'view': 'titles-list'}])
+        with pytest.raises(CommandError):
+            call_command('replay_load', '--users', 'root=admin', log=log)
+        with pytest.raises(CommandError, match='Нет запросов'):
+            call_command('replay_load', '--users', 'admin=name', log=log)
+
+    def test_03_concurrency_checked(self, tmp_path):
+        log = write_log(tmp_path / 'empty.jsonl', [])
+        with pytest.raises(CommandError, match='--concurrency'):
+            call_command('replay_load', '--concurrency', '0', log=log)